@@ -0,0 +1,13 @@
+# Tests run offline against the benchmark stand-in water model and the
+# committed revenue model. The environment has to be set before any
+# simulator module is imported, so it happens here at collection time.
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.pop("FAB_INFERENCE_URL", None)
+os.environ.pop("FAB_SCENARIO_DB", None)
+
+from v7_5_benchmarks import use_standin_models  # noqa: E402
+
+use_standin_models()
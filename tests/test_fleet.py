@@ -0,0 +1,19 @@
+import numpy as np
+import pandas as pd
+
+from v7_5_fleet import FleetAggregator
+
+def test_roi_percentiles_within_one_bin_of_exact():
+    rng = np.random.default_rng(0)
+    n = 50_000
+    roi = np.exp(rng.normal(2.0, 1.5, (n, 1)))
+    chunk = pd.DataFrame({"fab_id": np.arange(n), "intention": "Automotive", "size": 300,
+                          "rec": 10.0, "mon": 0.0, "zld": 0.0})
+    out = {m: np.zeros((n, 1)) for m in ("revenue", "profit", "gal_saved", "dollar_saved")}
+    out["roi"] = roi
+    agg = FleetAggregator(years=[2030])
+    agg.add(chunk, out)
+    got = agg.roi_percentiles((5, 50, 95))[:, 0]
+    exact = np.percentile(roi[:, 0], [5, 50, 95])
+    ratio = got / exact
+    assert np.all(ratio >= 0.999) and np.all(ratio <= 1.021), ratio
@@ -0,0 +1,52 @@
+import os
+import threading
+
+import numpy as np
+import pytest
+
+import v7_5_inference_server as service
+
+class _Doubler:
+    def predict(self, X):
+        return np.asarray(X, dtype=float).sum(axis=1) * 2
+
+class _Tripler:
+    def predict(self, X):
+        return np.asarray(X, dtype=float).sum(axis=1) * 3
+
+@pytest.fixture
+def server(tmp_path):
+    url = f"unix:{tmp_path / 'fab.sock'}"
+    server = service.make_server(url, {"revenue": _Doubler()}, window_ms=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield url, server
+    server.shutdown()
+    server.server_close()
+
+def _stop(url, server):
+    server.shutdown()
+    server.server_close()
+    os.unlink(url[len("unix:"):])
+
+def test_predicts_through_the_service(server):
+    url, _ = server
+    model = service.connect_model("revenue", url, fallback=_Tripler)
+    np.testing.assert_array_equal(model.predict(np.ones((3, 2))), [4.0, 4.0, 4.0])
+
+def test_falls_back_to_local_model_when_service_dies(server):
+    url, srv = server
+    model = service.connect_model("revenue", url, fallback=_Tripler)
+    model.predict(np.ones((1, 2)))
+    _stop(url, srv)
+    model.client.close()  # the dead service's connections are gone
+    np.testing.assert_array_equal(model.predict(np.ones((2, 2))), [6.0, 6.0])
+    # Later calls stay local until the retry interval passes
+    np.testing.assert_array_equal(model.predict(np.ones((1, 2))), [6.0])
+
+def test_without_fallback_connection_errors_propagate(server):
+    url, srv = server
+    model = service.connect_model("revenue", url)
+    _stop(url, srv)
+    model.client.close()
+    with pytest.raises(OSError):
+        model.predict(np.ones((1, 2)))
@@ -0,0 +1,38 @@
+import pickle
+
+import pytest
+
+import v7_5_model_bootstrap as bootstrap
+
+@pytest.fixture
+def water_path(tmp_path, monkeypatch):
+    # No env, manifest or sidecar hash for the water model
+    monkeypatch.setattr(bootstrap, "MODEL_DIR", str(tmp_path))
+    monkeypatch.setattr(bootstrap, "CHECKSUMS_FILE", str(tmp_path / "missing.json"))
+    monkeypatch.delenv(bootstrap.MODELS["water"]["env"], raising=False)
+    return bootstrap.model_path("water")
+
+def _write(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+
+def test_unpinned_pickle_passes_sanity_check(water_path):
+    _write(water_path, pickle.dumps(b"x" * 1_100_000, protocol=4))
+    assert bootstrap.ensure_model("water", offline=True) == water_path
+
+@pytest.mark.parametrize("data", [
+    b"<!DOCTYPE html><html>Google Drive - quota exceeded</html>" * 30_000,  # gdown error page
+    pickle.dumps(b"x" * 1_100_000, protocol=4)[:500_000],                   # truncated download
+])
+def test_unpinned_bad_file_is_rejected(water_path, data):
+    _write(water_path, data)
+    with pytest.raises(bootstrap.ModelUnavailableError):
+        bootstrap.ensure_model("water", offline=True)
+
+def test_pinned_hash_is_enforced(water_path, monkeypatch):
+    _write(water_path, pickle.dumps(b"x" * 1_100_000, protocol=4))
+    monkeypatch.setenv(bootstrap.MODELS["water"]["env"], "0" * 64)
+    with pytest.raises(bootstrap.ModelUnavailableError):
+        bootstrap.ensure_model("water", offline=True)
+    monkeypatch.setenv(bootstrap.MODELS["water"]["env"], bootstrap.sha256_file(water_path))
+    assert bootstrap.ensure_model("water", offline=True) == water_path
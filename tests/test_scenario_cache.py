@@ -0,0 +1,52 @@
+import numpy as np
+
+import v7_5_sim_core as sim
+from v7_5_scenario_cache import SCENARIO_CACHE, ScenarioCache, quantize
+
+YEARS = np.arange(2025, 2076)
+
+def test_lru_evicts_least_recently_used():
+    cache = ScenarioCache(max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    stats = cache.stats()
+    assert stats["evictions"] == 1 and stats["size"] == 2
+
+def test_get_or_compute_computes_once():
+    cache = ScenarioCache(max_size=4)
+    calls = []
+    compute = lambda: calls.append(1) or {"x": np.arange(3)}
+    first = cache.get_or_compute("k", compute)
+    assert cache.get_or_compute("k", compute) is first
+    assert len(calls) == 1
+
+def test_quantize_snaps_only_grid_values():
+    assert quantize(120.0) == 120.0
+    assert quantize(120.0000000001) == 120.0
+    assert quantize(125.0) is None
+
+def test_cached_horizon_matches_simulate_horizon():
+    SCENARIO_CACHE.clear()
+    args = ("Medical Devices", 450, 200.0, 30.0, 60.0)
+    cached = sim.cached_horizon(*args, YEARS)
+    again = sim.cached_horizon(*args, YEARS)
+    assert again is cached
+    assert not cached["roi"].flags.writeable
+    fresh = sim.simulate_horizon(*args, YEARS)
+    for metric in ("revenue", "profit", "roi", "gal_saved"):
+        np.testing.assert_array_equal(cached[metric], fresh[metric])
+
+def test_off_grid_inputs_bypass_the_cache():
+    assert sim.scenario_key("Automotive", 300, 105.0, 0.0, 0.0, YEARS, 1.0) is None
+    SCENARIO_CACHE.clear()
+    sim.cached_horizon("Automotive", 300, 105.0, 0.0, 0.0, YEARS)
+    assert SCENARIO_CACHE.stats()["size"] == 0
+
+def test_strategy_is_part_of_the_key():
+    maintain = sim.scenario_key("Automotive", 300, 100.0, 0.0, 0.0, YEARS, 1.0)
+    increase = sim.scenario_key("Automotive", 300, 100.0, 0.0, 0.0, YEARS, 1.0, "Increase")
+    assert maintain != increase
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+import v7_5_sim_core as sim
+
+YEARS = np.arange(2025, 2076)
+
+def _loop_horizon(intention, size_mm, rec, mon, zld):
+    # The per-year loop the dashboard ran before the batched engine
+    revenue_model = sim.load_model()
+    rows = []
+    for year in YEARS:
+        multiplier = revenue_model.predict(sim.build_features(intention, year, rec, mon, zld, size_mm / 300))[0]
+        rows.append(sim.calculate_roi_v4(intention, size_mm, year, rec, mon, zld, multiplier))
+    return np.array(rows).T
+
+@pytest.mark.parametrize("intention", list(sim.ROI_WEIGHTS))
+@pytest.mark.parametrize("size_mm", list(sim.WAFER_DATA))
+def test_horizon_matches_per_year_loop(intention, size_mm):
+    for rec, mon, zld in ((100.0, 50.0, 100.0), (0.0, 0.0, 0.0), (500.0, 10.0, 0.0)):
+        horizon = sim.simulate_horizon(intention, size_mm, rec, mon, zld, YEARS)
+        expected = _loop_horizon(intention, size_mm, rec, mon, zld)
+        for i, metric in enumerate(("revenue", "profit", "roi", "efficiency", "gal_saved", "dollar_saved")):
+            np.testing.assert_allclose(horizon[metric], expected[i], rtol=1e-12, atol=1e-9, err_msg=metric)
+
+def test_horizon_broadcasts_investment_grid():
+    rec = np.array([0.0, 100.0, 250.0])
+    grid = sim.simulate_horizon("Automotive", 300, rec, 50.0, 100.0, 2040)
+    for i, r in enumerate(rec):
+        single = sim.simulate_horizon("Automotive", 300, r, 50.0, 100.0, [2040])
+        np.testing.assert_allclose(grid["roi"][i], single["roi"][0], rtol=1e-12)
+
+@pytest.mark.parametrize("resolution", ["annual", "quarterly", "monthly"])
+def test_instant_timeline_reproduces_horizon(resolution):
+    args = ("Consumer Electronics", 300, 120.0, 40.0, 80.0)
+    timeline = sim.simulate_timeline(*args, resolution=resolution, curves=sim.INSTANT_CURVES)
+    horizon = sim.simulate_horizon(*args, YEARS)
+    idx = timeline["years"] - YEARS[0]
+    for metric in ("revenue", "profit", "roi", "efficiency", "gal_saved", "dollar_saved"):
+        np.testing.assert_allclose(timeline[metric], horizon[metric][idx], rtol=1e-12, atol=1e-9, err_msg=metric)
+    np.testing.assert_array_equal(timeline["depreciation_step"], 0.0)
+
+@pytest.mark.parametrize("strategy", sim.STRATEGIES)
+def test_instant_timeline_follows_strategy(strategy):
+    args = ("Automotive", 200, 200.0, 30.0, 60.0)
+    timeline = sim.simulate_timeline(*args, resolution="annual", curves=sim.INSTANT_CURVES, strategy=strategy)
+    horizon = sim.simulate_horizon(*args, YEARS, strategy=strategy)
+    for metric in ("roi", "efficiency", "gal_saved"):
+        np.testing.assert_allclose(timeline[metric], horizon[metric], rtol=1e-12, atol=1e-9, err_msg=metric)
+
+def test_timeline_charges_only_installed_capital_and_depreciation():
+    t = sim.simulate_timeline("Automotive", 300, 100.0, 50.0, 100.0, resolution="monthly", install_year=2030)
+    before = t["time"] < 2030
+    assert np.all(t["capital"][before] == 0) and np.all(t["roi"][before] == 0)
+    np.testing.assert_allclose(t["profit"][before], t["revenue"][before])
+    # ZLD ramps over 24 months, so a year after installation not all capital is in place
+    one_year_in = int(np.flatnonzero(t["time"] >= 2031)[0])
+    assert 0 < t["capital"][one_year_in] < 250.0 * 10000
+    after = ~before
+    annual_depreciation = t["depreciation_step"] * 12
+    assert np.all(annual_depreciation[after][:12] > 0)
+    np.testing.assert_allclose(t["profit"], t["revenue"] - t["capital"] - annual_depreciation)
+    charged = t["capital"] > 0  # nothing is in place yet in the installation month itself
+    np.testing.assert_allclose(t["roi"][charged],
+                               (t["dollar_saved"] - annual_depreciation)[charged] / t["capital"][charged] * 100)
+    # Every technology reaches salvage before 2075: rec keeps 20%, mon 0%, zld 30%
+    np.testing.assert_allclose(t["depreciation_step"].sum(), (100 * 0.8 + 50 + 100 * 0.7) * 10000)
+
+@pytest.mark.parametrize("strategy", sim.STRATEGIES)
+def test_investment_grid_matches_horizon_for_strategy(strategy, monkeypatch):
+    class _MaintainOnlyStore:
+        def lookup_grid(self, *args):
+            assert strategy == "Maintain", "the surface store only holds Maintain"
+            return None
+
+    monkeypatch.setattr(sim, "load_surface_store", lambda: _MaintainOnlyStore())
+    levels = np.array([0.0, 100.0, 300.0])
+    grid = sim.investment_grid("Industrial Controls", 450, 50.0, 2040, levels, strategy)
+    for r, rec in enumerate(levels):
+        for z, zld in enumerate(levels):
+            point = sim.simulate_horizon("Industrial Controls", 450, rec, 50.0, zld, [2040], strategy=strategy)
+            for metric in ("roi", "gal_saved", "profit"):
+                np.testing.assert_allclose(grid[metric][r, z], point[metric][0], rtol=1e-12, err_msg=metric)
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+import v7_5_sim_core as sim
+from v7_5_surface_store import build_surface_store, open_surface_store
+
+YEARS = list(range(2025, 2031))
+
+@pytest.fixture(scope="module")
+def store(tmp_path_factory):
+    out = str(tmp_path_factory.mktemp("store") / "surface_store")
+    build_surface_store(out, intentions=["Automotive", "Medical Devices"], sizes=[200, 300], step=100.0,
+                        max_investment=200.0, years=YEARS)
+    return open_surface_store(out)
+
+def test_lookup_matches_live_horizon(store):
+    stored = store.lookup("Medical Devices", 300, 100.0, 200.0, 0.0, YEARS[1:4])
+    live = sim.simulate_horizon("Medical Devices", 300, 100.0, 200.0, 0.0, YEARS[1:4])
+    np.testing.assert_array_equal(stored["years"], YEARS[1:4])
+    for metric in ("revenue", "profit", "roi", "efficiency", "gal_saved", "dollar_saved"):
+        np.testing.assert_allclose(stored[metric], live[metric], rtol=1e-6, err_msg=metric)
+
+@pytest.mark.parametrize("args", [
+    ("Automotive", 300, 50.0, 0.0, 0.0, YEARS),        # off the level grid
+    ("Automotive", 450, 100.0, 0.0, 0.0, YEARS),       # size not built
+    ("Consumer Electronics", 300, 0.0, 0.0, 0.0, YEARS),  # intention not built
+    ("Automotive", 300, 0.0, 0.0, 0.0, [2025, 2027]),  # years not contiguous
+    ("Automotive", 300, 0.0, 0.0, 0.0, [2030, 2031]),  # years outside the store
+])
+def test_lookup_misses_return_none(store, args):
+    assert store.lookup(*args) is None
+
+def test_lookup_rejects_non_default_wafer_size(store):
+    assert store.lookup("Automotive", 300, 0.0, 0.0, 0.0, YEARS, wafer_size=1.5) is None
+    assert store.lookup("Automotive", 300, 0.0, 0.0, 0.0, YEARS, wafer_size=1.0) is not None
+
+def test_missing_store_opens_as_none(tmp_path):
+    assert open_surface_store(str(tmp_path / "nowhere")) is None
+
+def test_lookup_grid_matches_point_lookups(store):
+    levels = [0.0, 100.0, 200.0]
+    grid = store.lookup_grid("Automotive", 200, levels, 100.0, levels[1:], 2027)
+    assert grid["roi"].shape == (3, 2)
+    for r, rec in enumerate(levels):
+        for z, zld in enumerate(levels[1:]):
+            point = store.lookup("Automotive", 200, rec, 100.0, zld, [2027])
+            for metric in ("roi", "gal_saved", "profit"):
+                assert grid[metric][r, z] == point[metric][0]
+
+def test_lookup_grid_misses_return_none(store):
+    assert store.lookup_grid("Automotive", 200, [0.0, 50.0], 100.0, [0.0], 2027) is None
+    assert store.lookup_grid("Automotive", 200, [0.0], 100.0, [0.0], 2040) is None
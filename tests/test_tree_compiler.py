@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+
+import v7_5_sim_core as sim
+from v7_5_tree_compiler import compile_model
+
+def _random_inputs(n, seed):
+    rng = np.random.default_rng(seed)
+    args = (rng.choice(list(sim.ROI_WEIGHTS), n), rng.integers(2025, 2076, n),
+            rng.integers(0, 51, n) * 10.0, rng.integers(0, 51, n) * 10.0, rng.integers(0, 51, n) * 10.0)
+    return args, rng.choice(list(sim.WAFER_DATA), n)
+
+@pytest.fixture(scope="module", params=["water", "revenue"])
+def models(request):
+    args, sizes = _random_inputs(300, 1)
+    if request.param == "water":
+        model = sim.load_water_model(compiled=False)
+        strategy = np.random.default_rng(2).choice(sim.STRATEGIES, len(sizes)).astype(object)
+        frame = sim.build_features_for_water_model_batch(*args, sizes, strategy)
+        return model, compile_model(model), frame, sim.build_water_model_columns(*args, sizes, strategy)
+    model = sim.load_model(compiled=False)
+    X = sim.build_features_batch(*args, sizes / 300)
+    return model, compile_model(model), X, X
+
+def test_random_rows_match_sklearn(models):
+    model, compiled, sk_input, fast_input = models
+    expected = model.predict(sk_input)
+    np.testing.assert_allclose(compiled.predict(fast_input), expected, rtol=1e-9, atol=1e-9)
+    np.testing.assert_allclose(compiled.predict(sk_input), expected, rtol=1e-9, atol=1e-9)
+    # The NumPy traversal itself, not the large-batch sklearn hand-off
+    Xt = compiled.transform(fast_input)
+    np.testing.assert_allclose(compiled.ensemble.predict(Xt), compiled.source_estimator.predict(Xt),
+                               rtol=1e-9, atol=1e-9)
+
+def test_rows_on_split_thresholds_match_sklearn(models):
+    # Encoded rows with one feature set exactly on a split threshold and one
+    # float32 step either side of it, where a wrong comparison flips the branch
+    _, compiled, _, fast_input = models
+    ensemble = compiled.ensemble
+    base = compiled.transform(fast_input)
+    rng = np.random.default_rng(3)
+    splits = np.flatnonzero(~ensemble.is_leaf)
+    splits = rng.choice(splits, min(len(splits), 400), replace=False)
+    rows = []
+    for node in splits:
+        t = np.float32(ensemble.threshold[node])
+        for value in (np.nextafter(t, np.float32(-np.inf)), t, np.nextafter(t, np.float32(np.inf))):
+            row = base[rng.integers(len(base))].copy()
+            row[ensemble.feature[node]] = value
+            rows.append(row)
+    X = np.array(rows)
+    np.testing.assert_allclose(ensemble.predict(X), compiled.source_estimator.predict(X), rtol=1e-9, atol=1e-9)
+
+def test_missing_values_go_to_sklearn():
+    # The random forest handles NaN natively; the compiled arrays do not, so the row goes to sklearn
+    model = sim.load_model(compiled=False)
+    X = sim.build_features_batch("Automotive", [2030, 2031, 2032], [np.nan, 10.0, 20.0], 0.0, 0.0)
+    np.testing.assert_allclose(compile_model(model).predict(X), model.predict(X), rtol=1e-12)
+
+def test_missing_values_in_column_dict_reach_the_pipeline():
+    # The dashboard passes the raw column dict; sklearn must see a DataFrame and
+    # report the NaN itself (GradientBoosting rejects it) rather than choke on a dict
+    model = sim.load_water_model(compiled=False)
+    cols = sim.build_water_model_columns("Automotive", [2030, 2031], np.array([np.nan, 10.0]), 0.0, 0.0, 300)
+    with pytest.raises(ValueError, match="NaN"):
+        compile_model(model).predict(cols)
+
+def test_artifact_keeps_large_batches_on_the_mapped_arrays(tmp_path):
+    # The dashboard's heatmap / step batches exceed LARGE_BATCH_ROWS; without
+    # with_source they must not unpickle the .pkl, and NaN rows still reach it
+    from v7_5_model_artifact import export_artifact, load_current_artifact
+    from v7_5_tree_compiler import LARGE_BATCH_ROWS
+
+    path = str(tmp_path / "revenue.fabm")
+    export_artifact("revenue", path)
+    model = sim.load_model(compiled=False)
+    args, sizes = _random_inputs(2 * LARGE_BATCH_ROWS, 4)
+    X = sim.build_features_batch(*args, sizes / 300)
+
+    mapped = load_current_artifact("revenue", path=path)
+    np.testing.assert_allclose(mapped.predict(X), model.predict(X), rtol=1e-9, atol=1e-9)
+    assert mapped.source_estimator is None and mapped.load_source_estimator is None
+    assert mapped.source is None
+
+    X_nan = sim.build_features_batch("Automotive", [2030, 2031], [np.nan, 10.0], 0.0, 0.0)
+    np.testing.assert_allclose(mapped.predict(X_nan), model.predict(X_nan), rtol=1e-12)
+
+    offline = load_current_artifact("revenue", path=path, with_source=True)
+    np.testing.assert_allclose(offline.predict(X), model.predict(X), rtol=1e-9, atol=1e-9)
+    assert offline.source_estimator is not None
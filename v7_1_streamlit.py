@@ -4,13 +4,27 @@ import streamlit as st
 from v7_3_cas_st import draw_cas_flow
 from v7_4_roi_streamlit import (
     display_roi_module,
-    build_features,
-    load_model,
-    calculate_roi_v4
+    app_graph_state,
+    live_fidelity
+)
+from v7_5_scenario_cache import SCENARIO_CACHE
+from v7_5_prefetch import PREFETCHER, PrefetchSession
+from v7_5_profiler import PROFILER
+from v7_5_analysis_st import (
+    display_comparison_panel,
+    display_fleet_panel,
+    display_heatmap_panel,
+    display_monte_carlo_panel,
+    display_optimizer_panel,
+    display_profiler_panel,
+    display_sensitivity_panel,
+    display_step_breakdown_panel,
+    display_timeline_panel
 )
 
 # === PAGE CONFIG ===
 st.set_page_config(page_title="Semiconductor Fab Investment Simulator", layout="wide")
+PROFILER.begin_run()
 
 # === PAGE TITLE ===
 st.title("Semiconductor Fab Investment Simulator")
@@ -43,6 +57,10 @@ snapshot_year = st.sidebar.slider(
     "Snapshot Year", 2025, 2075, 2035,
     key="snapshot_year_main"
 )
+animate_years = st.sidebar.toggle(
+    "Animate years in the browser", key="animate_years",
+    help="Sends every year 2025-2075 with the CAS diagram once; its own slider then scrubs years without a rerun."
+)
 
 # === SLIDER: Water Reclamation ===
 reclaim = st.sidebar.slider("Water Reclamation (500.0 = $5,000,000)", 0.0, 500.0, 100.0, step=10.0)
@@ -58,30 +76,23 @@ st.sidebar.caption(f"Selected ZLD: {zld:.1f} units → ${int(zld * 10000):,}")
 
 # === ROI MODULE ===
 st.markdown("## Return on Investment Analysis")
+fidelity = live_fidelity(wafer_intention, wafer_size_mm, reclaim, monitor, zld, strategy)
 roi_value, composite_score, eff_level = display_roi_module(
     wafer_intention, snapshot_year, reclaim, monitor, zld,
     eff_level=None, wafer_size=wafer_size, strategy=strategy,
-    wafer_size_mm=wafer_size_mm, base_cost=5000
+    wafer_size_mm=wafer_size_mm, base_cost=5000, fidelity=fidelity
 )
 
 # === CAS MODULE ===
 
-# 1. Recompute the ML multiplier
-model = load_model()
-multiplier = model.predict(
-    build_features(wafer_intention, snapshot_year, reclaim, monitor, zld, wafer_size)
-)[0]
+# 1. Reuse the snapshot node the ROI module already evaluated this run,
+#    plus the per-step split of its gallons saved
+snapshot = app_graph_state().get("snapshot")
+step_split = app_graph_state().get("step_split")
+year_frames = app_graph_state().get("cas_frames") if animate_years else None
 
 # 2. Get revenue, profit and gallons saved
-rev, prof, _, _, gal_saved_y, _ = calculate_roi_v4(
-    wafer_intention,
-    wafer_size_mm,
-    snapshot_year,
-    reclaim,
-    monitor,
-    zld,
-    multiplier
-)
+rev, prof, gal_saved_y = snapshot["revenue"], snapshot["profit"], snapshot["gal_saved"]
 
 # 3. Call the CAS diagram with all required args
 with st.expander("", expanded=True):
@@ -98,6 +109,68 @@ with st.expander("", expanded=True):
         composite_score=composite_score,
         total_gal_saved=gal_saved_y,
         year=snapshot_year,
-        eff_level=eff_level
+        eff_level=eff_level,
+        step_split=step_split,
+        year_frames=year_frames
     )
 
+# === PROCESS-STEP BREAKDOWN ===
+with st.expander("Process-Step Breakdown", expanded=False):
+    display_step_breakdown_panel(app_graph_state(), strategy, snapshot_year)
+
+
+# === TRADE-OFF HEATMAP ===
+with st.expander("ROI Trade-off Surface", expanded=False):
+    display_heatmap_panel(wafer_intention, wafer_size_mm, reclaim, monitor, zld, snapshot_year, strategy)
+
+# === CAPEX TIMELINE MODULE ===
+with st.expander("Capex Timeline", expanded=False):
+    display_timeline_panel(wafer_intention, wafer_size_mm, reclaim, monitor, zld, strategy)
+
+# === COMPARISON MODULE ===
+with st.expander("Scenario Comparison", expanded=False):
+    display_comparison_panel(wafer_intention, wafer_size_mm, reclaim, monitor, zld, strategy, snapshot_year)
+
+# === OPTIMIZER MODULE ===
+with st.expander("Investment Optimizer", expanded=False):
+    display_optimizer_panel(wafer_intention, wafer_size_mm, snapshot_year, reclaim + monitor + zld, strategy)
+
+# === UNCERTAINTY MODULE ===
+with st.expander("Forecast Uncertainty", expanded=False):
+    display_monte_carlo_panel(wafer_intention, wafer_size_mm, reclaim, monitor, zld, strategy)
+
+# === SENSITIVITY MODULE ===
+with st.expander("Sensitivity Analysis", expanded=False):
+    display_sensitivity_panel(wafer_intention, wafer_size_mm, reclaim, monitor, zld, snapshot_year, strategy)
+
+# === FLEET MODULE ===
+with st.expander("Fleet Mode", expanded=False):
+    display_fleet_panel()
+
+# === SCENARIO CACHE STATS ===
+with st.sidebar.expander("Scenario Cache"):
+    st.json(SCENARIO_CACHE.stats())
+    st.caption("Computation graph (this run)")
+    st.json(app_graph_state().stats())
+    if PREFETCHER.enabled:
+        st.caption("Prefetch")
+        st.json(PREFETCHER.stats())
+
+# === SPECULATIVE PREFETCH (FAB_PREFETCH=1) ===
+# Queues the neighbours of the slider just moved; a later rerun cancels them
+if PREFETCHER.enabled:
+    PREFETCHER.after_render(
+        st.session_state.setdefault("prefetch_session", PrefetchSession()),
+        {"wafer_intention": wafer_intention, "wafer_size_mm": wafer_size_mm,
+         "rec": reclaim, "mon": monitor, "zld": zld, "strategy": strategy},
+    )
+
+# === SURROGATE REFINE (FAB_SURROGATE=1) ===
+# The preview above is already on screen; rerun once with the full model.
+# Moving another widget meanwhile interrupts this run and previews again.
+if st.session_state.pop("refine_pending", False):
+    st.rerun()
+
+# === PROFILER (FAB_PROFILE=1) ===
+if PROFILER.enabled:
+    display_profiler_panel(PROFILER.end_run())
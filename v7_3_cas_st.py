@@ -1,7 +1,10 @@
 # === v7_3_cas_st.py ===
 
+from functools import lru_cache
+
 import streamlit as st
-import plotly.graph_objects as go
+
+from v7_5_profiler import span
 
 # === COLOR PALETTE ===
 NODE_COLORS = {
@@ -65,6 +68,29 @@ FORWARD_LINKS = [
     ('ROI %', 'Composite Score')
 ]
 
+# === FEEDBACK LINKS ===
+NEGATIVE_FEEDBACK = [
+    ('Revenue', 'Wafer Size'),
+    ('Profit', 'Investment Strategy'),
+    ('Investment Efficiency', 'Investment Strategy'),
+    ('ROI %', 'Reclamation'),
+    ('ROI %', 'Monitoring'),
+    ('ROI %', 'ZLD')
+]
+
+POSITIVE_FEEDBACK = [
+    ('Gallons Saved', 'Investment Strategy'),
+    ('Gallons Saved', 'Cleaning'),
+    ('Gallons Saved', 'Etching'),
+    ('Gallons Saved', 'Diffusion'),
+    ('Gallons Saved', 'Lithography'),
+    ('Gallons Saved', 'Metrology')
+]
+
+# === PROCESS STEP SHARES ===
+# Only used when draw_cas_flow gets no model-based split
+FALLBACK_STEP_SHARES = {'Cleaning': 0.30, 'Etching': 0.20, 'Diffusion': 0.20, 'Lithography': 0.20, 'Metrology': 0.10}
+
 # === DYNAMIC FEEDBACK MESSAGES ===
 def dynamic_feedback_message(source, target, revenue, profit, roi_value, total_gal_saved, year, wafer_size_mm, wafer_intention):
     if source == 'Revenue' and target == 'Wafer Size':
@@ -80,16 +106,212 @@ def dynamic_feedback_message(source, target, revenue, profit, roi_value, total_g
         return f"ROI at {roi_value:.2f}%. Consider investment adjustment."
     return ""
 
+# === STATIC FIGURE SKELETON ===
+# Layout, colors and links never change, so the figure is built once with
+# nodes and edges merged into four multi-segment traces (segments separated
+# by None). Each rerun only patches hovertexts and visibility.
+NODE_LABELS = list(POSITIONS)
+TRACE_NODES, TRACE_FORWARD, TRACE_NEGATIVE, TRACE_POSITIVE = range(4)
+SUSTAINABILITY_BOX, ECONOMIC_BOX = range(2)  # index into layout.shapes and layout.annotations
+
+def _segments(links, curved):
+    # x/y for all links in one trace; curved links bow upward through the midpoint
+    xs, ys = [], []
+    for src, tgt in links:
+        x0, y0 = POSITIONS[src]
+        x1, y1 = POSITIONS[tgt]
+        if curved:
+            xs += [x0, (x0+x1)/2, x1, None]
+            ys += [y0, (y0+y1)/2 + 0.1, y1, None]
+        else:
+            xs += [x0, x1, None]
+            ys += [y0, y1, None]
+    return xs, ys
+
+def _per_point(messages, points_per_link=3):
+    # Repeat each link's hovertext over its points, blank on the None separator
+    return [text for message in messages for text in [message] * points_per_link + [""]]
+
+@lru_cache(maxsize=1)
+def _cas_skeleton():
+    import plotly.graph_objects as go
+    fig = go.Figure()
+
+    # --- Nodes ---
+    fig.add_trace(go.Scatter(
+        x=[POSITIONS[label][0] for label in NODE_LABELS],
+        y=[POSITIONS[label][1] for label in NODE_LABELS],
+        mode='markers+text',
+        marker=dict(size=40, color=[NODE_COLORS[label] for label in NODE_LABELS], line=dict(width=2, color='white')),
+        text=NODE_LABELS,
+        textposition="bottom center",
+        hovertext=NODE_LABELS,
+        hoverinfo="text",
+        showlegend=False
+    ))
+
+    # --- Forward Arrows (Hierarchy) ---
+    x, y = _segments(FORWARD_LINKS, curved=False)
+    fig.add_trace(go.Scatter(
+        x=x, y=y,
+        mode='lines',
+        line=dict(color='white', width=2),
+        hoverinfo='none',
+        showlegend=False
+    ))
+
+    # --- Feedback Arrows ---
+    x, y = _segments(NEGATIVE_FEEDBACK, curved=True)
+    fig.add_trace(go.Scatter(
+        x=x, y=y,
+        mode='lines+markers',
+        marker=dict(size=5, color='red', opacity=0),
+        line=dict(color='red', width=2, dash='dash'),
+        hovertext=_per_point([""] * len(NEGATIVE_FEEDBACK)),
+        hoverinfo='text',
+        showlegend=False
+    ))
+    x, y = _segments(POSITIVE_FEEDBACK, curved=True)
+    fig.add_trace(go.Scatter(
+        x=x, y=y,
+        mode='lines+markers',
+        marker=dict(size=5, color='green', opacity=0),
+        line=dict(color='green', width=2, dash='dash'),
+        hovertext=_per_point([f"Positive: {src} boosts {tgt}" for src, tgt in POSITIVE_FEEDBACK]),
+        hoverinfo='text',
+        showlegend=False
+    ))
+
+    # --- Group Shading ---
+    fig.add_shape(type='rect', x0=-1.2, y0=0.09, x1=1.2, y1=0.5,
+                  line=dict(color='white', width=2), fillcolor='rgba(88,214,141,0.1)', layer='below')
+    fig.add_shape(type='rect', x0=-1.2, y0=-0.25, x1=1.2, y1=0.05,
+                  line=dict(color='white', width=2), fillcolor='rgba(52,152,219,0.1)', layer='below')
+    fig.add_annotation(x=-1.0, y=0.4, text="Sustainability Flow", showarrow=False, font=dict(color="white", size=18))
+    fig.add_annotation(x=-1.0, y=0.02, text="Economic Flow", showarrow=False, font=dict(color="white", size=18))
+
+    # --- Main CAS CDL Diagram Title ---
+    fig.add_annotation(
+        text="CAS CDL Diagram",
+        xref="paper", yref="paper",
+        x=0, y=1.02,
+        showarrow=False,
+        font=dict(size=26, color="white"),
+        align="left"
+    )
+
+    # --- Layout Finalization ---
+    fig.update_layout(
+        height=750,
+        margin=dict(l=20, r=20, t=20, b=20),
+        paper_bgcolor='#404040',
+        plot_bgcolor='#404040',
+        xaxis=dict(visible=False),
+        yaxis=dict(visible=False)
+    )
+    return fig
+
+def _session_figure():
+    # Each session patches its own copy; the cached skeleton is never mutated
+    import plotly.graph_objects as go
+    skeleton = _cas_skeleton()
+    if st.session_state.get("cas_skeleton_id") != id(skeleton):
+        st.session_state.cas_figure = go.Figure(skeleton)
+        st.session_state.cas_skeleton_id = id(skeleton)
+    return st.session_state.cas_figure
+
+# === DYNAMIC HOVERTEXTS ===
+def node_hovertexts(reclaim, monitor, zld, strategy, revenue, profit, roi_value, composite_score,
+                    total_gal_saved, year, eff_level, step_split=None):
+    # One hovertext per NODE_LABELS entry
+    # step_split: per-step model predictions (v7_4 "step_split" node); the
+    # fixed shares only remain for callers that do not pass one
+    if step_split is None:
+        step_split = {step: {"gallons": total_gal_saved * share, "share": share, "efficiency": None}
+                      for step, share in FALLBACK_STEP_SHARES.items()}
+    step_hover = {
+        step: f"{step}:\n{v['gallons']:,.0f} gal ({v['share']:.0%})"
+              + (f"\n{v['efficiency']:,.0f} gal/wafer predicted ({strategy})" if v["efficiency"] is not None else "")
+        for step, v in step_split.items()
+    }
+    node_hover = {
+        'Wafer Size': "Market Trends:\n- 300mm decline ~2045\n- 450mm growth ~2030\n- 200mm slow decline",
+        'Wafer Intention': "ROI Weights:\nHPL 2.2x, Automotive 1.4x, Industrial 1.2x, Consumer 1.6x",
+        'Reclamation': f"Reclamation:\n${reclaim*10000:,.0f}",
+        'Monitoring': f"Monitoring:\n${monitor*10000:,.0f}",
+        'ZLD': f"ZLD:\n${zld*10000:,.0f}",
+        'Investment Strategy': f"Strategy: {strategy}",
+        'Gallons Saved': f"Formula:\n(Baseline - Efficiency) × Wafers\n{total_gal_saved:,.0f} gal ({year})",
+        **step_hover,
+        'Revenue': f"Revenue:\n${revenue:,.0f} ({year})",
+        'Profit': f"Profit:\n${profit:,.0f} ({year})",
+        'Investment Efficiency': f"Efficiency:\n{eff_level:.2f} mL/wafer",
+        'ROI %': f"ROI:\n{roi_value:.2f}% ({year})",
+        'Composite Score': f"Composite:\n{composite_score:.2f}"
+    }
+    return [node_hover.get(label, label) for label in NODE_LABELS]
+
+def negative_hovertexts(revenue, profit, roi_value, total_gal_saved, year, wafer_size_mm, wafer_intention):
+    return _per_point([
+        dynamic_feedback_message(src, tgt, revenue, profit, roi_value, total_gal_saved, year, wafer_size_mm, wafer_intention)
+        for src, tgt in NEGATIVE_FEEDBACK
+    ])
+
+# === YEAR ANIMATION FRAMES ===
+# Everything that depends on the year for every year of the horizon. A frame
+# carries only the two hovertext arrays and the metrics title, so the whole
+# 2025-2075 payload stays a few hundred KB.
+def metrics_title(year, gal_saved, roi_value, revenue, profit, composite_score):
+    return (f"{year} · Gallons Saved {gal_saved / 1e9:.3f}B · ROI {roi_value:.2f}% · "
+            f"Revenue ${revenue / 1e9:.3f}B · Profit ${profit / 1e9:.3f}B · Composite {composite_score:.2f}")
+
+def build_year_frames(horizon, steps, reclaim, monitor, zld, wafer_size_mm, wafer_intention, strategy):
+    import plotly.graph_objects as go
+    from v7_5_sim_core import STRATEGIES, WAFER_STEPS, step_shares
+
+    s = STRATEGIES.index(strategy)
+    frames, titles = [], []
+    for i, year in enumerate(int(y) for y in horizon["years"]):
+        revenue, profit, roi_value = horizon["revenue"][i], horizon["profit"][i], horizon["roi"][i]
+        eff_level, gal_saved = horizon["efficiency"][i], horizon["gal_saved"][i]
+        composite_score = (roi_value + eff_level) / 2
+        step_split = {step: {"gallons": gal_saved * share, "share": share, "efficiency": eff}
+                      for step, share, eff in zip(WAFER_STEPS, step_shares(steps, strategy, i),
+                                                  steps["efficiency"][s, :, i])}
+        titles.append(metrics_title(year, gal_saved, roi_value, revenue, profit, composite_score))
+        frames.append(go.Frame(
+            name=str(year),
+            traces=[TRACE_NODES, TRACE_NEGATIVE],
+            data=[go.Scatter(hovertext=node_hovertexts(reclaim, monitor, zld, strategy, revenue, profit, roi_value,
+                                                       composite_score, gal_saved, year, eff_level, step_split)),
+                  go.Scatter(hovertext=negative_hovertexts(revenue, profit, roi_value, gal_saved, year,
+                                                           wafer_size_mm, wafer_intention))],
+            layout=go.Layout(title_text=titles[-1]),
+        ))
+    return frames, titles
+
+_FRAME_ARGS = {"mode": "immediate", "frame": {"duration": 0, "redraw": True}, "transition": {"duration": 0}}
+
+def _year_slider(frames, active):
+    return dict(active=active, currentvalue=dict(prefix="Year: ", font=dict(color="white")), pad=dict(t=30),
+                font=dict(color="white"),
+                steps=[dict(label=f.name, method="animate", args=[[f.name], _FRAME_ARGS]) for f in frames])
+
+def _play_button():
+    return dict(type="buttons", showactive=False, x=0, y=0, xanchor="right", yanchor="top", pad=dict(t=30, r=10),
+                buttons=[dict(label="▶", method="animate",
+                              args=[None, {**_FRAME_ARGS, "frame": {"duration": 300, "redraw": True},
+                                           "fromcurrent": True}])])
+
 # === DRAWING FUNCTION ===
 def draw_cas_flow(
     reclaim, monitor, zld,
     wafer_size_mm, wafer_intention,
     strategy, revenue, profit,
     roi_value, composite_score,
-    total_gal_saved, year, eff_level
+    total_gal_saved, year, eff_level,
+    step_split=None, year_frames=None
 ):
-    fig = go.Figure()
-
     # === SIDEBAR LEGEND CONTROLS (Visual Samples) ===
     st.sidebar.title("CAS CDL Display Options")
     st.sidebar.markdown("---")  # Separator line
@@ -128,140 +350,35 @@ def draw_cas_flow(
 
     st.sidebar.markdown("---")  # Separator after legend
 
-    # --- (Your normal code continues below here: Gallons Saved, Node Hover, etc.) ---
-
-    # --- Calculate Process Gallons Saved ---
-    gallons_saved_split = {
-        'Cleaning': total_gal_saved * 0.30,
-        'Etching': total_gal_saved * 0.20, 
-        'Diffusion': total_gal_saved * 0.20,
-        'Lithography': total_gal_saved * 0.20,
-        'Metrology': total_gal_saved * 0.10   
-    }
-
-    # --- Node Hovertexts ---
-    node_hover = {
-        'Wafer Size': "Market Trends:\n- 300mm decline ~2045\n- 450mm growth ~2030\n- 200mm slow decline",
-        'Wafer Intention': "ROI Weights:\nHPL 2.2x, Automotive 1.4x, Industrial 1.2x, Consumer 1.6x",
-        'Reclamation': f"Reclamation:\n${reclaim*10000:,.0f}",
-        'Monitoring': f"Monitoring:\n${monitor*10000:,.0f}",
-        'ZLD': f"ZLD:\n${zld*10000:,.0f}",
-        'Investment Strategy': f"Strategy: {strategy}",
-        'Gallons Saved': f"Formula:\n(Baseline - Efficiency) × Wafers\n{total_gal_saved:,.0f} gal ({year})",
-        'Cleaning': f"Cleaning:\n{gallons_saved_split['Cleaning']:,.0f} gal",
-        'Etching': f"Etching:\n{gallons_saved_split['Etching']:,.0f} gal",
-        'Diffusion': f"Diffusion:\n{gallons_saved_split['Diffusion']:,.0f} gal",
-        'Lithography': f"Lithography:\n{gallons_saved_split['Lithography']:,.0f} gal",
-        'Metrology': f"Metrology:\n{gallons_saved_split['Metrology']:,.0f} gal",
-        'Revenue': f"Revenue:\n${revenue:,.0f} ({year})",
-        'Profit': f"Profit:\n${profit:,.0f} ({year})",
-        'Investment Efficiency': f"Efficiency:\n{eff_level:.2f} mL/wafer",
-        'ROI %': f"ROI:\n{roi_value:.2f}% ({year})",
-        'Composite Score': f"Composite:\n{composite_score:.2f}"
-    }
+    node_hover = node_hovertexts(reclaim, monitor, zld, strategy, revenue, profit, roi_value, composite_score,
+                                 total_gal_saved, year, eff_level, step_split)
 
-    # --- Draw Nodes ---
-    for label, (x, y) in POSITIONS.items():
-        fig.add_trace(go.Scatter(
-            x=[x], y=[y],
-            mode='markers+text',
-            marker=dict(size=40, color=NODE_COLORS[label], line=dict(width=2, color='white')),
-            text=[label],
-            textposition="bottom center",
-            hovertext=node_hover.get(label, label),
-            hoverinfo="text",
-            showlegend=False
-        ))
-
-    # --- Draw Forward Arrows (Hierarchy) ---
-    for src, tgt in FORWARD_LINKS:
-        x0, y0 = POSITIONS[src]
-        x1, y1 = POSITIONS[tgt]
-        fig.add_trace(go.Scatter(
-            x=[x0, x1], y=[y0, y1],
-            mode='lines',
-            line=dict(color='white', width=2),
-            hoverinfo='none',
-            showlegend=False
-        ))
-
-    # --- Draw Feedback Arrows Conditionally ---
-    if show_negative_feedback:
-        for src, tgt in [
-            ('Revenue', 'Wafer Size'),
-            ('Profit', 'Investment Strategy'),
-            ('Investment Efficiency', 'Investment Strategy'),
-            ('ROI %', 'Reclamation'),
-            ('ROI %', 'Monitoring'),
-            ('ROI %', 'ZLD')
-        ]:
-            x0, y0 = POSITIONS[src]
-            x1, y1 = POSITIONS[tgt]
-            fig.add_trace(go.Scatter(
-                x=[x0, (x0+x1)/2, x1],
-                y=[y0, (y0+y1)/2 + 0.1, y1],
-                mode='lines+markers',
-                marker=dict(size=5, color='red', opacity=0),
-                line=dict(color='red', width=2, dash='dash'),
-                hovertext=dynamic_feedback_message(src, tgt, revenue, profit, roi_value, total_gal_saved, year, wafer_size_mm, wafer_intention),
-                hoverinfo='text',
-                showlegend=False
-            ))
-
-    if show_positive_feedback:
-        for src, tgt in [
-            ('Gallons Saved', 'Investment Strategy'),
-            ('Gallons Saved', 'Cleaning'),
-            ('Gallons Saved', 'Etching'),
-            ('Gallons Saved', 'Diffusion'),
-            ('Gallons Saved', 'Lithography'),
-            ('Gallons Saved', 'Metrology')
-        ]:
-            x0, y0 = POSITIONS[src]
-            x1, y1 = POSITIONS[tgt]
-            fig.add_trace(go.Scatter(
-                x=[x0, (x0+x1)/2, x1],
-                y=[y0, (y0+y1)/2 + 0.1, y1],
-                mode='lines+markers',
-                marker=dict(size=5, color='green', opacity=0),
-                line=dict(color='green', width=2, dash='dash'),
-                hovertext=f"Positive: {src} boosts {tgt}",
-                hoverinfo='text',
-                showlegend=False
-            ))
-
-    # --- Draw Group Shading Conditionally ---
-    if show_sustainability_flow:
-        fig.add_shape(type='rect', x0=-1.2, y0=0.09, x1=1.2, y1=0.5,
-                      line=dict(color='white', width=2), fillcolor='rgba(88,214,141,0.1)', layer='below')
-        fig.add_annotation(x=-1.0, y=0.4, text="Sustainability Flow", showarrow=False, font=dict(color="white", size=18))
-
-    if show_economic_flow:
-        fig.add_shape(type='rect', x0=-1.2, y0=-0.25, x1=1.2, y1=0.05,
-                      line=dict(color='white', width=2), fillcolor='rgba(52,152,219,0.1)', layer='below')
-        fig.add_annotation(x=-1.0, y=0.02, text="Economic Flow", showarrow=False, font=dict(color="white", size=18))
-
-    # --- Main CAS CDL Diagram Title ---
-    fig.add_annotation(
-        text="CAS CDL Diagram",
-        xref="paper", yref="paper",
-        x=0, y=1.02,
-        showarrow=False,
-        font=dict(size=26, color="white"),
-        align="left"
-    )
-
-
-
-    # --- Layout Finalization ---
-    fig.update_layout(
-        height=750,
-        margin=dict(l=20, r=20, t=20, b=20),
-        paper_bgcolor='#404040',
-        plot_bgcolor='#404040',
-        xaxis=dict(visible=False),
-        yaxis=dict(visible=False)
-    )
+    # --- Patch Dynamic Parts Into the Cached Skeleton ---
+    with span("cas.patch"):
+        fig = _session_figure()
+        with fig.batch_update():
+            fig.data[TRACE_NODES].hovertext = node_hover
+            fig.data[TRACE_NEGATIVE].hovertext = negative_hovertexts(
+                revenue, profit, roi_value, total_gal_saved, year, wafer_size_mm, wafer_intention)
+            fig.data[TRACE_NEGATIVE].visible = show_negative_feedback
+            fig.data[TRACE_POSITIVE].visible = show_positive_feedback
+            fig.layout.shapes[SUSTAINABILITY_BOX].visible = show_sustainability_flow
+            fig.layout.annotations[SUSTAINABILITY_BOX].visible = show_sustainability_flow
+            fig.layout.shapes[ECONOMIC_BOX].visible = show_economic_flow
+            fig.layout.annotations[ECONOMIC_BOX].visible = show_economic_flow
 
-    st.plotly_chart(fig, use_container_width=True)
+    # --- Client-Side Year Scrubbing ---
+    # year_frames (v7_4 "cas_frames" node): a copy of the patched figure gets
+    # one frame per year and a Plotly slider, so scrubbing needs no rerun
+    if year_frames is not None:
+        import plotly.graph_objects as go
+        frames, titles = year_frames
+        idx = [f.name for f in frames].index(str(year))
+        fig = go.Figure(fig)
+        fig.frames = frames
+        fig.update_layout(title=dict(text=titles[idx], font=dict(size=18, color="white"), x=0.5),
+                          sliders=[_year_slider(frames, idx)], updatemenus=[_play_button()],
+                          margin=dict(l=20, r=20, t=90, b=20), height=850)
 
+    with span("cas.plotly_chart"):
+        st.plotly_chart(fig, use_container_width=True)
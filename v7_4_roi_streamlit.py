@@ -1,164 +1,63 @@
 # === V7_4_ROI_STREAMLIT.PY (FULLY CORRECTED VERSION) ===
 import streamlit as st
-import sklearn
-import joblib
 import numpy as np
-import pandas as pd
-import plotly.graph_objects as go
-import urllib.request
-import os
-import gdown   
-
-MODEL_URL = "https://drive.google.com/uc?export=download&id=1pZ_vFRfqx1mw1RpoMR_fanrrOvHHMDiN"
-MODEL_LOCAL_PATH = "v6_1_water_model_boosted.pkl"
-        
-# Download if missing or corrupted
-if not os.path.exists(MODEL_LOCAL_PATH) or os.path.getsize(MODEL_LOCAL_PATH) < 1_000_000:
-    gdown.download(MODEL_URL, MODEL_LOCAL_PATH, quiet=False)
+import v7_5_sim_core as sim_core
+from v7_5_compute_graph import ComputationGraph
+from v7_5_profiler import span
+# Simulation logic lives in the Streamlit-free core; re-exported here so
+# existing imports from this module keep working.
+from v7_5_sim_core import (
+    MODEL_LOCAL_PATH,
+    REVENUE_MODEL_PATH,
+    USE_COMPILED_MODELS,
+    WAFER_DATA,
+    ROI_WEIGHTS,
+    WATER_PER_WAFER_BY_SIZE,
+    WAFER_OUTPUT_BY_SIZE,
+    WATER_PRICE_PER_GAL,
+    build_features,
+    build_features_for_water_model,
+    build_features_batch,
+    build_water_model_columns,
+    build_features_for_water_model_batch,
+    get_market_share_split,
+    get_market_share,
+    get_market_share_split_batch,
+    get_market_share_batch,
+    calculate_roi_v4,
+    calculate_roi_batch,
+    simulate_horizon,
+    cached_horizon,
+    horizon_snapshot,
+)
 
 # === LOAD MODELS ===
+# st.cache_resource adds the "Running load_..." spinner and `streamlit cache
+# clear` support on top of the core's per-process cache.
 @st.cache_resource
-def load_water_model():
-    return joblib.load("v6_1_water_model_boosted.pkl")
+def load_water_model(compiled=USE_COMPILED_MODELS):
+    return sim_core.load_water_model(compiled)
 
 @st.cache_resource
-def load_model():
-    return joblib.load("revenue_multiplier_model.pkl")
-
-# === FEATURE ENGINEERING ===
-def build_features(wafer_intention, year, rec, mon, zld, wafer_size=1.0):
-    percent_reclaimed = min(rec * 10, 100)
-    intensity_score = 0.75
-    impact_score = rec * 1.0 + mon * 0.7 + zld * 0.7
-    one_hot = [
-        1 if wafer_intention == "Consumer Electronics" else 0,
-        1 if wafer_intention == "High-Performance Logic" else 0,
-        1 if wafer_intention == "Industrial Controls" else 0,
-        1 if wafer_intention == "Medical Devices" else 0,
-    ]
-    return np.array([[wafer_size, year, percent_reclaimed, intensity_score, impact_score] + one_hot])
-
-def build_features_for_water_model(wafer_intention, year, rec, mon, zld, wafer_size_mm):
-    total_investment = rec + mon + zld
-    investment_efficiency = total_investment / (wafer_size_mm / 100) if wafer_size_mm else 0
-    impact_score = rec * 1.0 + mon * .7 + zld * 0.7
-    reclaimed_pct = min(impact_score * 2.5, 100)
-
-    data = {
-        "Year": [year],
-        "Year Squared": [year ** 2],
-        "Wafer Size": [wafer_size_mm],
-        "Wafer Intention": [wafer_intention],
-        "Reclamation Investment": [rec],
-        "Monitoring Investment": [mon],
-        "ZLD Investment": [zld],
-        "Total Investment": [total_investment],
-        "Investment Efficiency ($10k)": [investment_efficiency],
-        "Investment Impact Score": [impact_score],
-        "Percent Water Reclaimed": [reclaimed_pct],
-        "Water Intensity Score": [0.75],  # Placeholder if not dynamic
-        "Investment Strategy": ["Maintain"],  # Default for now; can vary if UI updated
-        "Wafer Step": ["Cleaning"]  # Default for now; could randomize if needed
-    }
-
-    return pd.DataFrame(data)
-
-
-# === MARKET SHARE UTILITY ===
-def get_market_share_split(year):
-    share_200 = max(0.0, 1 - ((year - 2025) / 20)) if year <= 2045 else 0.0
-    share_450 = min(1.0, max(0.0, (year - 2035) / 20)) if year >= 2035 else 0.0
-    share_300 = 1.0 - share_200 - share_450
-    return share_200, share_300, share_450
-
-def get_market_share(wafer_size_mm, year):
-    s200, s300, s450 = get_market_share_split(year)
-    return {200: s200, 300: s300, 450: s450}.get(wafer_size_mm, 1.0)
-# === ROI CALCULATION ===
-def calculate_roi_v4(wafer_intention, wafer_size_mm, year, rec, mon, zld, multiplier):
-    wafer_data = {
-        200: {"price": 1500, "volume": 100_000},
-        300: {"price": 18000, "volume": 200_000},
-        450: {"price": 72000, "volume": 500_000}
-    }
-    roi_weights = {
-        "High-Performance Logic": 2.2,
-        "Consumer Electronics": 1.6,
-        "Automotive": 1.4,
-        "Medical Devices": 1.3,
-        "Industrial Controls": 1.2
-    }
-
-    base = wafer_data[wafer_size_mm]
-    volume = base["volume"]
-    price = base["price"]
-    roi_weight = roi_weights.get(wafer_intention, 1.0)
-    market_share = get_market_share(wafer_size_mm, year)
-
-    base_revenue = volume * price * roi_weight * market_share
-    if multiplier:
-        base_revenue *= multiplier
-
-    total_investment = rec + mon + zld
-    profit = base_revenue - (total_investment * 10000)
-
-    # Load water model and predict
-    water_model = load_water_model()
-    predicted_eff = water_model.predict(
-    build_features_for_water_model(wafer_intention, year, rec, mon, zld, wafer_size_mm)
-    )[0]
- 
-    # Define baseline and apply logic
-    water_per_wafer_by_size = {200: 1200, 300: 3600, 450: 7200}
-    baseline = water_per_wafer_by_size.get(wafer_size_mm, 3600)
-
-    actual_year = year
-    year_penalty = 1 + 0.001 * (actual_year - 2025)
-    predicted_eff *= year_penalty
-
-
-    # Apply safe clipping logic
-    predicted_eff = max(min(predicted_eff, baseline), baseline * 0.1)
-
-    
-    # Define wafer output volume
-    wafer_output_by_size = {200: 100_000, 300: 200_000, 450: 500_000}
-    annual_wafers = wafer_output_by_size.get(wafer_size_mm, 200_000)
-
-    # Calculate impact
-    gal_saved_y = (baseline - predicted_eff) * annual_wafers * market_share
-    dollar_saved_y = gal_saved_y * 0.004
-    roi = (dollar_saved_y / (total_investment * 10000)) * 100 if total_investment else 0
-
-    return base_revenue, profit, roi, predicted_eff, gal_saved_y, dollar_saved_y
-
+def load_model(compiled=USE_COMPILED_MODELS):
+    return sim_core.load_model(compiled)
 
 # === CHARTING FUNCTION ===
-def draw_charts(years, wafer_roi_list, rec, mon, zld, wafer_intention, wafer_size_mm):
-    print("=== Draw_Charts is Running ===")  # This goes inside the function
+def build_charts(years, horizon, rec, mon, zld, wafer_intention, wafer_size_mm):
+    import plotly.graph_objects as go
 
-    water_model = load_water_model()  # Load v5_water_model.pkl
     total_investment = rec + mon + zld
-    roi_percent_series = [
-        (roi_y / (total_investment * 10000)) * 100 if total_investment else 0
-        for roi_y in wafer_roi_list
-    ]
+    roi_percent_series = (
+        (horizon["roi"] / (total_investment * 10000)) * 100 if total_investment
+        else np.zeros_like(horizon["roi"])
+    )
 
     # === CHART 2: Gallons Saved Over Time (Model-Driven + Market-Aligned) ===
-    gallons_saved_series = []
-    for y in years:
-        predicted_eff = water_model.predict(
-            build_features_for_water_model(wafer_intention, y, rec, mon, zld, wafer_size_mm)
-        )[0]
-
-        # Dynamically adjust wafer output based on market share
-        base_output = {200: 900000, 300: 1080000, 450: 1500000}.get(wafer_size_mm, 1080000)
-        market_share = get_market_share(wafer_size_mm, y)
-        wafer_output = base_output * market_share
-
-        baseline = {200: 1200, 300: 3600, 450: 7200}.get(wafer_size_mm, 3600)
-        gallons_saved = (baseline - predicted_eff) * wafer_output
-        gallons_saved_series.append(gallons_saved)
+    # Dynamically adjust wafer output based on market share
+    base_output = {200: 900000, 300: 1080000, 450: 1500000}.get(wafer_size_mm, 1080000)
+    wafer_output = base_output * get_market_share_batch(wafer_size_mm, years)
+    baseline = WATER_PER_WAFER_BY_SIZE.get(wafer_size_mm, 3600)
+    gallons_saved_series = (baseline - horizon["raw_efficiency"]) * wafer_output
 
     fig2 = go.Figure()
     fig2.add_trace(go.Scatter(
@@ -176,20 +75,13 @@ def draw_charts(years, wafer_roi_list, rec, mon, zld, wafer_intention, wafer_siz
         xaxis=dict(tickmode='linear', dtick=5),
         height=450
     )
-    st.plotly_chart(fig2, use_container_width=True, key="chart_gallons_saved")
 
     # === CHART 3
-    model = load_model()
-    composite_series = []
-    for y in years:
-        mult_y = model.predict(build_features(wafer_intention, y, rec, mon, zld, wafer_size_mm / 300))[0]
-        _, _, roi_y, eff_y, _, _ = calculate_roi_v4(wafer_intention, wafer_size_mm, y, rec, mon, zld, mult_y)
-        composite_series.append((roi_y + eff_y) / 2)
+    composite_series = (horizon["roi"] + horizon["efficiency"]) / 2
     fig3 = go.Figure()
     fig3.add_trace(go.Scatter(x=years, y=composite_series, mode='lines+markers', name="Composite Score"))
     fig3.update_layout(title="Composite Score Over Time", xaxis_title="Year", yaxis_title="Composite Score", template="plotly_dark", 
 font=dict(size=20))
-    st.plotly_chart(fig3, use_container_width=True, key="wafer_size")
 
     # CHART 4
     fig4 = go.Figure()
@@ -197,24 +89,105 @@ font=dict(size=20))
     fig4.add_trace(go.Scatter(x=years, y=roi_percent_series, mode="lines+markers", name="ROI (%)", yaxis="y2"))
     fig4.update_layout(title="ROI vs. Gallons Saved", xaxis=dict(title="Year"), yaxis=dict(title="Gallons Saved"), yaxis2=dict(title="ROI (%)", 
 overlaying="y", side="right"), template="plotly_dark", font=dict(size=20))
-    st.plotly_chart(fig4, use_container_width=True, key="gallons_time")
+    return [(fig2, "chart_gallons_saved"), (fig3, "wafer_size"), (fig4, "gallons_time")]
+
+def draw_charts(charts):
+    for fig, key in charts:
+        with span("charts.plotly_chart"):  # Plotly JSON serialization happens here
+            st.plotly_chart(fig, use_container_width=True, key=key)
+
+# === COMPUTATION GRAPH ===
+# inputs -> horizon (features, predictions and ROI for every year, served by
+# the surface store / scenario cache) -> snapshot and chart figures.
+# Nodes only recompute when an input they declare changed, so moving the
+# snapshot year re-reads one row of the horizon and reuses the figures.
+HORIZON_YEARS = np.arange(2025, 2076)
+APP_GRAPH = ComputationGraph()
+
+@APP_GRAPH.node("horizon", deps=("wafer_intention", "wafer_size_mm", "wafer_size", "rec", "mon", "zld", "strategy",
+                                 "fidelity"))
+def _horizon_node(wafer_intention, wafer_size_mm, wafer_size, rec, mon, zld, strategy, fidelity):
+    return cached_horizon(wafer_intention, wafer_size_mm, rec, mon, zld, HORIZON_YEARS, wafer_size=wafer_size,
+                          fidelity=fidelity, strategy=strategy)
+
+@APP_GRAPH.node("snapshot", deps=("horizon", "snapshot_year", "wafer_intention", "wafer_size_mm", "wafer_size",
+                                  "rec", "mon", "zld", "strategy", "fidelity"))
+def _snapshot_node(horizon, snapshot_year, wafer_intention, wafer_size_mm, wafer_size, rec, mon, zld, strategy,
+                   fidelity):
+    snapshot = horizon_snapshot(horizon, snapshot_year)
+    if snapshot is None:
+        snapshot = horizon_snapshot(cached_horizon(
+            wafer_intention, wafer_size_mm, rec, mon, zld, [snapshot_year], wafer_size=wafer_size,
+            fidelity=fidelity, strategy=strategy), snapshot_year)
+    snapshot["composite"] = (snapshot["roi"] + snapshot["efficiency"]) / 2
+    return snapshot
+
+# Every strategy × process step × year in one predict; the strategy selection
+# and snapshot year only index into it
+@APP_GRAPH.node("steps", deps=("wafer_intention", "wafer_size_mm", "rec", "mon", "zld", "fidelity"))
+def _steps_node(wafer_intention, wafer_size_mm, rec, mon, zld, fidelity):
+    return sim_core.cached_step_breakdown(wafer_intention, wafer_size_mm, rec, mon, zld, HORIZON_YEARS, fidelity)
+
+@APP_GRAPH.node("step_split", deps=("steps", "snapshot", "strategy", "snapshot_year"))
+def _step_split_node(steps, snapshot, strategy, snapshot_year):
+    # Snapshot gallons saved split by each step's predicted saving
+    idx = int(np.searchsorted(steps["years"], snapshot_year))
+    shares = sim_core.step_shares(steps, strategy, idx)
+    eff = steps["efficiency"][sim_core.STRATEGIES.index(strategy), :, idx]
+    return {step: {"gallons": snapshot["gal_saved"] * share, "share": share, "efficiency": e}
+            for step, share, e in zip(sim_core.WAFER_STEPS, shares, eff)}
+
+# Every year's CAS hovertexts and metrics as Plotly frames; independent of the
+# snapshot year, so scrubbing on the server reuses it too
+@APP_GRAPH.node("cas_frames", deps=("horizon", "steps", "rec", "mon", "zld", "wafer_size_mm", "wafer_intention",
+                                    "strategy"))
+def _cas_frames_node(horizon, steps, rec, mon, zld, wafer_size_mm, wafer_intention, strategy):
+    from v7_3_cas_st import build_year_frames
+    return build_year_frames(horizon, steps, rec, mon, zld, wafer_size_mm, wafer_intention, strategy)
+
+@APP_GRAPH.node("charts", deps=("horizon", "rec", "mon", "zld", "wafer_intention", "wafer_size_mm"))
+def _charts_node(horizon, rec, mon, zld, wafer_intention, wafer_size_mm):
+    return build_charts(HORIZON_YEARS, horizon, rec, mon, zld, wafer_intention, wafer_size_mm)
+
+def app_graph_state(**inputs):
+    # One graph state per browser session; passing inputs refreshes the stale nodes
+    if "app_graph_state" not in st.session_state:
+        st.session_state.app_graph_state = APP_GRAPH.new_state()
+    state = st.session_state.app_graph_state
+    if inputs:
+        state.set_inputs(**inputs)
+    return state
+
+def live_fidelity(wafer_intention, wafer_size_mm, rec, mon, zld, strategy="Maintain"):
+    # FAB_SURROGATE=1: the run right after the inputs moved renders the
+    # surrogate's horizon and flags a refine; the follow-up run (or any rerun
+    # with unchanged inputs) uses the full model. Cached exact results skip the preview.
+    if not sim_core.USE_SURROGATE or sim_core.load_water_surrogate() is None:
+        return "full"
+    inputs = (wafer_intention, wafer_size_mm, rec, mon, zld, strategy)
+    previous, st.session_state.live_inputs = st.session_state.get("live_inputs"), inputs
+    if previous is None or previous == inputs or \
+            sim_core.has_full_horizon(wafer_intention, wafer_size_mm, rec, mon, zld, HORIZON_YEARS, strategy=strategy):
+        return "full"
+    st.session_state.refine_pending = True
+    return "surrogate"
 
 # === MAIN MODULE ===
-def display_roi_module(wafer_intention, year, rec, mon, zld, eff_level, wafer_size=1.0, strategy="Maintain", wafer_size_mm=300, base_cost=5000):
-    model = load_model()
-    multiplier = model.predict(build_features(wafer_intention, year, rec, mon, zld, wafer_size))[0]
+def display_roi_module(wafer_intention, year, rec, mon, zld, eff_level, wafer_size=1.0, strategy="Maintain", wafer_size_mm=300, base_cost=5000,
+                       fidelity="full"):
+    import pandas as pd
+    graph = app_graph_state(wafer_intention=wafer_intention, wafer_size_mm=wafer_size_mm,
+                            wafer_size=wafer_size, rec=rec, mon=mon, zld=zld, snapshot_year=year, strategy=strategy,
+                            fidelity=fidelity)
     total_investment = rec + mon + zld
-    revenue, profit, roi, eff_level, gal_saved_y, dollar_saved_y = calculate_roi_v4(
-        wafer_intention, wafer_size_mm, year, rec, mon, zld, multiplier)
 
-    years = list(range(2025, 2076))
-    wafer_roi_list = [
-        calculate_roi_v4(wafer_intention, wafer_size_mm, y, rec, mon, zld,
-                         model.predict(build_features(wafer_intention, y, rec, mon, zld, wafer_size))[0])[2]
-        for y in years
-    ]
+    # Snapshot year is read straight out of the horizon arrays
+    snapshot = graph.get("snapshot")
+    revenue, profit, roi, eff_level, gal_saved_y, dollar_saved_y = (
+        snapshot["revenue"], snapshot["profit"], snapshot["roi"],
+        snapshot["efficiency"], snapshot["gal_saved"], snapshot["dollar_saved"])
 
-    composite_score = (roi + eff_level) / 2
+    composite_score = snapshot["composite"]
 
     # === Normalize Gallons Saved to Billions ===
     gallons_bil = gal_saved_y / 1_000_000_000
@@ -242,6 +215,13 @@ def display_roi_module(wafer_intention, year, rec, mon, zld, eff_level, wafer_si
     col4.metric(f"Total Profit {year}",       f"${profit_bil:.3f}B")
     col5.metric(f"Total Investment {year}",   f"${investment_mil:.3f}M")
     col6.metric("Composite Score",            f"{composite_score:.2f}")
+    if fidelity == "surrogate":
+        from v7_5_surrogate import error_bounds
+        bound = error_bounds().get((wafer_size_mm, wafer_intention))
+        st.caption("Preview from the surrogate water model, refining with the full model…" + (
+            f" Held-out error for {wafer_size_mm}mm {wafer_intention}: mean {bound['mean_abs']:.1f} / "
+            f"max {bound['max_abs']:.1f} gal per wafer, mean {bound['roi_mean_abs_pp']:.2f} / "
+            f"max {bound['roi_max_abs_pp']:.2f} ROI points." if bound else ""))
 
     st.markdown("""<h2 style='font-size:26px;'>Scenario Summary</h2>""", unsafe_allow_html=True)
 
@@ -278,6 +258,6 @@ def display_roi_module(wafer_intention, year, rec, mon, zld, eff_level, wafer_si
 
 
 
-    draw_charts(years, wafer_roi_list, rec, mon, zld, wafer_intention, wafer_size_mm)
+    draw_charts(graph.get("charts"))
     return roi, composite_score, eff_level
 
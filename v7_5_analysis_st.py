@@ -0,0 +1,437 @@
+# === v7_5_analysis_st.py ===
+# Streamlit panels for the batch analyses built on v7_5_sim_core.
+
+import numpy as np
+import streamlit as st
+
+from v7_5_sim_core import MODEL_LOCAL_PATH, REVENUE_MODEL_PATH
+from v7_5_scenario_cache import file_fingerprint
+
+
+def _model_version():
+    # Part of every cached analysis key so results refresh when a model file changes
+    return file_fingerprint(MODEL_LOCAL_PATH), file_fingerprint(REVENUE_MODEL_PATH)
+
+# === BUDGET OPTIMIZER ===
+@st.cache_data(show_spinner="Evaluating every allocation of the budget...")
+def _optimize(wafer_intention, wafer_size_mm, target_year, budget, spend_all, strategy, model_version):
+    from v7_5_optimizer import optimize_budget
+    return optimize_budget(wafer_intention, wafer_size_mm, target_year, budget, spend_all=spend_all,
+                           strategy=strategy)
+
+def display_optimizer_panel(wafer_intention, wafer_size_mm, snapshot_year, current_budget, strategy="Maintain"):
+    import plotly.graph_objects as go
+
+    st.markdown("""<h2 style='font-size:26px;'>Budget Optimizer</h2>""", unsafe_allow_html=True)
+    with st.form("optimizer_form"):
+        col1, col2, col3 = st.columns(3)
+        budget = col1.number_input("Total Budget (units of $10,000)", 0.0, 1500.0,
+                                   float(current_budget), step=10.0)
+        target_year = col2.slider("Target Year", 2025, 2075, int(snapshot_year))
+        spend_all = col3.checkbox("Spend the whole budget", value=True)
+        submitted = st.form_submit_button("Find Pareto-optimal allocations")
+    if submitted:
+        st.session_state.optimizer_params = (wafer_intention, wafer_size_mm, target_year, budget, spend_all, strategy)
+    params = st.session_state.get("optimizer_params")
+    if params is None:
+        return
+
+    frontier, stats = _optimize(*params, _model_version())
+    st.caption(f"{stats['evaluated']:,} allocations evaluated, {stats['pareto']} Pareto-optimal "
+               f"({stats['seconds']:.2f}s)")
+    if frontier.empty:
+        st.info("No allocation on the slider grid matches this budget.")
+        return
+
+    hover = [
+        f"Reclamation ${r * 10000:,.0f}<br>Monitoring ${m * 10000:,.0f}<br>ZLD ${z * 10000:,.0f}"
+        f"<br>ROI {roi:.2f}%<br>Gallons {gal:,.0f}<br>Profit ${p:,.0f}"
+        for r, m, z, roi, gal, p in frontier[["rec", "mon", "zld", "roi", "gal_saved", "profit"]].itertuples(index=False)
+    ]
+    fig = go.Figure(go.Scatter(
+        x=frontier["gal_saved"], y=frontier["roi"], mode="markers",
+        marker=dict(size=14, color=frontier["profit"], colorscale="Viridis",
+                    colorbar=dict(title="Profit ($)"), line=dict(width=1, color="white")),
+        hovertext=hover, hoverinfo="text",
+    ))
+    fig.update_layout(title=f"Pareto Frontier ({params[5]}, {params[2]})", xaxis_title="Gallons Saved",
+                      yaxis_title="ROI (%)", template="plotly_dark", font=dict(size=20))
+    st.plotly_chart(fig, use_container_width=True, key="optimizer_frontier")
+    st.dataframe(frontier, use_container_width=True)
+
+# === MONTE CARLO UNCERTAINTY ===
+@st.cache_data(show_spinner="Sampling economic parameters...")
+def _monte_carlo(wafer_intention, wafer_size_mm, rec, mon, zld, n_draws, seed, strategy, model_version):
+    from v7_5_monte_carlo import run_monte_carlo
+    return run_monte_carlo(wafer_intention, wafer_size_mm, rec, mon, zld, n_draws=n_draws, seed=seed,
+                           strategy=strategy)
+
+def _fan_chart(go, years, bands, title, yaxis_title, color):
+    p5, p50, p95 = bands
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=years, y=p95, mode="lines", line=dict(width=0), name="P95", showlegend=False))
+    fig.add_trace(go.Scatter(x=years, y=p5, mode="lines", line=dict(width=0), fill="tonexty",
+                             fillcolor=f"rgba({color},0.3)", name="P5–P95"))
+    fig.add_trace(go.Scatter(x=years, y=p50, mode="lines+markers", line=dict(color=f"rgb({color})"), name="P50"))
+    fig.update_layout(title=title, xaxis_title="Year", yaxis_title=yaxis_title,
+                      template="plotly_dark", font=dict(size=20))
+    return fig
+
+def display_monte_carlo_panel(wafer_intention, wafer_size_mm, rec, mon, zld, strategy="Maintain"):
+    import plotly.graph_objects as go
+
+    st.markdown("""<h2 style='font-size:26px;'>Forecast Uncertainty (Monte Carlo)</h2>""", unsafe_allow_html=True)
+    with st.form("monte_carlo_form"):
+        col1, col2 = st.columns(2)
+        n_draws = col1.number_input("Draws", 1_000, 100_000, 10_000, step=1_000)
+        seed = col2.number_input("Random Seed", 0, 2**31 - 1, 0, step=1)
+        submitted = st.form_submit_button("Run Monte Carlo")
+    if submitted:
+        st.session_state.monte_carlo_params = (int(n_draws), int(seed))
+    params = st.session_state.get("monte_carlo_params")
+    if params is None:
+        return
+
+    result = _monte_carlo(wafer_intention, wafer_size_mm, rec, mon, zld, *params, strategy, _model_version())
+    st.caption(f"{result['n_draws']:,} draws × {len(result['years'])} years, seed {result['seed']} "
+               f"({result['seconds']:.2f}s). Bands show P5 / P50 / P95.")
+    st.plotly_chart(_fan_chart(go, result["years"], result["roi"], f"ROI Forecast Range ({strategy})", "ROI (%)",
+                               "155,89,182"),
+                    use_container_width=True, key="mc_roi")
+    st.plotly_chart(_fan_chart(go, result["years"], result["gal_saved"], f"Gallons Saved Forecast Range ({strategy})",
+                               "Gallons Saved", "88,214,141"),
+                    use_container_width=True, key="mc_gallons")
+
+# === SENSITIVITY ANALYSIS ===
+SENSITIVITY_METRICS = {"ROI (%)": "roi", "Composite Score": "composite", "Gallons Saved": "gal_saved", "Profit ($)": "profit"}
+
+@st.cache_data(show_spinner="Evaluating one-at-a-time design...")
+def _tornado(baseline, strategy, model_version):
+    from v7_5_sensitivity import tornado_analysis
+    return tornado_analysis(dict(baseline), strategy)
+
+@st.cache_data(show_spinner="Evaluating Sobol design...")
+def _sobol(n_base, seed, strategy, model_version):
+    from v7_5_sensitivity import sobol_analysis
+    return sobol_analysis(n_base, seed, strategy=strategy)
+
+def display_sensitivity_panel(wafer_intention, wafer_size_mm, rec, mon, zld, snapshot_year, strategy="Maintain"):
+    import plotly.graph_objects as go
+
+    st.markdown("""<h2 style='font-size:26px;'>Sensitivity Analysis</h2>""", unsafe_allow_html=True)
+    with st.form("sensitivity_form"):
+        col1, col2, col3 = st.columns(3)
+        n_base = col1.select_slider("Sobol Base Samples", [256, 512, 1024, 2048, 4096, 8192], value=2048)
+        seed = col2.number_input("Random Seed", 0, 2**31 - 1, 0, step=1, key="sensitivity_seed")
+        label = col3.selectbox("Output", list(SENSITIVITY_METRICS))
+        submitted = st.form_submit_button("Run Sensitivity Analysis")
+    if submitted:
+        st.session_state.sensitivity_params = (int(n_base), int(seed), SENSITIVITY_METRICS[label])
+    params = st.session_state.get("sensitivity_params")
+    if params is None:
+        return
+    n_base, seed, metric = params
+    label = next(k for k, v in SENSITIVITY_METRICS.items() if v == metric)
+
+    baseline = (("wafer_intention", wafer_intention), ("wafer_size_mm", wafer_size_mm), ("rec", float(rec)),
+                ("mon", float(mon)), ("zld", float(zld)), ("year", int(snapshot_year)))
+    tornado, t_stats = _tornado(baseline, strategy, _model_version())
+    sobol, s_stats = _sobol(n_base, seed, strategy, _model_version())
+    st.caption(f"Tornado: {t_stats['rows']} scenarios around the current sliders ({t_stats['seconds']:.2f}s). "
+               f"Sobol: {s_stats['rows']:,} scenarios over the full input ranges ({s_stats['seconds']:.2f}s).")
+
+    t = tornado[tornado["metric"] == metric].iloc[::-1]
+    base_value = t["baseline"].iloc[0]
+    fig = go.Figure()
+    fig.add_trace(go.Bar(y=t["factor"], x=t["low"] - base_value, base=base_value, orientation="h",
+                         name="Lowest", marker_color="#e74c3c",
+                         hovertext=[f"{v:,.2f} at {a}" for v, a in zip(t["low"], t["low_at"])], hoverinfo="text"))
+    fig.add_trace(go.Bar(y=t["factor"], x=t["high"] - base_value, base=base_value, orientation="h",
+                         name="Highest", marker_color="#2ecc71",
+                         hovertext=[f"{v:,.2f} at {a}" for v, a in zip(t["high"], t["high_at"])], hoverinfo="text"))
+    fig.update_layout(title=f"Tornado: {label} ({strategy}, baseline {base_value:,.2f})", barmode="overlay",
+                      xaxis_title=label, template="plotly_dark", font=dict(size=20), height=650)
+    st.plotly_chart(fig, use_container_width=True, key="sensitivity_tornado")
+
+    s = sobol[sobol["metric"] == metric]
+    fig = go.Figure()
+    fig.add_trace(go.Bar(x=s["factor"], y=s["S1"], name="First order (S1)",
+                         error_y=dict(type="data", array=s["S1_conf"])))
+    fig.add_trace(go.Bar(x=s["factor"], y=s["ST"], name="Total effect (ST)",
+                         error_y=dict(type="data", array=s["ST_conf"])))
+    fig.update_layout(title=f"Sobol Indices: {label} ({strategy})", barmode="group", yaxis_title="Share of variance",
+                      template="plotly_dark", font=dict(size=20))
+    st.plotly_chart(fig, use_container_width=True, key="sensitivity_sobol")
+
+# === TRADE-OFF HEATMAP ===
+HEATMAP_LEVELS = np.arange(0.0, 501.0, 10.0)
+HEATMAP_METRICS = {"ROI (%)": "roi", "Gallons Saved (B)": "gal_saved", "Profit ($B)": "profit",
+                   "Composite Score": "composite"}
+
+@st.cache_data(show_spinner="Evaluating the reclaim × ZLD grid...", max_entries=64)
+def _investment_grid(wafer_intention, wafer_size_mm, mon, year, strategy, model_version):
+    from v7_5_sim_core import investment_grid
+    grid = investment_grid(wafer_intention, wafer_size_mm, mon, year, HEATMAP_LEVELS, strategy)
+    grid["composite"] = (grid["roi"] + grid["efficiency"]) / 2
+    return grid
+
+def display_heatmap_panel(wafer_intention, wafer_size_mm, rec, mon, zld, snapshot_year, strategy="Maintain"):
+    import plotly.graph_objects as go
+
+    st.markdown("""<h2 style='font-size:26px;'>ROI Trade-off Surface</h2>""", unsafe_allow_html=True)
+    if not st.toggle("Show reclaim × ZLD surface", key="heatmap_on"):
+        return
+    label = st.selectbox("Color by", list(HEATMAP_METRICS), key="heatmap_metric")
+    # Cached per fixed axis (monitoring level), year and strategy; reclaim / ZLD moves only move the marker
+    grid = _investment_grid(wafer_intention, wafer_size_mm, float(mon), int(snapshot_year), strategy,
+                            _model_version())
+    investment = (HEATMAP_LEVELS[:, None] + mon + HEATMAP_LEVELS[None, :]) * 10_000
+    # Same quantities and units as the st.metric row of the ROI module
+    hover = np.stack([grid["gal_saved"] / 1e9, grid["roi"], grid["revenue"] / 1e9, grid["profit"] / 1e9,
+                      investment / 1e6, grid["composite"]], axis=-1)
+    z = grid[HEATMAP_METRICS[label]]
+    z = z / 1e9 if HEATMAP_METRICS[label] in ("gal_saved", "profit") else z
+
+    fig = go.Figure(go.Heatmap(
+        x=HEATMAP_LEVELS, y=HEATMAP_LEVELS, z=z, customdata=hover, colorscale="Viridis", colorbar=dict(title=label),
+        hovertemplate=("Reclamation %{y:.0f} · ZLD %{x:.0f}<br>"
+                       "Gallons Saved: %{customdata[0]:.3f}B<br>ROI: %{customdata[1]:.2f}%<br>"
+                       f"Revenue {snapshot_year}: $%{{customdata[2]:.3f}}B<br>"
+                       f"Profit {snapshot_year}: $%{{customdata[3]:.3f}}B<br>"
+                       "Investment: $%{customdata[4]:.3f}M<br>Composite: %{customdata[5]:.2f}<extra></extra>"),
+    ))
+    fig.add_trace(go.Scatter(x=[zld], y=[rec], mode="markers", name="Current sliders", hoverinfo="skip",
+                             marker=dict(symbol="x", size=16, color="white", line=dict(width=2, color="black"))))
+    fig.update_layout(title=f"{label}: Reclamation × ZLD (Monitoring {mon:.0f}, {strategy}, {snapshot_year})",
+                      xaxis_title="ZLD", yaxis_title="Water Reclamation", template="plotly_dark",
+                      font=dict(size=20), height=700, showlegend=False)
+    st.plotly_chart(fig, use_container_width=True, key="heatmap_chart")
+
+# === PROCESS-STEP BREAKDOWN ===
+def display_step_breakdown_panel(graph, strategy, snapshot_year):
+    import plotly.graph_objects as go
+    from v7_5_sim_core import STRATEGIES, WAFER_STEPS, step_shares
+
+    st.markdown("""<h2 style='font-size:26px;'>Process-Step Breakdown</h2>""", unsafe_allow_html=True)
+    if not st.toggle("Show gallons saved by process step", key="steps_on"):
+        return
+    # Both nodes were already evaluated for the metrics and the CAS diagram this run
+    steps, horizon = graph.get("steps"), graph.get("horizon")
+    years = steps["years"]
+    shares = np.stack([step_shares(steps, strategy, i) for i in range(len(years))], axis=1)
+    fig = go.Figure()
+    for step, share in zip(WAFER_STEPS, shares):
+        fig.add_trace(go.Scatter(x=years, y=horizon["gal_saved"] * share, mode="lines", stackgroup="steps", name=step))
+    fig.add_vline(x=snapshot_year, line_dash="dot", line_color="gray")
+    fig.update_layout(title=f"Gallons Saved by Process Step ({strategy})", xaxis_title="Year",
+                      yaxis_title="Gallons Saved", template="plotly_dark", font=dict(size=20),
+                      legend=dict(orientation="h", y=-0.25))
+    st.plotly_chart(fig, use_container_width=True, key="steps_area")
+
+    idx = int(np.searchsorted(years, snapshot_year))
+    fig = go.Figure()
+    for s, name in enumerate(STRATEGIES):
+        fig.add_trace(go.Bar(x=WAFER_STEPS, y=steps["efficiency"][s, :, idx], name=name,
+                             marker_line=dict(width=3 if name == strategy else 0, color="white")))
+    fig.update_layout(title=f"Predicted Water per Wafer by Step and Strategy ({snapshot_year})", barmode="group",
+                      yaxis_title="Gallons per Wafer", template="plotly_dark", font=dict(size=20))
+    st.plotly_chart(fig, use_container_width=True, key="steps_strategies")
+
+# === CAPEX TIMELINE ===
+TIMELINE_TECHS = {"rec": "Reclamation", "mon": "Monitoring", "zld": "ZLD"}
+TIMELINE_STEP_NAMES = {"annual": "year", "quarterly": "quarter", "monthly": "month"}
+
+@st.cache_data(show_spinner="Evaluating the timeline...", max_entries=64)
+def _timeline(wafer_intention, wafer_size_mm, rec, mon, zld, resolution, install_year, strategy, model_version):
+    from v7_5_sim_core import simulate_timeline
+    return simulate_timeline(wafer_intention, wafer_size_mm, rec, mon, zld, resolution, install_year=install_year,
+                             strategy=strategy)
+
+def display_timeline_panel(wafer_intention, wafer_size_mm, rec, mon, zld, strategy="Maintain"):
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+    from v7_5_sim_core import TECH_CURVES, TIME_RESOLUTIONS
+
+    st.markdown("""<h2 style='font-size:26px;'>Capex Timeline</h2>""", unsafe_allow_html=True)
+    if not st.toggle("Show ramp-up and depreciation timeline", key="timeline_on"):
+        return
+    col1, col2 = st.columns(2)
+    resolution = col1.selectbox("Time Resolution", list(TIME_RESOLUTIONS), index=0, key="timeline_resolution")
+    install_year = col2.number_input("Installation Year", 2025, 2075, 2025, step=1, key="timeline_install_year")
+    t = _timeline(wafer_intention, wafer_size_mm, float(rec), float(mon), float(zld), resolution, int(install_year),
+                  strategy, _model_version())
+    curves = "; ".join(f"{name}: {TECH_CURVES[tech]['ramp_months']}-month ramp, "
+                       f"{TECH_CURVES[tech]['decay_per_year']:.1%}/yr decay, {TECH_CURVES[tech]['life_years']}-yr life"
+                       for tech, name in TIMELINE_TECHS.items())
+    st.caption(f"{len(t['time']):,} {resolution} steps evaluated from {int(t['model_rows'])} distinct model rows. "
+               f"{curves}.")
+
+    fig = make_subplots(specs=[[{"secondary_y": True}]])
+    fig.add_trace(go.Bar(x=t["time"], y=t["gal_saved_step"], name=f"Gallons Saved per {TIMELINE_STEP_NAMES[resolution]}"))
+    for tech, name in TIMELINE_TECHS.items():
+        fig.add_trace(go.Scatter(x=t["time"], y=t[f"effective_{tech}"] * 10_000, mode="lines",
+                                 name=f"{name} in effect ($)"), secondary_y=True)
+    fig.add_trace(go.Scatter(x=t["time"], y=t["book_value"], mode="lines", name="Book value ($)",
+                             line=dict(dash="dot")), secondary_y=True)
+    fig.update_layout(title=f"Ramp-up, Depreciation and Gallons Saved ({strategy}, {resolution})", xaxis_title="Year",
+                      template="plotly_dark", font=dict(size=20), legend=dict(orientation="h", y=-0.25))
+    fig.update_yaxes(title_text="Gallons Saved", secondary_y=False)
+    fig.update_yaxes(title_text="Dollars", secondary_y=True)
+    st.plotly_chart(fig, use_container_width=True, key="timeline_chart")
+
+# === SCENARIO COMPARISON ===
+COMPARE_MAX_PINS = 6
+COMPARE_YEARS = np.arange(2025, 2076)
+COMPARE_METRICS = {"ROI (%)": "roi", "Gallons Saved": "gal_saved", "Profit ($)": "profit",
+                   "Revenue ($)": "revenue", "Composite Score": "composite"}
+
+def _scenario_label(sc):
+    return (f"{sc['wafer_intention']} · {sc['wafer_size_mm']}mm · "
+            f"R{sc['rec']:.0f}/M{sc['mon']:.0f}/Z{sc['zld']:.0f} · {sc['strategy']}")
+
+def display_comparison_panel(wafer_intention, wafer_size_mm, rec, mon, zld, strategy, snapshot_year):
+    import pandas as pd
+    import plotly.graph_objects as go
+    from v7_5_sim_core import cached_scenarios
+
+    st.markdown("""<h2 style='font-size:26px;'>Scenario Comparison</h2>""", unsafe_allow_html=True)
+    pins = st.session_state.setdefault("compare_pins", [])
+    current = {"wafer_intention": wafer_intention, "wafer_size_mm": int(wafer_size_mm), "rec": float(rec),
+               "mon": float(mon), "zld": float(zld), "strategy": strategy}
+    col1, col2, col3 = st.columns([2, 2, 1])
+    if col1.button("Pin current scenario", disabled=current in pins or len(pins) >= COMPARE_MAX_PINS):
+        pins.append(current)
+    unpin = col2.selectbox("Pinned", [_scenario_label(sc) for sc in pins], index=None, placeholder="Unpin...",
+                           label_visibility="collapsed")
+    if col3.button("Unpin", disabled=unpin is None):
+        pins[:] = [sc for sc in pins if _scenario_label(sc) != unpin]
+    if not pins:
+        st.caption(f"Pin up to {COMPARE_MAX_PINS} scenarios from the sidebar to compare them here.")
+        return
+
+    # One stacked predict per model for every pin not already cached
+    horizons = cached_scenarios(pins, COMPARE_YEARS)
+    labels = [_scenario_label(sc) for sc in pins]
+    label = st.selectbox("Metric", list(COMPARE_METRICS), key="compare_metric")
+    metric = COMPARE_METRICS[label]
+    fig = go.Figure()
+    for name, h in zip(labels, horizons):
+        y = (h["roi"] + h["efficiency"]) / 2 if metric == "composite" else h[metric]
+        fig.add_trace(go.Scatter(x=h["years"], y=y, mode="lines", name=name))
+    fig.add_vline(x=snapshot_year, line_dash="dot", line_color="gray")
+    fig.update_layout(title=f"{label} by Scenario", xaxis_title="Year", yaxis_title=label,
+                      template="plotly_dark", font=dict(size=20), legend=dict(orientation="h", y=-0.25))
+    st.plotly_chart(fig, use_container_width=True, key="compare_chart")
+
+    rows = []
+    for name, sc, h in zip(labels, pins, horizons):
+        idx = int(np.searchsorted(h["years"], snapshot_year))
+        rows.append({
+            "Scenario": name,
+            f"Gallons Saved {snapshot_year} (B)": h["gal_saved"][idx] / 1e9,
+            f"ROI {snapshot_year} (%)": h["roi"][idx],
+            f"Revenue {snapshot_year} ($B)": h["revenue"][idx] / 1e9,
+            f"Profit {snapshot_year} ($B)": h["profit"][idx] / 1e9,
+            "Investment ($M)": (sc["rec"] + sc["mon"] + sc["zld"]) * 10_000 / 1e6,
+            f"Composite {snapshot_year}": (h["roi"][idx] + h["efficiency"][idx]) / 2,
+            "Gallons Saved 2025-2075 (B)": h["gal_saved"].sum() / 1e9,
+        })
+    table = pd.DataFrame(rows).set_index("Scenario")
+    st.caption(f"Values for {snapshot_year}; the Δ table is relative to the first pinned scenario.")
+    st.dataframe(table.style.format("{:,.3f}"), use_container_width=True)
+    st.dataframe((table - table.iloc[0]).style.format("{:+,.3f}"), use_container_width=True)
+
+# === FLEET MODE ===
+@st.cache_data(show_spinner="Evaluating the fleet...")
+def _fleet(csv_bytes, n_synthetic, chunk_fabs, model_version):
+    import io
+    import pandas as pd
+    from v7_5_fleet import normalize_fleet, run_fleet, synthetic_fleet
+
+    # Normalized up front so every fab has an id for the drill-down
+    fleet = normalize_fleet(pd.read_csv(io.BytesIO(csv_bytes)) if csv_bytes else synthetic_fleet(n_synthetic))
+    return run_fleet(fleet, chunk_fabs=chunk_fabs), fleet
+
+def display_fleet_panel():
+    import plotly.graph_objects as go
+    from v7_5_fleet import fab_detail
+
+    st.markdown("""<h2 style='font-size:26px;'>Fleet Mode</h2>""", unsafe_allow_html=True)
+    with st.form("fleet_form"):
+        upload = st.file_uploader("Fleet table (CSV: fab_id, intention, size, rec, mon, zld; optional price, "
+                                  "volume, baseline_water, water_price)", type=["csv"])
+        col1, col2 = st.columns(2)
+        n_synthetic = col1.number_input("Synthetic fabs (when no file)", 10, 20_000, 1_000, step=100)
+        chunk_fabs = col2.number_input("Fabs per chunk", 50, 5_000, 500, step=50)
+        submitted = st.form_submit_button("Run Fleet")
+    if submitted:
+        st.session_state.fleet_params = (upload.getvalue() if upload else b"", int(n_synthetic), int(chunk_fabs))
+    params = st.session_state.get("fleet_params")
+    if params is None:
+        return
+
+    try:
+        result, fleet = _fleet(*params, _model_version())
+    except ValueError as e:
+        st.error(str(e))
+        return
+    by_year, fabs = result["by_year"], result["fabs"]
+    st.caption(f"{result['n_fabs']:,} fabs × {len(by_year)} years ({result['seconds']:.2f}s).")
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Total Gallons Saved", f"{result['total_gal_saved'] / 1e9:,.2f}B")
+    col2.metric("Total Profit", f"${result['total_profit'] / 1e9:,.2f}B")
+    col3.metric("Total Investment", f"${result['total_investment'] / 1e6:,.1f}M")
+
+    fig = go.Figure()
+    fig.add_trace(go.Bar(x=by_year["year"], y=by_year["gal_saved"], name="Gallons Saved", marker_color="#58d68d"))
+    fig.add_trace(go.Scatter(x=by_year["year"], y=by_year["fleet_roi"], name="Fleet ROI (%)", yaxis="y2",
+                             mode="lines+markers", line=dict(color="#9b59b6")))
+    fig.update_layout(title="Fleet Totals per Year", xaxis_title="Year", yaxis_title="Gallons Saved",
+                      yaxis2=dict(title="ROI (%)", overlaying="y", side="right"),
+                      template="plotly_dark", font=dict(size=20))
+    st.plotly_chart(fig, use_container_width=True, key="fleet_totals")
+    bands = by_year[["roi_p5", "roi_p50", "roi_p95"]].to_numpy().T
+    st.plotly_chart(_fan_chart(go, by_year["year"], bands, "ROI Across Fabs", "ROI (%)", "155,89,182"),
+                    use_container_width=True, key="fleet_roi_bands")
+    fig = go.Figure(go.Histogram(x=fabs["mean_roi"], nbinsx=60, marker_color="#3498db"))
+    fig.update_layout(title="Mean ROI per Fab (2025-2075)", xaxis_title="ROI (%)", yaxis_title="Fabs",
+                      template="plotly_dark", font=dict(size=20))
+    st.plotly_chart(fig, use_container_width=True, key="fleet_roi_hist")
+
+    # Drill-down, largest savers first
+    fabs = fabs.sort_values("total_gal_saved", ascending=False)
+    st.dataframe(fabs.head(200), hide_index=True, use_container_width=True)
+    fab_id = st.selectbox("Drill down into fab", fabs["fab_id"].head(200), key="fleet_fab")
+    row = fleet[fleet["fab_id"] == fab_id].iloc[0]
+    detail = fab_detail(row.to_dict())
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=detail["year"], y=detail["gal_saved"], name="Gallons Saved", mode="lines+markers"))
+    fig.add_trace(go.Scatter(x=detail["year"], y=detail["roi"], name="ROI (%)", yaxis="y2", mode="lines"))
+    fig.update_layout(title=f"{fab_id}: {row['intention']}, {row['size']}mm", xaxis_title="Year",
+                      yaxis_title="Gallons Saved", yaxis2=dict(title="ROI (%)", overlaying="y", side="right"),
+                      template="plotly_dark", font=dict(size=20))
+    st.plotly_chart(fig, use_container_width=True, key="fleet_fab_detail")
+
+# === PROFILER PANEL ===
+def display_profiler_panel(run):
+    # Sidebar view of the timing spans; only rendered when FAB_PROFILE=1
+    import pandas as pd
+    from v7_5_profiler import PROFILER
+
+    with st.sidebar.expander("Profiler"):
+        if run is not None:
+            st.caption(f"This rerun: {run['seconds'] * 1e3:.1f} ms")
+            this_run = pd.DataFrame(
+                [(name, s["count"], s["seconds"] * 1e3) for name, s in run["spans"].items()],
+                columns=["span", "calls", "ms"],
+            ).sort_values("ms", ascending=False)
+            st.dataframe(this_run, hide_index=True, use_container_width=True)
+        summary = PROFILER.summary()
+        st.caption(f"Rolling (last {PROFILER.window} samples per span, all sessions)")
+        rolling = pd.DataFrame(
+            [(name, r["count"], r["p50_ms"], r["p95_ms"]) for name, r in summary.items()],
+            columns=["span", "calls", "p50 ms", "p95 ms"],
+        ).sort_values("p95 ms", ascending=False)
+        st.dataframe(rolling, hide_index=True, use_container_width=True)
+        st.download_button("Prometheus metrics", PROFILER.prometheus_text(), file_name="fab_metrics.prom",
+                           mime="text/plain")
@@ -0,0 +1,181 @@
+# === v7_5_batch_runner.py ===
+# Headless scenario sweeps: no Streamlit, no browser.
+#
+#   python v7_5_batch_runner.py scenarios.csv results.csv --workers 8
+#   python v7_5_batch_runner.py scenarios.parquet results.parquet --summary
+#
+# Input rows: intention, size, year_start, year_end, rec, mon, zld
+# (a single `year` column may replace year_start/year_end; an optional
+# `scenario_id` column is carried through). Chunks are evaluated by a process
+# pool whose workers load the models once, and results are appended to the
+# output file as each chunk finishes, so memory stays bounded by the number
+# of chunks in flight.
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+INPUT_COLUMNS = ["intention", "size", "year_start", "year_end", "rec", "mon", "zld"]
+METRICS = ["multiplier", "revenue", "profit", "roi", "efficiency", "gal_saved", "dollar_saved"]
+
+# === INPUT ===
+def read_scenarios(path, chunk_size):
+    import pandas as pd
+
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq  # optional dependency, only for Parquet input
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+def _normalize(chunk, first_id):
+    from v7_5_sim_core import WAFER_DATA
+
+    chunk = chunk.rename(columns=str.strip)
+    if "year" in chunk.columns:
+        chunk = chunk.assign(year_start=chunk["year"], year_end=chunk["year"])
+    missing = [c for c in INPUT_COLUMNS if c not in chunk.columns]
+    if missing:
+        raise ValueError(f"Scenario file is missing columns: {missing}")
+    if "scenario_id" not in chunk.columns:
+        chunk = chunk.assign(scenario_id=np.arange(first_id, first_id + len(chunk)))
+    bad_size = ~chunk["size"].isin(list(WAFER_DATA))
+    if bad_size.any():
+        raise ValueError(f"Unsupported wafer size(s) {sorted(chunk.loc[bad_size, 'size'].unique())}; "
+                         f"expected one of {list(WAFER_DATA)}")
+    if (chunk["year_end"] < chunk["year_start"]).any():
+        raise ValueError("year_end must not be before year_start")
+    return chunk
+
+# === WORKER ===
+def _init_worker():
+    # Load (and compile) both models once per process
+    from v7_5_sim_core import load_model, load_water_model
+    load_water_model()
+    load_model()
+
+def evaluate_chunk(chunk, summary=False):
+    import pandas as pd
+    from v7_5_sim_core import simulate_horizon
+
+    # One output row per scenario-year
+    counts = (chunk["year_end"] - chunk["year_start"] + 1).to_numpy()
+    row = np.repeat(np.arange(len(chunk)), counts)
+    offsets = np.repeat(np.cumsum(counts) - counts, counts)
+    years = chunk["year_start"].to_numpy()[row] + (np.arange(len(row)) - offsets)
+
+    out = {m: np.empty(len(row)) for m in METRICS}
+    intention = chunk["intention"].to_numpy()[row]
+    size = chunk["size"].to_numpy()[row]
+    rec, mon, zld = (chunk[c].to_numpy(dtype=float)[row] for c in ("rec", "mon", "zld"))
+
+    # Batched per (intention, size): two predict calls per group
+    groups = pd.DataFrame({"intention": intention, "size": size}).groupby(["intention", "size"]).indices
+    for (g_intention, g_size), idx in groups.items():
+        result = simulate_horizon(g_intention, int(g_size), rec[idx], mon[idx], zld[idx], years[idx])
+        for m in METRICS:
+            out[m][idx] = result[m]
+
+    frame = pd.DataFrame({
+        "scenario_id": chunk["scenario_id"].to_numpy()[row],
+        "intention": intention, "size": size, "year": years,
+        "rec": rec, "mon": mon, "zld": zld,
+        **out,
+        "composite": (out["roi"] + out["efficiency"]) / 2,
+    })
+    if not summary:
+        return frame
+    return frame.groupby(["scenario_id", "intention", "size", "rec", "mon", "zld"], sort=False).agg(
+        year_start=("year", "min"), year_end=("year", "max"),
+        total_revenue=("revenue", "sum"), total_profit=("profit", "sum"),
+        total_gal_saved=("gal_saved", "sum"), total_dollar_saved=("dollar_saved", "sum"),
+        mean_roi=("roi", "mean"), mean_composite=("composite", "mean"),
+    ).reset_index()
+
+# === OUTPUT ===
+class ResultWriter:
+    def __init__(self, path):
+        self.path = path
+        self.parquet = path.endswith(".parquet")
+        self._writer = None
+        self.rows = 0
+        if os.path.exists(path):
+            os.remove(path)
+
+    def write(self, frame):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table)
+        else:
+            frame.to_csv(self.path, mode="a", header=self.rows == 0, index=False)
+        self.rows += len(frame)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+# === DRIVER ===
+def run_batch(input_path, output_path, workers=None, chunk_size=2000, summary=False, max_in_flight=None):
+    workers = os.cpu_count() if workers is None else workers
+    max_in_flight = max_in_flight or max(2, 2 * workers)
+    writer = ResultWriter(output_path)
+    started = time.perf_counter()
+    scenarios = 0
+
+    def chunks():
+        nonlocal scenarios
+        for raw in read_scenarios(input_path, chunk_size):
+            chunk = _normalize(raw, scenarios)
+            scenarios += len(chunk)
+            yield chunk
+
+    try:
+        if workers == 0:
+            _init_worker()
+            for chunk in chunks():
+                writer.write(evaluate_chunk(chunk, summary))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+                pending = set()
+                for chunk in chunks():
+                    # Bounded in-flight work keeps memory flat for very large inputs
+                    if len(pending) >= max_in_flight:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for f in done:
+                            writer.write(f.result())
+                        print(f"  {writer.rows:,} rows written", file=sys.stderr)
+                    pending.add(pool.submit(evaluate_chunk, chunk, summary))
+                for f in pending:
+                    writer.write(f.result())
+                print(f"  {writer.rows:,} rows written", file=sys.stderr)
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - started
+    return {"scenarios": scenarios, "rows": writer.rows, "seconds": round(elapsed, 2),
+            "scenarios_per_second": round(scenarios / elapsed, 1) if elapsed else None}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate scenario rows from CSV/Parquet without Streamlit.")
+    parser.add_argument("input", help="scenario file (.csv or .parquet)")
+    parser.add_argument("output", help="result file (.csv or .parquet)")
+    parser.add_argument("--workers", type=int, default=None, help="process count (default: all cores, 0 = in-process)")
+    parser.add_argument("--chunk-size", type=int, default=2000, help="scenario rows per task")
+    parser.add_argument("--summary", action="store_true", help="one row per scenario instead of one per year")
+    args = parser.parse_args(argv)
+
+    stats = run_batch(args.input, args.output, args.workers, args.chunk_size, args.summary)
+    print(f"{stats['scenarios']:,} scenarios -> {stats['rows']:,} rows in {stats['seconds']}s "
+          f"({stats['scenarios_per_second']} scenarios/s)")
+
+if __name__ == "__main__":
+    main()
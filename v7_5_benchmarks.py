@@ -0,0 +1,261 @@
+# === v7_5_benchmarks.py ===
+# Micro-benchmarks for the simulator's hot paths. Runs fully offline: by
+# default a small stand-in water model (same feature schema as
+# build_features_for_water_model) is fitted locally, so no download is needed.
+#
+#   python v7_5_benchmarks.py --out bench.json
+#   python v7_5_benchmarks.py --out new.json --compare bench.json   # exit 1 on regression
+#   python v7_5_benchmarks.py --real-models                          # use FAB_MODEL_DIR as configured
+#
+# Environment variables are set before the simulator modules are imported,
+# which is why those imports live inside the functions below.
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+import timeit
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+STANDIN_DIR = os.path.join(HERE, "bench_models")
+YEARS = np.arange(2025, 2076)
+SCENARIO = dict(wafer_intention="Automotive", wafer_size_mm=300, rec=100.0, mon=50.0, zld=100.0)
+
+# === STAND-IN MODEL ===
+def fit_standin_water_model(path, n_rows=4000, n_estimators=100, max_depth=5, seed=0):
+    # Rows come from the real batch feature builder, so the column schema
+    # always matches what the app sends to the water model
+    import joblib
+    from sklearn.compose import ColumnTransformer
+    from sklearn.ensemble import GradientBoostingRegressor
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import OneHotEncoder
+    from v7_5_sim_core import ROI_WEIGHTS, WATER_PER_WAFER_BY_SIZE, build_features_for_water_model_batch
+
+    rng = np.random.default_rng(seed)
+    sizes = rng.choice([200, 300, 450], n_rows)
+    X = build_features_for_water_model_batch(
+        rng.choice(list(ROI_WEIGHTS), n_rows), rng.integers(2025, 2076, n_rows),
+        rng.integers(0, 51, n_rows) * 10.0, rng.integers(0, 51, n_rows) * 10.0, rng.integers(0, 51, n_rows) * 10.0,
+        sizes,
+    )
+    X["Investment Strategy"] = rng.choice(["Maintain", "Increase", "Decrease"], n_rows)
+    X["Wafer Step"] = rng.choice(["Cleaning", "Etching", "Diffusion", "Lithography", "Metrology"], n_rows)
+    baseline = np.array([WATER_PER_WAFER_BY_SIZE[s] for s in sizes])
+    y = (baseline * (1 - 0.5 * X["Percent Water Reclaimed"].to_numpy() / 100)
+         - 2 * (X["Year"].to_numpy() - 2025) + rng.normal(0, 30, n_rows))
+
+    categorical = ["Wafer Intention", "Investment Strategy", "Wafer Step"]
+    model = Pipeline([
+        ("prep", ColumnTransformer([("cat", OneHotEncoder(handle_unknown="ignore"), categorical)],
+                                   remainder="passthrough")),
+        ("model", GradientBoostingRegressor(n_estimators=n_estimators, max_depth=max_depth, random_state=seed)),
+    ])
+    model.fit(X, y)
+    tmp = path + ".part"
+    joblib.dump(model, tmp)
+    os.replace(tmp, path)
+    return path
+
+def use_standin_models(model_dir=STANDIN_DIR, refit=False):
+    # Point the bootstrap at a directory holding the stand-in water model and
+    # a copy of the (small, committed) revenue model. Must run before
+    # v7_5_sim_core / v7_5_model_bootstrap are imported.
+    os.makedirs(model_dir, exist_ok=True)
+    os.environ["FAB_MODEL_DIR"] = model_dir
+    os.environ["FAB_OFFLINE"] = "1"
+    os.environ.setdefault("FAB_SURFACE_STORE", os.path.join(model_dir, "no_surface_store"))
+    from v7_5_model_bootstrap import MODELS, sha256_file
+
+    revenue = os.path.join(model_dir, MODELS["revenue"]["filename"])
+    if not os.path.exists(revenue):
+        shutil.copy2(os.path.join(HERE, MODELS["revenue"]["filename"]), revenue)
+    water = os.path.join(model_dir, MODELS["water"]["filename"])
+    if refit or not os.path.exists(water):
+        fit_standin_water_model(water)
+    # Pin the stand-in's own hash so a pinned real-model hash never rejects it
+    os.environ[MODELS["water"]["env"]] = sha256_file(water)
+    return model_dir
+
+# === TIMING ===
+def measure(fn, repeat=5, min_seconds=0.2):
+    # timeit-style: pick a loop count that runs ~min_seconds, then repeat
+    timer = timeit.Timer(fn)
+    number, elapsed = timer.autorange()
+    if elapsed < min_seconds:
+        number = max(1, int(number * min_seconds / max(elapsed, 1e-9)))
+    runs = np.array(timer.repeat(repeat=repeat, number=number)) / number
+    return {
+        "loops": number,
+        "repeat": repeat,
+        "best_s": float(runs.min()),
+        "median_s": float(np.median(runs)),
+        "mean_s": float(runs.mean()),
+    }
+
+# === BENCHMARKS ===
+def _legacy_horizon_loop(sim, roi_model, scenario):
+    # The per-year loop display_roi_module used before the batched horizon engine
+    s = scenario
+    for year in YEARS:
+        X = sim.build_features(s["wafer_intention"], year, s["rec"], s["mon"], s["zld"], s["wafer_size_mm"] / 300)
+        multiplier = roi_model.predict(X)[0]
+        sim.calculate_roi_v4(s["wafer_intention"], s["wafer_size_mm"], year, s["rec"], s["mon"], s["zld"], multiplier)
+
+def benchmark_cases(compiled=True):
+    import warnings
+    warnings.filterwarnings("ignore")
+    import v7_5_sim_core as sim
+    from v7_4_roi_streamlit import build_charts
+    from v7_3_cas_st import _cas_skeleton, draw_cas_flow
+
+    s = SCENARIO
+    water = sim.load_water_model(compiled=compiled)
+    revenue = sim.load_model(compiled=compiled)
+    water_sk = sim.load_water_model(compiled=False)
+    revenue_sk = sim.load_model(compiled=False)
+
+    rng = np.random.default_rng(0)
+    n = 10_000
+    batch_args = (
+        rng.choice(list(sim.ROI_WEIGHTS), n), rng.integers(2025, 2076, n),
+        rng.integers(0, 51, n) * 10.0, rng.integers(0, 51, n) * 10.0, rng.integers(0, 51, n) * 10.0,
+    )
+    batch_sizes = rng.choice(list(sim.WAFER_DATA), n)
+    water_frame = sim.build_features_for_water_model_batch(*batch_args, batch_sizes)
+    water_cols = sim.build_water_model_columns(*batch_args, batch_sizes)
+    revenue_X = sim.build_features_batch(*batch_args, batch_sizes / 300)
+
+    single_water = sim.build_features_for_water_model(s["wafer_intention"], 2035, s["rec"], s["mon"], s["zld"], 300)
+    single_revenue = sim.build_features(s["wafer_intention"], 2035, s["rec"], s["mon"], s["zld"], 1.0)
+    horizon = sim.simulate_horizon(s["wafer_intention"], s["wafer_size_mm"], s["rec"], s["mon"], s["zld"], YEARS)
+    cas_args = dict(reclaim=s["rec"], monitor=s["mon"], zld=s["zld"], wafer_size_mm=s["wafer_size_mm"],
+                    wafer_intention=s["wafer_intention"], strategy="Maintain", revenue=float(horizon["revenue"][10]),
+                    profit=float(horizon["profit"][10]), roi_value=float(horizon["roi"][10]), composite_score=900.0,
+                    total_gal_saved=float(horizon["gal_saved"][10]), year=2035,
+                    eff_level=float(horizon["efficiency"][10]))
+
+    def cached_sweep():
+        return sim.cached_horizon(s["wafer_intention"], s["wafer_size_mm"], s["rec"], s["mon"], s["zld"], YEARS)
+
+    def cas_cold():
+        _cas_skeleton.cache_clear()
+        return _cas_skeleton()
+
+    cached_sweep()  # warm the scenario cache for the "hit" case
+    return {
+        "build_features": lambda: sim.build_features(s["wafer_intention"], 2035, s["rec"], s["mon"], s["zld"], 1.0),
+        "build_features_for_water_model": lambda: sim.build_features_for_water_model(
+            s["wafer_intention"], 2035, s["rec"], s["mon"], s["zld"], 300),
+        "build_features_batch_10k": lambda: sim.build_features_batch(*batch_args, batch_sizes / 300),
+        "build_water_model_columns_10k": lambda: sim.build_water_model_columns(*batch_args, batch_sizes),
+        "predict_single_water_sklearn": lambda: water_sk.predict(single_water),
+        "predict_single_water": lambda: water.predict(single_water),
+        "predict_single_revenue_sklearn": lambda: revenue_sk.predict(single_revenue),
+        "predict_single_revenue": lambda: revenue.predict(single_revenue),
+        "predict_batch_10k_water_sklearn": lambda: water_sk.predict(water_frame),
+        "predict_batch_10k_water": lambda: water.predict(water_cols if getattr(water, "accepts_columns", False)
+                                                         else water_frame),
+        "predict_batch_10k_revenue": lambda: revenue.predict(revenue_X),
+        "calculate_roi_v4": lambda: sim.calculate_roi_v4(
+            s["wafer_intention"], s["wafer_size_mm"], 2035, s["rec"], s["mon"], s["zld"], 1.0),
+        "horizon_sweep_51y_legacy_loop": lambda: _legacy_horizon_loop(sim, revenue, s),
+        "horizon_sweep_51y_batched": lambda: sim.simulate_horizon(
+            s["wafer_intention"], s["wafer_size_mm"], s["rec"], s["mon"], s["zld"], YEARS),
+        "horizon_sweep_51y_cache_hit": cached_sweep,
+        "draw_charts_build": lambda: build_charts(YEARS, horizon, s["rec"], s["mon"], s["zld"],
+                                                  s["wafer_intention"], s["wafer_size_mm"]),
+        "draw_cas_flow_skeleton_cold": cas_cold,
+        "draw_cas_flow_rerun": lambda: draw_cas_flow(**cas_args),
+    }
+
+def run_benchmarks(only=None, repeat=5, compiled=True):
+    import logging
+
+    results = {}
+    cases = benchmark_cases(compiled)
+    for name, fn in cases.items():
+        if only and not any(pattern in name for pattern in only):
+            continue
+        # Bare-mode Streamlit logs a warning on every element call
+        logging.disable(logging.WARNING)
+        try:
+            results[name] = measure(fn, repeat=repeat)
+        finally:
+            logging.disable(logging.NOTSET)
+        print(f"{name:36s} {results[name]['median_s'] * 1e3:10.3f} ms  (best {results[name]['best_s'] * 1e3:.3f})",
+              file=sys.stderr)
+    return results
+
+def environment_info(models):
+    import sklearn
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True,
+                                text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "sklearn": sklearn.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "models": models,
+    }
+
+# === COMPARISON ===
+def compare(current, previous, threshold=1.25):
+    # Median-time ratio per benchmark; anything slower than `threshold` is a regression
+    regressions = []
+    for name, result in current["results"].items():
+        before = previous["results"].get(name)
+        if before is None:
+            continue
+        ratio = result["median_s"] / before["median_s"] if before["median_s"] else float("inf")
+        flag = "REGRESSION" if ratio > threshold else ""
+        print(f"{name:36s} {before['median_s'] * 1e3:10.3f} -> {result['median_s'] * 1e3:10.3f} ms  "
+              f"x{ratio:5.2f} {flag}")
+        if ratio > threshold:
+            regressions.append(name)
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the simulator's hot paths and save the results as JSON.")
+    parser.add_argument("--out", default="bench.json", help="result file (JSON)")
+    parser.add_argument("--compare", help="previous result file; exit 1 if any median regresses")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown ratio counted as a regression")
+    parser.add_argument("--only", nargs="+", help="run benchmarks whose name contains any of these")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--real-models", action="store_true", help="use the configured models instead of the stand-in")
+    parser.add_argument("--refit", action="store_true", help="refit the stand-in water model")
+    parser.add_argument("--no-compile", action="store_true", help="benchmark the sklearn models uncompiled")
+    args = parser.parse_args(argv)
+
+    if not args.real_models:
+        use_standin_models(refit=args.refit)
+    report = {
+        "environment": environment_info("real" if args.real_models else "stand-in"),
+        "results": run_benchmarks(args.only, args.repeat, compiled=not args.no_compile),
+    }
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.out}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+        regressions = compare(report, previous, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s): {', '.join(regressions)}", file=sys.stderr)
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
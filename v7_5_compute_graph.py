@@ -0,0 +1,82 @@
+# === v7_5_compute_graph.py ===
+# Minimal pull-based computation graph for incremental recompute.
+#
+# Nodes declare the inputs / other nodes they depend on. A GraphState keeps
+# the last value of every node together with the versions of the
+# dependencies it was computed from; asking for a node recomputes it only
+# when one of those versions moved. Inputs get a new version only when their
+# value actually changes, so a rerun with the same widgets costs a few dict
+# lookups.
+
+import time
+
+from v7_5_profiler import span
+
+
+class ComputationGraph:
+    def __init__(self):
+        self.nodes = {}
+
+    def node(self, name, deps):
+        # Decorator: fn receives its dependencies as keyword arguments
+        def register(fn):
+            if name in deps:
+                raise ValueError(f"Node {name!r} cannot depend on itself")
+            self.nodes[name] = (tuple(deps), fn)
+            return fn
+        return register
+
+    def new_state(self):
+        return GraphState(self)
+
+
+class GraphState:
+    def __init__(self, graph):
+        self.graph = graph
+        self.inputs = {}
+        self.values = {}
+        self.versions = {}  # input or node name -> int, bumped on every change
+        self.stamps = {}    # node name -> dependency versions it was computed from
+        self.last_run = {"computed": [], "reused": [], "seconds": {}}
+
+    def set_inputs(self, **inputs):
+        self.last_run = {"computed": [], "reused": [], "seconds": {}}
+        for name, value in inputs.items():
+            if name in self.graph.nodes:
+                raise ValueError(f"{name!r} is a node, not an input")
+            if name not in self.inputs or not _same(self.inputs[name], value):
+                self.inputs[name] = value
+                self.versions[name] = self.versions.get(name, 0) + 1
+
+    def get(self, name):
+        if name in self.inputs:
+            return self.inputs[name]
+        if name not in self.graph.nodes:
+            raise KeyError(f"Unknown input or node {name!r}")
+        deps, fn = self.graph.nodes[name]
+        for dep in deps:
+            self.get(dep)  # brings stale upstream nodes up to date first
+        stamp = tuple(self.versions[dep] for dep in deps)
+        if self.stamps.get(name) == stamp:
+            if name not in self.last_run["reused"] and name not in self.last_run["computed"]:
+                self.last_run["reused"].append(name)
+            return self.values[name]
+
+        started = time.perf_counter()
+        with span(f"graph.{name}"):
+            self.values[name] = fn(**{dep: self.get(dep) for dep in deps})
+        self.last_run["seconds"][name] = round(time.perf_counter() - started, 4)
+        self.last_run["computed"].append(name)
+        self.stamps[name] = stamp
+        self.versions[name] = self.versions.get(name, 0) + 1
+        return self.values[name]
+
+    def stats(self):
+        return {"nodes": len(self.graph.nodes), **self.last_run}
+
+
+def _same(a, b):
+    try:
+        return bool(a == b) and type(a) is type(b)
+    except (TypeError, ValueError):  # e.g. arrays, whose == is elementwise
+        return a is b
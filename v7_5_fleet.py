@@ -0,0 +1,241 @@
+# === v7_5_fleet.py ===
+# Fleet mode: every fab in a site table × every year, evaluated in chunks.
+#
+#   python v7_5_fleet.py fleet.csv --fabs-out fabs.csv --detail-out fleet_years.parquet
+#   python v7_5_fleet.py --synthetic 10000 --chunk-fabs 500
+#
+# Fleet rows: fab_id, intention, size, rec, mon, zld, plus optional per-fab
+# overrides price, volume, baseline_water (gal/wafer) and water_price ($/gal);
+# blank overrides fall back to the size/intention defaults. Each chunk of fabs
+# is one (fabs × years) array per metric; fleet totals, the per-year ROI
+# histogram and the per-fab summary rows are accumulated as chunks finish,
+# so memory is bounded by the chunk size, not by the fleet size.
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from v7_5_monte_carlo import BASELINE_PARAMETERS, evaluate_draws
+from v7_5_sim_core import ROI_WEIGHTS, WAFER_DATA, WATER_PER_WAFER_BY_SIZE, simulate_horizon
+
+YEARS = np.arange(2025, 2076)
+FLEET_COLUMNS = ["fab_id", "intention", "size", "rec", "mon", "zld"]
+OVERRIDE_COLUMNS = ["price", "volume", "baseline_water", "water_price"]
+METRICS = ["revenue", "profit", "roi", "efficiency", "gal_saved", "dollar_saved"]
+# ROI histogram: a zero bin plus log-spaced bins from 0.01% to 100,000%,
+# each 10^(7/800) ≈ 1.020 times wider than the last (about 2% per bin)
+ROI_BIN_EDGES = np.concatenate([[0.0], np.geomspace(0.01, 1e5, 801)])
+
+# === INPUT ===
+def synthetic_fleet(n_fabs, seed=0):
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    sizes = rng.choice(list(WAFER_DATA), n_fabs, p=[0.3, 0.6, 0.1])
+    base_volume = np.array([WAFER_DATA[s]["volume"] for s in sizes])
+    return pd.DataFrame({
+        "fab_id": [f"FAB-{i:05d}" for i in range(n_fabs)],
+        "intention": rng.choice(list(ROI_WEIGHTS), n_fabs),
+        "size": sizes,
+        "rec": rng.integers(0, 51, n_fabs) * 10.0,
+        "mon": rng.integers(0, 51, n_fabs) * 10.0,
+        "zld": rng.integers(0, 51, n_fabs) * 10.0,
+        # A third of the sites report their own volume
+        "volume": np.where(rng.random(n_fabs) < 1 / 3, np.round(base_volume * rng.uniform(0.5, 1.5, n_fabs)), np.nan),
+    })
+
+def iter_fleet(source, chunk_fabs):
+    # source: a path (.csv / .parquet, read in chunks) or an in-memory DataFrame
+    if isinstance(source, str):
+        from v7_5_batch_runner import read_scenarios
+        yield from read_scenarios(source, chunk_fabs)
+    else:
+        for start in range(0, len(source), chunk_fabs):
+            yield source.iloc[start:start + chunk_fabs]
+
+def normalize_fleet(chunk, first_index=0):
+    chunk = chunk.rename(columns=str.strip)
+    missing = [c for c in FLEET_COLUMNS[1:] if c not in chunk.columns]
+    if missing:
+        raise ValueError(f"Fleet file is missing columns: {missing}")
+    if "fab_id" not in chunk.columns:
+        chunk = chunk.assign(fab_id=[f"FAB-{i:05d}" for i in range(first_index, first_index + len(chunk))])
+    bad_size = ~chunk["size"].isin(list(WAFER_DATA))
+    if bad_size.any():
+        raise ValueError(f"Unsupported wafer size(s) {sorted(chunk.loc[bad_size, 'size'].unique())}; "
+                         f"expected one of {list(WAFER_DATA)}")
+    bad_intention = ~chunk["intention"].isin(list(ROI_WEIGHTS))
+    if bad_intention.any():
+        raise ValueError(f"Unknown intention(s) {sorted(chunk.loc[bad_intention, 'intention'].unique())}")
+    for column in OVERRIDE_COLUMNS:
+        if column not in chunk.columns:
+            chunk = chunk.assign(**{column: np.nan})
+    return chunk
+
+# === EVALUATION ===
+def evaluate_fleet_chunk(chunk, years=YEARS):
+    # Returns {metric: (fabs, years) array} for one normalized chunk
+    n, n_years = len(chunk), len(years)
+    out = {m: np.empty((n, n_years)) for m in METRICS}
+    intentions = chunk["intention"].to_numpy()
+    sizes = chunk["size"].to_numpy().astype(int)
+    rec, mon, zld = (chunk[c].to_numpy(dtype=float) for c in ("rec", "mon", "zld"))
+    overrides = {c: chunk[c].to_numpy(dtype=float) for c in OVERRIDE_COLUMNS}
+
+    for intention in np.unique(intentions):
+        for size_mm in np.unique(sizes):
+            idx = np.flatnonzero((intentions == intention) & (sizes == size_mm))
+            if len(idx) == 0:
+                continue
+            k = len(idx)
+            # One batched horizon call per (intention, size) group: k fabs × every year
+            horizon = simulate_horizon(str(intention), int(size_mm), np.repeat(rec[idx], n_years),
+                                       np.repeat(mon[idx], n_years), np.repeat(zld[idx], n_years),
+                                       np.tile(years, k))
+            base = WAFER_DATA[int(size_mm)]
+            p = {name: np.full((k, 1), value) for name, value in BASELINE_PARAMETERS.items()}
+            p["volume_factor"] = (np.where(np.isnan(overrides["volume"][idx]), base["volume"],
+                                           overrides["volume"][idx]) / base["volume"])[:, None]
+            p["price_factor"] = (np.where(np.isnan(overrides["price"][idx]), base["price"],
+                                          overrides["price"][idx]) / base["price"])[:, None]
+            p["water_price"] = np.where(np.isnan(overrides["water_price"][idx]), BASELINE_PARAMETERS["water_price"],
+                                        overrides["water_price"][idx])[:, None]
+            p["baseline_water"] = np.where(np.isnan(overrides["baseline_water"][idx]),
+                                           WATER_PER_WAFER_BY_SIZE.get(int(size_mm), 3600),
+                                           overrides["baseline_water"][idx])[:, None]
+            result = evaluate_draws(str(intention), int(size_mm), rec[idx, None], mon[idx, None], zld[idx, None],
+                                    years[None, :], horizon["multiplier"].reshape(k, n_years),
+                                    horizon["raw_efficiency"].reshape(k, n_years), p)
+            for m in METRICS:
+                out[m][idx] = result[m]
+    return out
+
+# === STREAMED AGGREGATION ===
+class FleetAggregator:
+    def __init__(self, years=YEARS):
+        self.years = np.asarray(years)
+        self.n_fabs = 0
+        self.totals = {m: np.zeros(len(years)) for m in ("revenue", "profit", "gal_saved", "dollar_saved")}
+        self.investment = 0.0
+        self.roi_hist = np.zeros((len(years), len(ROI_BIN_EDGES)), dtype=np.int64)  # last bin = overflow
+        self.fab_rows = []
+
+    def add(self, chunk, out):
+        self.n_fabs += len(chunk)
+        for m in self.totals:
+            self.totals[m] += out[m].sum(axis=0)
+        cost = (chunk["rec"] + chunk["mon"] + chunk["zld"]).to_numpy(dtype=float) * 10000
+        self.investment += cost.sum()
+        # Bin every fab-year ROI; per-year counts are all that is kept
+        bins = np.searchsorted(ROI_BIN_EDGES, out["roi"], side="right") - 1
+        bins = np.where(out["roi"] <= 0, 0, np.clip(bins, 0, len(ROI_BIN_EDGES) - 1))
+        year_idx = np.broadcast_to(np.arange(len(self.years)), bins.shape)
+        np.add.at(self.roi_hist, (year_idx.ravel(), bins.ravel()), 1)
+
+        import pandas as pd
+        self.fab_rows.append(pd.DataFrame({
+            "fab_id": chunk["fab_id"].to_numpy(), "intention": chunk["intention"].to_numpy(),
+            "size": chunk["size"].to_numpy(), "rec": chunk["rec"].to_numpy(), "mon": chunk["mon"].to_numpy(),
+            "zld": chunk["zld"].to_numpy(), "investment": cost,
+            "total_gal_saved": out["gal_saved"].sum(axis=1), "total_profit": out["profit"].sum(axis=1),
+            "total_dollar_saved": out["dollar_saved"].sum(axis=1),
+            "mean_roi": out["roi"].mean(axis=1), "peak_roi": out["roi"].max(axis=1),
+        }))
+
+    def roi_percentiles(self, quantiles=(5, 50, 95)):
+        # Per-year ROI percentiles read off the histogram: the bin's upper edge,
+        # so each value reads high by at most one bin width (about 2%)
+        counts = np.cumsum(self.roi_hist, axis=1)
+        upper = np.append(ROI_BIN_EDGES[1:], np.inf)
+        result = np.empty((len(quantiles), len(self.years)))
+        for qi, q in enumerate(quantiles):
+            target = counts[:, -1] * q / 100
+            idx = np.argmax(counts >= target[:, None], axis=1)
+            result[qi] = np.where(idx == 0, 0.0, upper[idx])
+        return result
+
+    def result(self, seconds=None):
+        import pandas as pd
+
+        fabs = pd.concat(self.fab_rows, ignore_index=True) if self.fab_rows else pd.DataFrame()
+        by_year = pd.DataFrame({"year": self.years, **self.totals})
+        # Same definition as the single-fab ROI: water dollars saved over the up-front investment
+        by_year["fleet_roi"] = by_year["dollar_saved"] / self.investment * 100 if self.investment else 0.0
+        p5, p50, p95 = self.roi_percentiles()
+        by_year["roi_p5"], by_year["roi_p50"], by_year["roi_p95"] = p5, p50, p95
+        return {
+            "n_fabs": self.n_fabs,
+            "total_gal_saved": float(self.totals["gal_saved"].sum()),
+            "total_profit": float(self.totals["profit"].sum()),
+            "total_dollar_saved": float(self.totals["dollar_saved"].sum()),
+            "total_investment": self.investment,
+            "by_year": by_year,
+            "fabs": fabs,
+            "seconds": seconds,
+        }
+
+# === DRIVER ===
+def run_fleet(source, years=YEARS, chunk_fabs=500, detail_path=None):
+    years = np.asarray(years)
+    started = time.perf_counter()
+    agg = FleetAggregator(years)
+    writer = None
+    if detail_path:
+        from v7_5_batch_runner import ResultWriter
+        writer = ResultWriter(detail_path)
+    try:
+        for raw in iter_fleet(source, chunk_fabs):
+            chunk = normalize_fleet(raw, agg.n_fabs)
+            out = evaluate_fleet_chunk(chunk, years)
+            agg.add(chunk, out)
+            if writer is not None:
+                writer.write(fab_years_frame(chunk, out, years))
+    finally:
+        if writer is not None:
+            writer.close()
+    return agg.result(round(time.perf_counter() - started, 3))
+
+def fab_years_frame(chunk, out, years=YEARS):
+    # Long format: one row per fab-year
+    import pandas as pd
+
+    n = len(chunk)
+    return pd.DataFrame({
+        "fab_id": np.repeat(chunk["fab_id"].to_numpy(), len(years)),
+        "year": np.tile(years, n),
+        **{m: out[m].ravel() for m in METRICS},
+    })
+
+def fab_detail(fleet_row, years=YEARS):
+    # Drill-down: the full horizon of a single fab (a one-row fleet)
+    import pandas as pd
+
+    chunk = normalize_fleet(pd.DataFrame([fleet_row]))
+    return fab_years_frame(chunk, evaluate_fleet_chunk(chunk, np.asarray(years)), years)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate a fleet of fabs over 2025-2075 in chunks.")
+    parser.add_argument("fleet", nargs="?", help="fleet table (.csv or .parquet)")
+    parser.add_argument("--synthetic", type=int, help="generate a synthetic fleet of this many fabs instead")
+    parser.add_argument("--chunk-fabs", type=int, default=500, help="fabs evaluated per chunk")
+    parser.add_argument("--fabs-out", help="per-fab summary (.csv or .parquet)")
+    parser.add_argument("--detail-out", help="per fab-year rows, streamed (.csv or .parquet)")
+    args = parser.parse_args(argv)
+    if not args.fleet and not args.synthetic:
+        parser.error("give a fleet file or --synthetic N")
+
+    source = synthetic_fleet(args.synthetic) if args.synthetic else args.fleet
+    result = run_fleet(source, chunk_fabs=args.chunk_fabs, detail_path=args.detail_out)
+    if args.fabs_out:
+        fabs = result["fabs"]
+        fabs.to_parquet(args.fabs_out, index=False) if args.fabs_out.endswith(".parquet") \
+            else fabs.to_csv(args.fabs_out, index=False)
+    print(f"{result['n_fabs']:,} fabs × {len(YEARS)} years in {result['seconds']}s: "
+          f"{result['total_gal_saved']:,.0f} gal saved, ${result['total_profit']:,.0f} profit, "
+          f"${result['total_investment']:,.0f} invested", file=sys.stderr)
+    print(result["by_year"].to_string(index=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,425 @@
+# === v7_5_inference_server.py ===
+# Shared local inference service: one process owns both models and answers
+# predict calls from every Streamlit replica / session.
+#
+#   python v7_5_inference_server.py serve --url unix:/tmp/fab_inference.sock
+#   python v7_5_inference_server.py serve --url tcp://127.0.0.1:8765 --window-ms 2
+#   python v7_5_inference_server.py metrics --url unix:/tmp/fab_inference.sock
+#
+# Clients opt in with FAB_INFERENCE_URL; load_model / load_water_model then
+# return a RemoteModel whose predict() goes over the socket. Requests that
+# arrive within --window-ms of each other are concatenated into one predict
+# call per model and the results split back per request.
+#
+# Wire format (no pickle): 8-byte frame header (JSON length, payload length),
+# a JSON header describing the arrays, then the raw array bytes.
+
+import argparse
+import json
+import os
+import queue
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import time
+
+import numpy as np
+
+FRAME = struct.Struct("!II")
+DEFAULT_WINDOW_MS = float(os.environ.get("FAB_INFERENCE_WINDOW_MS", "2"))
+DEFAULT_MAX_BATCH_ROWS = 65_536
+REQUEST_BUCKETS = [1, 2, 4, 8, 16, 32, 64]
+ROW_BUCKETS = [1, 10, 100, 1_000, 10_000, 100_000]
+FALLBACK_RETRY_S = 30.0  # how long a client predicts locally before trying the service again
+
+
+class InferenceServiceError(RuntimeError):
+    pass
+
+# === WIRE FORMAT ===
+def parse_url(url):
+    # unix:/path/to.sock  or  tcp://host:port
+    if url.startswith("unix:"):
+        return socket.AF_UNIX, url[len("unix:"):]
+    if url.startswith("tcp://"):
+        host, _, port = url[len("tcp://"):].rpartition(":")
+        return socket.AF_INET, (host or "127.0.0.1", int(port))
+    raise ValueError(f"Inference URL must start with unix: or tcp://, got {url!r}")
+
+def _wire_array(a):
+    a = np.asarray(a)
+    if a.dtype == object:
+        a = a.astype(str)  # category columns travel as fixed-width unicode
+    return np.ascontiguousarray(a)
+
+def send_message(sock, header, arrays=()):
+    arrays = [_wire_array(a) for a in arrays]
+    header = {**header, "arrays": [[a.dtype.str, list(a.shape)] for a in arrays]}
+    head = json.dumps(header).encode()
+    payload = b"".join(a.tobytes() for a in arrays)
+    sock.sendall(FRAME.pack(len(head), len(payload)) + head + payload)
+
+def _recv_exact(sock, n):
+    buf = bytearray(n)
+    view = memoryview(buf)
+    got = 0
+    while got < n:
+        k = sock.recv_into(view[got:])
+        if k == 0:
+            raise ConnectionError("Connection closed mid-message")
+        got += k
+    return buf
+
+def recv_message(sock):
+    try:
+        head_len, payload_len = FRAME.unpack(_recv_exact(sock, FRAME.size))
+    except ConnectionError:
+        return None, None
+    header = json.loads(bytes(_recv_exact(sock, head_len)))
+    payload = _recv_exact(sock, payload_len)
+    arrays, offset = [], 0
+    for dtype, shape in header.pop("arrays"):
+        dtype = np.dtype(dtype)
+        count = int(np.prod(shape))
+        a = np.frombuffer(payload, dtype=dtype, count=count, offset=offset).reshape(shape)
+        arrays.append(a.astype(object) if dtype.kind == "U" else a)
+        offset += count * dtype.itemsize
+    return header, arrays
+
+# === METRICS ===
+class BatchMetrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.rows = 0
+        self.batches = 0
+        self.errors = 0
+        self.predict_seconds = 0.0
+        self.queue_depth_max = 0
+        self.batch_requests = np.zeros(len(REQUEST_BUCKETS) + 1, dtype=np.int64)  # last = +Inf
+        self.batch_rows = np.zeros(len(ROW_BUCKETS) + 1, dtype=np.int64)
+
+    def record_batch(self, n_requests, n_rows, seconds, queue_depth):
+        with self.lock:
+            self.batches += 1
+            self.requests += n_requests
+            self.rows += n_rows
+            self.predict_seconds += seconds
+            self.queue_depth_max = max(self.queue_depth_max, queue_depth)
+            self.batch_requests[np.searchsorted(REQUEST_BUCKETS, n_requests)] += 1
+            self.batch_rows[np.searchsorted(ROW_BUCKETS, n_rows)] += 1
+
+    def snapshot(self, queue_depth):
+        with self.lock:
+            return {
+                "queue_depth": queue_depth,
+                "queue_depth_max": self.queue_depth_max,
+                "requests": self.requests,
+                "rows": self.rows,
+                "batches": self.batches,
+                "errors": self.errors,
+                "predict_seconds": round(self.predict_seconds, 6),
+                "mean_requests_per_batch": self.requests / self.batches if self.batches else 0.0,
+                "mean_rows_per_batch": self.rows / self.batches if self.batches else 0.0,
+                "batch_requests_buckets": dict(zip(map(str, REQUEST_BUCKETS + ["+Inf"]),
+                                                   np.cumsum(self.batch_requests).tolist())),
+                "batch_rows_buckets": dict(zip(map(str, ROW_BUCKETS + ["+Inf"]),
+                                               np.cumsum(self.batch_rows).tolist())),
+            }
+
+def prometheus_text(m):
+    lines = [
+        "# HELP fab_inference_queue_depth Predict requests waiting for the batcher.",
+        "# TYPE fab_inference_queue_depth gauge",
+        f"fab_inference_queue_depth {m['queue_depth']}",
+        f"fab_inference_queue_depth_max {m['queue_depth_max']}",
+        "# TYPE fab_inference_requests_total counter",
+        f"fab_inference_requests_total {m['requests']}",
+        f"fab_inference_rows_total {m['rows']}",
+        f"fab_inference_errors_total {m['errors']}",
+        "# TYPE fab_inference_batch_requests histogram",
+    ]
+    for le, count in m["batch_requests_buckets"].items():
+        lines.append(f'fab_inference_batch_requests_bucket{{le="{le}"}} {count}')
+    lines += [f"fab_inference_batch_requests_sum {m['requests']}",
+              f"fab_inference_batch_requests_count {m['batches']}",
+              "# TYPE fab_inference_batch_rows histogram"]
+    for le, count in m["batch_rows_buckets"].items():
+        lines.append(f'fab_inference_batch_rows_bucket{{le="{le}"}} {count}')
+    lines += [f"fab_inference_batch_rows_sum {m['rows']}",
+              f"fab_inference_batch_rows_count {m['batches']}",
+              f"fab_inference_predict_seconds_total {m['predict_seconds']:.9f}"]
+    return "\n".join(lines) + "\n"
+
+# === MICRO-BATCHER ===
+class _Request:
+    __slots__ = ("model", "names", "arrays", "n", "done", "result", "error")
+
+    def __init__(self, model, names, arrays):
+        self.model = model
+        self.names = names  # column names, or None for a plain 2-D array
+        self.arrays = arrays
+        self.n = len(arrays[0]) if arrays else 0
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher:
+    def __init__(self, models, window_ms=DEFAULT_WINDOW_MS, max_rows=DEFAULT_MAX_BATCH_ROWS):
+        self.models = models  # name -> object with predict()
+        self.window = window_ms / 1e3
+        self.max_rows = max_rows
+        self.queue = queue.Queue()
+        self.metrics = BatchMetrics()
+        threading.Thread(target=self._run, name="inference-batcher", daemon=True).start()
+
+    def predict(self, model, names, arrays):
+        if model not in self.models:
+            raise InferenceServiceError(f"Unknown model {model!r}")
+        request = _Request(model, names, arrays)
+        self.queue.put(request)
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            depth = self.queue.qsize() + 1
+            rows = batch[0].n
+            deadline = time.perf_counter() + self.window
+            # Keep collecting until the window closes or the batch is full
+            while rows < self.max_rows:
+                try:
+                    item = self.queue.get(timeout=max(0.0, deadline - time.perf_counter()))
+                except queue.Empty:
+                    break
+                batch.append(item)
+                rows += item.n
+            started = time.perf_counter()
+            groups = {}
+            for request in batch:
+                groups.setdefault((request.model, request.names), []).append(request)
+            for (model, names), requests in groups.items():
+                self._execute(model, names, requests)
+            self.metrics.record_batch(len(batch), rows, time.perf_counter() - started, depth)
+
+    def _execute(self, model, names, requests):
+        try:
+            if names is None:
+                X = np.concatenate([r.arrays[0] for r in requests])
+            else:
+                columns = {name: np.concatenate([r.arrays[i] for r in requests]) for i, name in enumerate(names)}
+                X = columns if getattr(self.models[model], "accepts_columns", False) else _frame(columns)
+            y = np.asarray(self.models[model].predict(X))
+            for request, part in zip(requests, np.split(y, np.cumsum([r.n for r in requests])[:-1])):
+                request.result = part
+        except Exception as e:  # reported to every caller in the group
+            with self.metrics.lock:
+                self.metrics.errors += len(requests)
+            for request in requests:
+                request.error = InferenceServiceError(f"{model} predict failed: {e}")
+        for request in requests:
+            request.done.set()
+
+    def metrics_snapshot(self):
+        return self.metrics.snapshot(self.queue.qsize())
+
+def _frame(columns):
+    import pandas as pd
+    return pd.DataFrame(columns)
+
+# === SERVER ===
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        batcher = self.server.batcher
+        while True:
+            header, arrays = recv_message(self.request)
+            if header is None:
+                return
+            op = header.get("op")
+            try:
+                if op == "predict":
+                    y = batcher.predict(header["model"], tuple(header["names"]) if header.get("names") else None, arrays)
+                    send_message(self.request, {"ok": True}, [y])
+                elif op == "metrics":
+                    m = batcher.metrics_snapshot()
+                    send_message(self.request, {"ok": True, "metrics": m, "prometheus": prometheus_text(m)})
+                elif op == "info":
+                    send_message(self.request, {"ok": True, "models": sorted(batcher.models), "pid": os.getpid()})
+                else:
+                    send_message(self.request, {"ok": False, "error": f"Unknown op {op!r}"})
+            except InferenceServiceError as e:
+                send_message(self.request, {"ok": False, "error": str(e)})
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    request_queue_size = 128  # every replica's sessions connect at once after a restart
+
+
+class _TCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128
+
+
+def make_server(url, models, window_ms=DEFAULT_WINDOW_MS, max_rows=DEFAULT_MAX_BATCH_ROWS):
+    family, address = parse_url(url)
+    if family == socket.AF_UNIX:
+        if os.path.exists(address):
+            os.unlink(address)  # stale socket from a previous run
+        server = _UnixServer(address, _Handler)
+        os.chmod(address, 0o660)
+    else:
+        server = _TCPServer(address, _Handler)
+    server.batcher = MicroBatcher(models, window_ms, max_rows)
+    return server
+
+def serve(url, window_ms=DEFAULT_WINDOW_MS, max_rows=DEFAULT_MAX_BATCH_ROWS, compiled=None):
+    import v7_5_sim_core as sim
+
+    compiled = sim.USE_COMPILED_MODELS if compiled is None else compiled
+    models = {"water": sim.load_water_model(compiled, remote=False), "revenue": sim.load_model(compiled, remote=False)}
+    server = make_server(url, models, window_ms, max_rows)
+    print(f"Inference service on {url} (window {window_ms} ms, pid {os.getpid()})", file=sys.stderr)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if url.startswith("unix:") and os.path.exists(url[len("unix:"):]):
+            os.unlink(url[len("unix:"):])
+
+# === CLIENT ===
+class InferenceClient:
+    # One connection per calling thread, so concurrent sessions can coalesce
+    def __init__(self, url, timeout=30.0):
+        self.url = url
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _socket(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            family, address = parse_url(self.url)
+            sock = socket.socket(family, socket.SOCK_STREAM)
+            sock.connect(address)
+            sock.settimeout(self.timeout)
+            self._local.sock = sock
+        return sock
+
+    def call(self, header, arrays=()):
+        for attempt in range(2):
+            try:
+                sock = self._socket()
+                send_message(sock, header, arrays)
+                reply, out = recv_message(sock)
+                if reply is None:
+                    raise ConnectionError("Inference service closed the connection")
+                break
+            except OSError:
+                self.close()
+                if attempt:  # one reconnect, e.g. after a service restart
+                    raise
+        if not reply.get("ok"):
+            raise InferenceServiceError(reply.get("error", "unknown error"))
+        return reply, out
+
+    def close(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            sock.close()
+            self._local.sock = None
+
+
+class RemoteModel:
+    # Drop-in for the local model objects: predict() only. When the service
+    # stops answering mid-session, calls go to the local model from
+    # `fallback` (loaded on first need) and the service is retried every
+    # FALLBACK_RETRY_S seconds, so a restarted service is picked up again.
+    accepts_columns = True  # the raw column dict is cheaper to send than a DataFrame
+
+    def __init__(self, client, name, fallback=None):
+        self.client = client
+        self.name = name
+        self.fallback = fallback
+        self._local_model = None
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+
+    def predict(self, X):
+        if self.fallback is not None and time.monotonic() < self._retry_at:
+            return self._predict_local(X)
+        if isinstance(X, dict) or hasattr(X, "columns"):
+            names = list(X.keys()) if isinstance(X, dict) else list(X.columns)
+            arrays = [np.asarray(X[c]) for c in names]
+        else:
+            names, arrays = None, [np.atleast_2d(np.asarray(X))]
+        try:
+            _, (y,) = self.client.call({"op": "predict", "model": self.name, "names": names}, arrays)
+        except OSError as e:
+            if self.fallback is None:
+                raise
+            if self._retry_at == 0.0:
+                print(f"Inference service at {self.client.url} unavailable ({e}); predicting the {self.name} "
+                      f"model locally.", file=sys.stderr)
+            self._retry_at = time.monotonic() + FALLBACK_RETRY_S
+            return self._predict_local(X)
+        self._retry_at = 0.0
+        return y
+
+    def _predict_local(self, X):
+        with self._lock:
+            if self._local_model is None:
+                self._local_model = self.fallback()
+        model = self._local_model
+        if isinstance(X, dict) and not getattr(model, "accepts_columns", False):
+            X = _frame(X)
+        return model.predict(X)
+
+def connect_model(name, url, fallback=None):
+    # Raises OSError when the service is not reachable; fallback() returns
+    # the local model used if it becomes unreachable later
+    client = _client(url)
+    client.call({"op": "info"})
+    return RemoteModel(client, name, fallback)
+
+_CLIENTS = {}
+
+def _client(url):
+    if url not in _CLIENTS:
+        _CLIENTS[url] = InferenceClient(url)
+    return _CLIENTS[url]
+
+def service_metrics(url):
+    reply, _ = _client(url).call({"op": "metrics"})
+    return reply["metrics"], reply["prometheus"]
+
+# === CLI ===
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Shared micro-batching inference service for the simulator models.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_serve = sub.add_parser("serve", help="load both models and serve predictions")
+    p_serve.add_argument("--url", default=os.environ.get("FAB_INFERENCE_URL", "unix:/tmp/fab_inference.sock"))
+    p_serve.add_argument("--window-ms", type=float, default=DEFAULT_WINDOW_MS,
+                         help="how long the batcher waits for more requests after the first")
+    p_serve.add_argument("--max-batch-rows", type=int, default=DEFAULT_MAX_BATCH_ROWS)
+    p_serve.add_argument("--sklearn", action="store_true", help="serve the sklearn models, not the compiled ones")
+    p_metrics = sub.add_parser("metrics", help="print queue-depth and batch-size metrics")
+    p_metrics.add_argument("--url", default=os.environ.get("FAB_INFERENCE_URL", "unix:/tmp/fab_inference.sock"))
+    p_metrics.add_argument("--prometheus", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        serve(args.url, args.window_ms, args.max_batch_rows, compiled=False if args.sklearn else None)
+        return 0
+    metrics, prom = service_metrics(args.url)
+    print(prom if args.prometheus else json.dumps(metrics, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
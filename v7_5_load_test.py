@@ -0,0 +1,180 @@
+# === v7_5_load_test.py ===
+# Concurrent-session load test for one replica of v7_1_streamlit.py.
+#
+#   python v7_5_load_test.py                              1, 2, 4, 8 sessions, stand-in water model
+#   python v7_5_load_test.py --sessions 1 4 16 --reruns 40 --out load.json
+#   python v7_5_load_test.py --real-models                 use FAB_MODEL_DIR as configured
+#
+# Each concurrency level runs in a fresh interpreter (one process = one
+# replica). N threads each drive their own Streamlit AppTest session through
+# a randomized sequence of sidebar moves, the way Streamlit's own script
+# threads share a server process: one model copy, one scenario cache, one
+# GIL. Every rerun is timed end to end (script + AppTest bookkeeping, no
+# browser or websocket), and the level reports p50 / p95 / p99 latency,
+# reruns per second and the process RSS.
+#
+# Environment variables are set before the simulator modules are imported,
+# which is why those imports live inside the functions below.
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+APP = os.path.join(HERE, "v7_1_streamlit.py")
+INTENTIONS = ["Automotive", "Consumer Electronics", "High-Performance Logic", "Medical Devices", "Industrial Controls"]
+SIZES = [200, 300, 450]
+STRATEGIES = ["Maintain", "Increase", "Decrease"]
+SLIDER_LEVELS = np.arange(0.0, 501.0, 10.0)
+# Relative frequency of each user action; investment sliders dominate real use
+ACTIONS = {"rec": 3, "mon": 2, "zld": 3, "year": 2, "intention": 1, "size": 1, "strategy": 1}
+
+
+def _rss_mb():
+    # Current and peak resident set of this process
+    try:
+        with open("/proc/self/status") as f:
+            fields = dict(line.split(":", 1) for line in f)
+        return {k: int(fields[f].split()[0]) / 1024 for k, f in (("rss", "VmRSS"), ("peak", "VmHWM"))}
+    except (OSError, KeyError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        return {"rss": peak, "peak": peak}
+
+# === SESSION SCRIPT ===
+def random_actions(rng, n):
+    # (action, value) pairs; slider targets are anywhere on the grid, so most reruns miss the cache
+    names, weights = list(ACTIONS), np.array(list(ACTIONS.values()), dtype=float)
+    out = []
+    for action in rng.choice(names, n, p=weights / weights.sum()):
+        if action in ("rec", "mon", "zld"):
+            value = float(rng.choice(SLIDER_LEVELS))
+        elif action == "year":
+            value = int(rng.integers(2025, 2076))
+        elif action == "intention":
+            value = str(rng.choice(INTENTIONS))
+        elif action == "size":
+            value = int(rng.choice(SIZES))
+        else:
+            value = str(rng.choice(STRATEGIES))
+        out.append((str(action), value))
+    return out
+
+def _apply(at, action, value):
+    sliders = at.sidebar.slider  # Snapshot Year, Reclamation, Monitoring, ZLD
+    if action == "year":
+        sliders[0].set_value(value)
+    elif action in ("rec", "mon", "zld"):
+        sliders[1 + ("rec", "mon", "zld").index(action)].set_value(value)
+    else:
+        key = {"intention": "wafer_selector_main", "size": "wafer_size_selector", "strategy": "strategy_selector"}
+        at.sidebar.selectbox(key=key[action]).set_value(value)
+
+def run_session(actions, timeout, latencies, errors, start):
+    from streamlit.testing.v1 import AppTest
+
+    start.wait()
+    t0 = time.perf_counter()
+    at = AppTest.from_file(APP, default_timeout=timeout).run()
+    latencies["cold"].append(time.perf_counter() - t0)
+    for action, value in actions:
+        _apply(at, action, value)
+        t0 = time.perf_counter()
+        at.run()
+        latencies["warm"].append(time.perf_counter() - t0)
+        if at.exception:
+            errors.append(f"{action}={value}: {at.exception[0].value}")
+
+# === ONE CONCURRENCY LEVEL (fresh process) ===
+def run_level(sessions, reruns, seed, timeout=300):
+    import logging
+    import warnings
+
+    warnings.filterwarnings("ignore")
+    logging.disable(logging.WARNING)  # bare-mode Streamlit warns on every element
+    rss_before = _rss_mb()
+    latencies, errors = {"cold": [], "warm": []}, []
+    start = threading.Barrier(sessions + 1)
+    threads = [threading.Thread(target=run_session, daemon=True,
+                                args=(random_actions(np.random.default_rng([seed, i]), reruns), timeout,
+                                      latencies, errors, start))
+               for i in range(sessions)]
+    for t in threads:
+        t.start()
+    start.wait()
+    t0 = time.perf_counter()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - t0
+
+    warm = np.array(latencies["warm"]) * 1e3
+    p50, p95, p99 = np.percentile(warm, [50, 95, 99]) if len(warm) else (np.nan,) * 3
+    rss = _rss_mb()
+    return {
+        "sessions": sessions, "reruns": int(len(warm)), "wall_s": round(wall, 3),
+        "throughput_rps": round(len(warm) / wall, 2) if wall else None,
+        "p50_ms": round(float(p50), 1), "p95_ms": round(float(p95), 1), "p99_ms": round(float(p99), 1),
+        "max_ms": round(float(warm.max()), 1) if len(warm) else None,
+        "cold_p50_ms": round(float(np.median(latencies["cold"]) * 1e3), 1) if latencies["cold"] else None,
+        "rss_mb": round(rss["rss"], 1), "peak_rss_mb": round(rss["peak"], 1),
+        "rss_growth_mb": round(rss["rss"] - rss_before["rss"], 1),
+        "errors": errors[:10], "error_count": len(errors),
+    }
+
+def load_test(levels=(1, 2, 4, 8), reruns=20, seed=0, real_models=False):
+    rows = []
+    for sessions in levels:
+        cmd = [sys.executable, "-W", "ignore", os.path.abspath(__file__), "_level", str(sessions),
+               "--reruns", str(reruns), "--seed", str(seed)] + (["--real-models"] if real_models else [])
+        out = subprocess.run(cmd, capture_output=True, text=True)
+        if out.returncode != 0:
+            raise RuntimeError(f"{sessions}-session level failed:\n{out.stderr[-2000:]}")
+        row = json.loads(out.stdout.strip().splitlines()[-1])
+        rows.append(row)
+        print(f"{row['sessions']:8d} {row['reruns']:7d} {row['throughput_rps']:9.2f} {row['p50_ms']:8.1f} "
+              f"{row['p95_ms']:8.1f} {row['p99_ms']:8.1f} {row['cold_p50_ms']:9.1f} {row['rss_mb']:8.1f} "
+              f"{row['peak_rss_mb']:9.1f} {row['error_count']:6d}", file=sys.stderr)
+    return rows
+
+# === CLI ===
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Drive N concurrent dashboard sessions and report rerun latency.")
+    parser.add_argument("--sessions", nargs="+", type=int, default=[1, 2, 4, 8], help="concurrency levels")
+    parser.add_argument("--reruns", type=int, default=20, help="randomized sidebar moves per session")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--real-models", action="store_true", help="use the configured models instead of the stand-in")
+    parser.add_argument("--refit", action="store_true", help="refit the stand-in water model")
+    parser.add_argument("--out", help="write the per-level results as JSON")
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv[:1] == ["_level"]:
+        parser.add_argument("level", type=int)
+        args = parser.parse_args(argv[1:])
+        if not args.real_models:
+            from v7_5_benchmarks import use_standin_models
+            use_standin_models()
+        print(json.dumps(run_level(args.level, args.reruns, args.seed)))
+        return
+    args = parser.parse_args(argv)
+
+    if not args.real_models:
+        from v7_5_benchmarks import use_standin_models
+        use_standin_models(refit=args.refit)  # fit once here, not in every level
+    print(f"{'sessions':>8s} {'reruns':>7s} {'reruns/s':>9s} {'p50 ms':>8s} {'p95 ms':>8s} {'p99 ms':>8s} "
+          f"{'cold ms':>9s} {'RSS MB':>8s} {'peak MB':>9s} {'errors':>6s}", file=sys.stderr)
+    rows = load_test(args.sessions, args.reruns, args.seed, args.real_models)
+    if args.out:
+        from v7_5_benchmarks import environment_info
+        with open(args.out, "w") as f:
+            json.dump({"environment": environment_info("real" if args.real_models else "stand-in"),
+                       "reruns_per_session": args.reruns, "levels": rows}, f, indent=2)
+        print(f"Results written to {args.out}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+# === v7_5_model_artifact.py ===
+# Flat, memory-mappable model artifacts.
+#
+# Export:  python v7_5_model_artifact.py export            (both models)
+# Report:  python v7_5_model_artifact.py report            (load time + RSS, pkl vs artifact)
+#
+# Layout: <model file stem>.fabm/ next to the .pkl, holding
+#   header.json      version, source model hash, feature schema, encodings, ensemble scalars
+#   <array>.npy      flat tree arrays and scaler statistics
+# The compiled model (v7_5_tree_compiler) is exactly these arrays, so loading
+# is np.load(mmap_mode="r") per array: no unpickling, no sklearn import, and
+# the pages sit in the OS page cache shared by every replica on the host.
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from v7_5_profiler import span
+
+ARTIFACT_VERSION = 1
+ARTIFACT_SUFFIX = ".fabm"
+HEADER_NAME = "header.json"
+ENSEMBLE_ARRAYS = ["feature", "threshold", "left", "value", "roots", "is_leaf"]
+
+
+def artifact_path(name):
+    from v7_5_model_bootstrap import model_path
+    return os.path.splitext(model_path(name))[0] + ARTIFACT_SUFFIX
+
+def _probe_input(name, frame=False):
+    import v7_5_sim_core as sim
+
+    probe = sim._parity_probe()
+    if name == "revenue":
+        return sim.build_features_batch(*probe[:-1], probe[-1] / 300)
+    return sim.build_features_for_water_model_batch(*probe) if frame else sim.build_water_model_columns(*probe)
+
+def _plain(value):
+    # JSON-safe copy of category values, column ids and numpy scalars
+    return value.item() if isinstance(value, np.generic) else value
+
+# === EXPORT ===
+def export_artifact(name, out_dir=None):
+    from v7_5_model_bootstrap import load_model_file, model_path
+    from v7_5_scenario_cache import file_fingerprint
+    from v7_5_tree_compiler import compile_model
+
+    model = load_model_file(name)
+    # Same parity-checked compile as the live loaders; unsupported models raise here
+    compiled = compile_model(model, probe=_probe_input(name, frame=True))
+    return write_artifact(compiled, out_dir or artifact_path(name), {
+        "model": name,
+        "source_file": os.path.basename(model_path(name)),
+        "source_sha256": file_fingerprint(model_path(name)),
+        "source_type": type(model).__name__,
+    })
+
+def write_artifact(compiled, out_dir, info):
+    # Any CompiledModel; `info` (model, source_file, source_sha256, ...) goes into the header
+    # Write into a temp directory and swap it in, as the surface store does
+    tmp_dir = out_dir.rstrip("/\\") + ".building"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    ens = compiled.ensemble
+    for key in ENSEMBLE_ARRAYS:
+        np.save(os.path.join(tmp_dir, f"{key}.npy"), np.ascontiguousarray(getattr(ens, key)))
+
+    stages = []
+    for s, stage in enumerate(compiled.stages):
+        steps = []
+        for k, step in enumerate(stage):
+            spec = {"type": type(step).__name__, "columns": [_plain(c) for c in step.columns]}
+            if hasattr(step, "encodings"):
+                spec["encodings"] = [[[_plain(c), int(code)] for c, code in codes.items()] for codes in step.encodings]
+            for attr in ("ignore_unknown", "unknown_value"):
+                if hasattr(step, attr):
+                    spec[attr] = _plain(getattr(step, attr))
+            for attr in ("mean", "scale"):
+                if hasattr(step, attr):
+                    spec[attr] = f"stage{s}_{k}_{attr}.npy"
+                    np.save(os.path.join(tmp_dir, spec[attr]), np.asarray(getattr(step, attr), dtype=float))
+            steps.append(spec)
+        stages.append(steps)
+
+    header = {
+        "version": ARTIFACT_VERSION,
+        **info,
+        "input_names": [_plain(c) for c in compiled.input_names],
+        "stages": stages,
+        "ensemble": {"depth": int(ens.depth), "scale": float(ens.scale), "bias": float(ens.bias),
+                     "compare_dtype": np.dtype(ens.compare_dtype).name, "nodes": int(len(ens.left)),
+                     "trees": int(len(ens.roots))},
+        "exported_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    with open(os.path.join(tmp_dir, HEADER_NAME), "w") as f:
+        json.dump(header, f, indent=2)
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(tmp_dir, out_dir)
+    return header
+
+# === LOAD ===
+def _restore_step(spec, path):
+    import v7_5_tree_compiler as tc
+
+    cls = {"CompiledOneHot": tc.CompiledOneHot, "CompiledOrdinal": tc.CompiledOrdinal,
+           "CompiledScaler": tc.CompiledScaler, "CompiledPassthrough": tc.CompiledPassthrough}[spec["type"]]
+    step = cls.__new__(cls)  # constructors take sklearn objects; the state is all in the header
+    step.columns = spec["columns"]
+    if "encodings" in spec:
+        step.encodings = [{c: code for c, code in pairs} for pairs in spec["encodings"]]
+    for attr in ("ignore_unknown", "unknown_value"):
+        if attr in spec:
+            setattr(step, attr, spec[attr])
+    for attr in ("mean", "scale"):
+        if attr in spec:
+            setattr(step, attr, np.load(os.path.join(path, spec[attr])))
+    return step
+
+def read_header(path):
+    header_path = os.path.join(path, HEADER_NAME)
+    if not os.path.exists(header_path):
+        return None
+    with open(header_path) as f:
+        header = json.load(f)
+    return header if header.get("version") == ARTIFACT_VERSION else None
+
+def load_artifact(path, header=None, load_source_estimator=None, load_source=None):
+    from v7_5_tree_compiler import CompiledModel, FlatEnsemble
+
+    header = header or read_header(path)
+    if header is None:
+        raise ValueError(f"{path} is not a version {ARTIFACT_VERSION} model artifact")
+    # np.asarray drops the memmap subclass but keeps the mapping: plain ndarray speed, shared pages
+    arrays = {key: np.asarray(np.load(os.path.join(path, f"{key}.npy"), mmap_mode="r")) for key in ENSEMBLE_ARRAYS}
+    e = header["ensemble"]
+    ensemble = FlatEnsemble(arrays["feature"], arrays["threshold"], arrays["left"], arrays["value"], arrays["roots"],
+                            e["depth"], e["scale"], e["bias"], np.dtype(e["compare_dtype"]).type,
+                            is_leaf=arrays["is_leaf"])
+    stages = [[_restore_step(spec, path) for spec in stage] for stage in header["stages"]]
+    return CompiledModel(header["input_names"], stages, ensemble, load_source_estimator=load_source_estimator,
+                         load_source=load_source)
+
+def load_current_artifact(name, path=None, with_source=False):
+    # The artifact for `name` when present and exported from the current .pkl, else None.
+    # Predictions stay on the memory-mapped arrays at every batch size; with_source=True
+    # (offline batch jobs) unpickles the .pkl on the first batch over LARGE_BATCH_ROWS
+    # for sklearn's faster traversal, at the cost of a private copy of the model.
+    from v7_5_model_bootstrap import expected_checksum, load_model_file, model_path
+    from v7_5_scenario_cache import file_fingerprint
+
+    path = path or artifact_path(name)
+    header = read_header(path)
+    if header is None:
+        return None
+    # Checked against the pinned hash, else the .pkl on disk; an artifact shipped
+    # without its .pkl and without a pinned hash is taken as-is.
+    current = expected_checksum(name) or file_fingerprint(model_path(name))
+    if current is not None and header.get("source_sha256") != current:
+        print(f"Model artifact {path} was exported from a different {header['source_file']}; ignoring it.")
+        return None
+    with span(f"model.load.{name}.artifact"):
+        # Only an export of the .pkl itself (not a surrogate) can fall back to it;
+        # rows with missing values always do, since the flat arrays cannot route NaN
+        exported = header.get("model") == name
+        source = (lambda: _final_estimator(load_model_file(name))) if with_source and exported else None
+        return load_artifact(path, header, source, (lambda: load_model_file(name)) if exported else None)
+
+def _final_estimator(model):
+    return model.steps[-1][1] if hasattr(model, "steps") else model
+
+# === LOAD TIME / RSS REPORT ===
+def _rss_mb():
+    # Private (anonymous) vs file-backed resident memory; file pages of a mmap are shareable
+    try:
+        with open("/proc/self/status") as f:
+            fields = dict(line.split(":", 1) for line in f)
+        return {k: int(fields[f"Rss{k.title()}"].split()[0]) / 1024 for k in ("anon", "file")}
+    except (OSError, KeyError):
+        import resource
+        return {"anon": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, "file": 0.0}
+
+def _measure(name, fmt):
+    # Runs in a fresh interpreter so every format starts from the same baseline
+    import pandas as pd
+
+    from v7_5_model_bootstrap import load_model_file
+    from v7_5_tree_compiler import LARGE_BATCH_ROWS, compile_model
+
+    X_frame, X_columns = _probe_input(name, frame=True), _probe_input(name)
+    # Probe rows tiled past LARGE_BATCH_ROWS, the size of a heatmap or step-breakdown batch
+    reps = 2 * LARGE_BATCH_ROWS // len(X_frame) + 1
+    big_frame, big_columns = (
+        pd.concat([X] * reps, ignore_index=True) if isinstance(X, pd.DataFrame)
+        else {k: np.tile(np.asarray(v), reps) for k, v in X.items()} if isinstance(X, dict)
+        else np.tile(X, (reps, 1))
+        for X in (X_frame, X_columns))
+    before = _rss_mb()
+    t0 = time.perf_counter()
+    if fmt.startswith("artifact"):
+        model = load_current_artifact(name, with_source=fmt == "artifact+source")
+    else:
+        model = load_model_file(name)
+        if fmt == "pkl+compile":
+            model = compile_model(model)
+    load_s = time.perf_counter() - t0
+    loaded = _rss_mb()
+    columns = getattr(model, "accepts_columns", False)
+    model.predict(X_columns if columns else X_frame)  # touches the pages a real predict needs
+    used = _rss_mb()
+    model.predict(big_columns if columns else big_frame)
+    used_big = _rss_mb()
+    return {"model": name, "format": fmt, "load_ms": round(load_s * 1e3, 2),
+            "anon_mb": round(loaded["anon"] - before["anon"], 2), "file_mb": round(loaded["file"] - before["file"], 2),
+            "anon_mb_after_predict": round(used["anon"] - before["anon"], 2),
+            "file_mb_after_predict": round(used["file"] - before["file"], 2),
+            "anon_mb_after_large": round(used_big["anon"] - before["anon"], 2),
+            "file_mb_after_large": round(used_big["file"] - before["file"], 2)}
+
+def load_report(names=("water", "revenue")):
+    rows = []
+    for name in names:
+        formats = ["pkl", "pkl+compile"] + (["artifact", "artifact+source"] if read_header(artifact_path(name)) else [])
+        for fmt in formats:
+            out = subprocess.run([sys.executable, "-W", "ignore", os.path.abspath(__file__), "_measure", name, fmt],
+                                 capture_output=True, text=True, check=True)
+            rows.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return rows
+
+# === CLI ===
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export models to memory-mappable artifacts; compare load cost.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_export = sub.add_parser("export", help="write <model>.fabm/ next to each .pkl")
+    p_export.add_argument("--models", nargs="+", default=["water", "revenue"])
+    p_report = sub.add_parser("report", help="load time and RSS for each format, each in a fresh process")
+    p_report.add_argument("--models", nargs="+", default=["water", "revenue"])
+    p_measure = sub.add_parser("_measure")
+    p_measure.add_argument("name")
+    p_measure.add_argument("fmt")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        for name in args.models:
+            header = export_artifact(name)
+            print(f"{header['source_file']} -> {artifact_path(name)} "
+                  f"({header['ensemble']['trees']} trees, {header['ensemble']['nodes']:,} nodes)")
+    elif args.command == "report":
+        from v7_5_tree_compiler import LARGE_BATCH_ROWS
+        print(f"{'model':8s} {'format':15s} {'load ms':>9s} {'anon MB':>8s} {'file MB':>8s} "
+              f"{'anon MB*':>9s} {'file MB*':>9s} {'anon MB**':>10s} {'file MB**':>10s}"
+              f"   (* after one predict, ** after one over {LARGE_BATCH_ROWS} rows)")
+        for r in load_report(args.models):
+            print(f"{r['model']:8s} {r['format']:15s} {r['load_ms']:9.1f} {r['anon_mb']:8.1f} {r['file_mb']:8.1f} "
+                  f"{r['anon_mb_after_predict']:9.1f} {r['file_mb_after_predict']:9.1f} "
+                  f"{r['anon_mb_after_large']:10.1f} {r['file_mb_after_large']:10.1f}")
+    else:
+        import warnings
+        warnings.filterwarnings("ignore")
+        print(json.dumps(_measure(args.name, args.fmt)))
+
+if __name__ == "__main__":
+    main()
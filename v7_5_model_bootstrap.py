@@ -0,0 +1,165 @@
+# === v7_5_model_bootstrap.py ===
+# Lazy, checksum-verified model acquisition. Nothing here runs at import:
+# the app calls ensure_model() the first time a model is actually needed.
+#
+#   FAB_MODEL_DIR           directory holding the .pkl files (default: this repo)
+#   FAB_OFFLINE=1           never touch the network; missing/bad files are errors
+#   FAB_WATER_MODEL_SHA256  pin the expected hash of the water model
+#
+# With no known hash (env var, model_checksums.json or the .sha256 sidecar
+# written after the first download) a file must at least pass a size and
+# pickle-header sanity check, which rejects truncated downloads and the
+# HTML error page gdown saves when Drive refuses the request.
+#
+#   python v7_5_model_bootstrap.py            -> fetch + verify, print cold-start timings
+#   python v7_5_model_bootstrap.py --offline  -> verify only
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+
+from v7_5_profiler import span
+
+MODEL_DIR = os.environ.get("FAB_MODEL_DIR", os.path.dirname(os.path.abspath(__file__)))
+OFFLINE = os.environ.get("FAB_OFFLINE", "0").lower() in ("1", "true", "yes")
+CHECKSUMS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "model_checksums.json")
+
+MODEL_URL = "https://drive.google.com/uc?export=download&id=1pZ_vFRfqx1mw1RpoMR_fanrrOvHHMDiN"
+MODELS = {
+    "water": {"filename": "v6_1_water_model_boosted.pkl", "url": MODEL_URL, "env": "FAB_WATER_MODEL_SHA256",
+              "min_bytes": 1_000_000},
+    "revenue": {"filename": "revenue_multiplier_model.pkl", "url": None, "env": "FAB_REVENUE_MODEL_SHA256",
+                "min_bytes": 100_000},
+}
+# Leading bytes of a raw pickle (protocol 2+) or of the compressors joblib.dump supports
+PICKLE_MAGIC = (b"\x80", b"\x78", b"\x1f\x8b", b"BZh", b"\xfd7zXZ", b"]\x00\x00", b"\x04\x22\x4d\x18")
+
+# Seconds spent per bootstrap stage in this process, e.g. {"water.verify": 0.41}
+BOOT_TIMINGS = {}
+
+class ModelUnavailableError(RuntimeError):
+    pass
+
+def model_path(name):
+    return os.path.join(MODEL_DIR, MODELS[name]["filename"])
+
+def sha256_file(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def expected_checksum(name):
+    # Env var beats the pinned manifest, which beats the sidecar written on first download
+    spec = MODELS[name]
+    if os.environ.get(spec["env"]):
+        return os.environ[spec["env"]].lower()
+    if os.path.exists(CHECKSUMS_FILE):
+        with open(CHECKSUMS_FILE) as f:
+            pinned = json.load(f).get(spec["filename"])
+        if pinned:
+            return pinned.lower()
+    sidecar = model_path(name) + ".sha256"
+    if os.path.exists(sidecar):
+        with open(sidecar) as f:
+            return f.read().split()[0].lower()
+    return None
+
+def _timed(key, fn, *args):
+    t0 = time.perf_counter()
+    try:
+        return fn(*args)
+    finally:
+        BOOT_TIMINGS[key] = round(time.perf_counter() - t0, 4)
+
+def looks_like_model(name, path):
+    # Fallback check when no hash is known: big enough and starts like a (joblib) pickle
+    if os.path.getsize(path) < MODELS[name]["min_bytes"]:
+        return False
+    with open(path, "rb") as f:
+        head = f.read(8)
+    return head.startswith(PICKLE_MAGIC)
+
+def _verify(name, path):
+    expected = expected_checksum(name)
+    actual = _timed(f"{name}.verify", sha256_file, path)
+    if expected is None:
+        return looks_like_model(name, path), actual
+    return actual == expected, actual
+
+def _download(name, path):
+    import gdown  # deferred: only needed when a model is actually missing
+
+    spec = MODELS[name]
+    if not spec["url"]:
+        raise ModelUnavailableError(f"{spec['filename']} is not in {MODEL_DIR} and has no download URL")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    # Download to a temp name and rename, so an interrupted fetch never looks like a model
+    tmp = path + ".part"
+    _timed(f"{name}.download", gdown.download, spec["url"], tmp, False)
+    if not os.path.exists(tmp):
+        raise ModelUnavailableError(f"Download of {spec['filename']} failed")
+    os.replace(tmp, path)
+
+def ensure_model(name, offline=None):
+    offline = OFFLINE if offline is None else offline
+    path = model_path(name)
+    filename = MODELS[name]["filename"]
+
+    if os.path.exists(path):
+        ok, actual = _verify(name, path)
+        if ok:
+            return path
+        if offline:
+            raise ModelUnavailableError(f"{filename} failed verification (sha256 {actual})")
+        print(f"{filename} failed verification; downloading a fresh copy.")
+    elif offline:
+        raise ModelUnavailableError(f"{filename} not found in {MODEL_DIR} and offline mode is on")
+
+    _download(name, path)
+    ok, actual = _verify(name, path)
+    if not ok:
+        raise ModelUnavailableError(f"Downloaded {filename} failed verification (sha256 {actual})")
+    if expected_checksum(name) is None:
+        # No pinned hash: record this one so later starts detect truncation or corruption
+        with open(path + ".sha256", "w") as f:
+            f.write(f"{actual}  {filename}\n")
+    return path
+
+def load_model_file(name, offline=None):
+    import joblib  # deferred: pulls in the pickled object's sklearn modules
+
+    path = ensure_model(name, offline)
+    with span(f"model.load.{name}"):
+        return _timed(f"{name}.load", joblib.load, path)
+
+# === COLD START REPORT ===
+def measure_cold_start(offline=None):
+    t0 = time.perf_counter()
+    for module in ("numpy", "pandas", "sklearn", "plotly.graph_objects", "streamlit"):
+        already = module in sys.modules
+        _timed(f"import.{module}", __import__, module)
+        if already:
+            BOOT_TIMINGS[f"import.{module}"] = 0.0
+    for name in MODELS:
+        load_model_file(name, offline)
+    BOOT_TIMINGS["total"] = round(time.perf_counter() - t0, 4)
+    return dict(BOOT_TIMINGS)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fetch and verify simulator models; report cold-start timings.")
+    parser.add_argument("--offline", action="store_true", help="verify local files only")
+    args = parser.parse_args(argv)
+    try:
+        print(json.dumps(measure_cold_start(offline=args.offline or None), indent=2))
+    except ModelUnavailableError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
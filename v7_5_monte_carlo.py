@@ -0,0 +1,130 @@
+# === v7_5_monte_carlo.py ===
+# Monte Carlo uncertainty for the ROI and water-savings forecasts.
+#
+# The economic constants in calculate_roi_v4 and the market-share curves are
+# sampled from configurable distributions; everything is evaluated as
+# (draws × years) array operations. Model predictions do not depend on any
+# sampled parameter, so they are computed once per year (through the
+# scenario cache) and broadcast across all draws.
+
+import time
+
+import numpy as np
+
+from v7_5_sim_core import (
+    ROI_WEIGHTS,
+    WAFER_DATA,
+    WATER_PER_WAFER_BY_SIZE,
+    WATER_PRICE_PER_GAL,
+    cached_horizon,
+)
+
+YEARS = np.arange(2025, 2076)
+QUANTILES = (5, 50, 95)
+
+# name -> (distribution, *params). Price, volume and ROI weight are relative
+# factors on the size/intention-specific constants; the rest are absolute.
+DEFAULT_DISTRIBUTIONS = {
+    "water_price": ("triangular", 0.003, WATER_PRICE_PER_GAL, 0.006),   # $/gal
+    "price_factor": ("normal", 1.0, 0.10),
+    "volume_factor": ("normal", 1.0, 0.10),
+    "roi_weight_factor": ("triangular", 0.9, 1.0, 1.1),
+    "year_penalty": ("uniform", 0.0005, 0.0015),                       # per year after 2025
+    "share_200_phaseout_years": ("uniform", 15.0, 25.0),               # 200mm: 100% -> 0% from 2025
+    "share_450_start": ("uniform", 2030.0, 2040.0),                    # 450mm ramp start
+    "share_450_ramp_years": ("uniform", 15.0, 25.0),                   # 450mm: 0% -> 100%
+}
+# Point estimates matching calculate_roi_v4, for reference and for "fixed" runs
+BASELINE_PARAMETERS = {
+    "water_price": WATER_PRICE_PER_GAL, "price_factor": 1.0, "volume_factor": 1.0,
+    "roi_weight_factor": 1.0, "year_penalty": 0.001, "share_200_phaseout_years": 20.0,
+    "share_450_start": 2035.0, "share_450_ramp_years": 20.0,
+}
+
+# === SAMPLING ===
+def _sample(rng, spec, n):
+    kind, *params = spec
+    if kind == "fixed":
+        return np.full(n, float(params[0]))
+    if kind == "normal":
+        return rng.normal(params[0], params[1], n)
+    if kind == "lognormal":
+        return rng.lognormal(params[0], params[1], n)
+    if kind == "uniform":
+        return rng.uniform(params[0], params[1], n)
+    if kind == "triangular":
+        return rng.triangular(params[0], params[1], params[2], n)
+    raise ValueError(f"Unknown distribution {kind!r}")
+
+def parameter_streams(seed, distributions):
+    # One generator per parameter: results do not depend on the chunk size
+    return {name: np.random.default_rng([seed, i]) for i, name in enumerate(sorted(distributions))}
+
+# === VECTORIZED EVALUATION ===
+def market_share_draws(wafer_size_mm, years, p):
+    # Same linear curves as get_market_share_split, with sampled breakpoints
+    share_200 = np.maximum(0.0, 1 - (years - 2025) / p["share_200_phaseout_years"])
+    share_450 = np.clip((years - p["share_450_start"]) / p["share_450_ramp_years"], 0.0, 1.0)
+    if wafer_size_mm == 200:
+        return share_200
+    if wafer_size_mm == 450:
+        return share_450
+    if wafer_size_mm == 300:
+        return np.maximum(0.0, 1.0 - share_200 - share_450)
+    return np.ones_like(share_200)
+
+def evaluate_draws(wafer_intention, wafer_size_mm, rec, mon, zld, years, multiplier, raw_eff, p):
+    # calculate_roi_v4 with every constant replaced by an array. All arguments
+    # broadcast: (draws, 1) parameters × (1, years) predictions here, flat
+    # per-row arrays in the sensitivity analysis.
+    base = WAFER_DATA[wafer_size_mm]
+    volume = base["volume"] * p["volume_factor"]
+    price = base["price"] * p["price_factor"]
+    roi_weight = ROI_WEIGHTS.get(wafer_intention, 1.0) * p["roi_weight_factor"]
+    market_share = market_share_draws(wafer_size_mm, years, p)
+
+    base_revenue = volume * price * roi_weight * market_share
+    base_revenue = np.where(multiplier != 0, base_revenue * multiplier, base_revenue)
+    cost = np.asarray(rec + mon + zld, dtype=float) * 10000
+    profit = base_revenue - cost
+
+    # Optional per-row baseline (fleet overrides); otherwise the size default
+    baseline = p["baseline_water"] if "baseline_water" in p else WATER_PER_WAFER_BY_SIZE.get(wafer_size_mm, 3600)
+    eff = raw_eff * (1 + p["year_penalty"] * (years - 2025))
+    eff = np.clip(eff, baseline * 0.1, baseline)
+    # Annual wafer output equals the sampled volume (the two tables share values)
+    gal_saved = (baseline - eff) * volume * market_share
+    dollar_saved = gal_saved * p["water_price"]
+    dollar_saved, cost = np.broadcast_arrays(dollar_saved, cost)
+    roi = np.divide(dollar_saved, cost, out=np.zeros(cost.shape), where=cost != 0) * 100
+    return {"roi": roi, "efficiency": eff, "gal_saved": gal_saved, "profit": profit, "dollar_saved": dollar_saved,
+            "revenue": base_revenue}
+
+# === DRIVER ===
+def run_monte_carlo(wafer_intention, wafer_size_mm, rec, mon, zld, years=YEARS, n_draws=10_000, seed=0,
+                    distributions=None, metrics=("roi", "gal_saved"), quantiles=QUANTILES, chunk_draws=10_000,
+                    strategy="Maintain"):
+    started = time.perf_counter()
+    years = np.asarray(years)
+    distributions = {**DEFAULT_DISTRIBUTIONS, **(distributions or {})}
+
+    horizon = cached_horizon(wafer_intention, wafer_size_mm, rec, mon, zld, years, strategy=strategy)
+    multiplier = np.asarray(horizon["multiplier"], dtype=float)[None, :]
+    raw_eff = np.asarray(horizon["raw_efficiency"], dtype=float)[None, :]
+
+    # Only the reported metrics are kept, as float32: 100k draws × 51 years ≈ 20 MB per metric
+    draws = {m: np.empty((n_draws, len(years)), dtype=np.float32) for m in metrics}
+    streams = parameter_streams(seed, distributions)
+    for d0 in range(0, n_draws, chunk_draws):
+        n = min(chunk_draws, n_draws - d0)
+        p = {name: _sample(streams[name], distributions[name], n)[:, None] for name in distributions}
+        out = evaluate_draws(wafer_intention, wafer_size_mm, rec, mon, zld, years[None, :], multiplier, raw_eff, p)
+        for m in metrics:
+            draws[m][d0:d0 + n] = out[m]
+
+    summary = {"years": years, "quantiles": tuple(quantiles), "n_draws": n_draws, "seed": seed}
+    for m in metrics:
+        summary[m] = np.percentile(draws[m], quantiles, axis=0)
+        summary[f"{m}_mean"] = draws[m].mean(axis=0, dtype=np.float64)
+    summary["seconds"] = round(time.perf_counter() - started, 3)
+    return summary
@@ -0,0 +1,94 @@
+# === v7_5_optimizer.py ===
+# Budget-constrained investment optimizer. Enumerates every Reclamation /
+# Monitoring / ZLD allocation on the slider grid that fits the budget,
+# evaluates them all for the target year in one batched horizon call and
+# returns the Pareto-optimal set over ROI, gallons saved and profit.
+
+import time
+
+import numpy as np
+
+from v7_5_sim_core import simulate_horizon
+
+OBJECTIVES = ["roi", "gal_saved", "profit"]
+
+# === ALLOCATION GRID ===
+def budget_allocations(budget, step=10.0, max_per_tech=500.0, spend_all=True):
+    levels = np.arange(0.0, max_per_tech + step / 2, step)
+    rec, mon, zld = (g.ravel() for g in np.meshgrid(levels, levels, levels, indexing="ij"))
+    total = rec + mon + zld
+    # Tolerance keeps float grid sums (e.g. 0.1 steps) from missing the budget
+    keep = np.abs(total - budget) < step / 2 if spend_all else total <= budget + step / 2
+    return rec[keep], mon[keep], zld[keep]
+
+# === PARETO FRONTIER ===
+def _anchor_prune(points, n_anchors=64):
+    # Cheap vectorized pass: drop anything dominated by a few strong anchor
+    # points (top rows per objective and per random weighting) before the
+    # exact sweep. Never drops a Pareto-optimal point.
+    n, k = points.shape
+    if n <= n_anchors:
+        return np.arange(n)
+    span = points.max(axis=0) - points.min(axis=0)
+    scaled = (points - points.min(axis=0)) / np.where(span > 0, span, 1)
+    rng = np.random.default_rng(0)
+    weights = np.vstack([np.eye(k), rng.dirichlet(np.ones(k), n_anchors - k)])
+    anchors = np.unique(np.argmax(scaled @ weights.T, axis=0))
+    A = points[anchors]
+    ge = (A[:, None, :] >= points[None, :, :]).all(axis=2)
+    gt = (A[:, None, :] > points[None, :, :]).any(axis=2)
+    dominated = (ge & gt).any(axis=0)
+    return np.flatnonzero(~dominated)
+
+def pareto_front(points):
+    # Indices of non-dominated rows of `points` (all objectives maximized)
+    points = np.asarray(points, dtype=float)
+    if len(points) == 0:
+        return np.array([], dtype=int)
+    candidates = _anchor_prune(points)
+    pts = points[candidates]
+    # Sort lexicographically descending; a row can only be dominated by rows before it
+    order = np.lexsort(tuple(-pts[:, j] for j in reversed(range(pts.shape[1]))))
+    kept = []
+    front = np.empty((0, pts.shape[1]))
+    for i in order:
+        p = pts[i]
+        if len(front) and ((front >= p).all(axis=1) & (front > p).any(axis=1)).any():
+            continue
+        if len(front) and (front == p).all(axis=1).any():
+            continue  # exact duplicate of a kept point
+        kept.append(candidates[i])
+        front = np.vstack([front, p])
+    return np.sort(np.asarray(kept, dtype=int))
+
+# === OPTIMIZER ===
+def optimize_budget(wafer_intention, wafer_size_mm, target_year, budget,
+                    step=10.0, max_per_tech=500.0, spend_all=True, strategy="Maintain"):
+    import pandas as pd
+
+    started = time.perf_counter()
+    rec, mon, zld = budget_allocations(budget, step, max_per_tech, spend_all)
+    if len(rec) == 0:
+        return pd.DataFrame(columns=["rec", "mon", "zld"] + OBJECTIVES), {"evaluated": 0, "pareto": 0, "seconds": 0.0}
+
+    result = simulate_horizon(wafer_intention, wafer_size_mm, rec, mon, zld, target_year, strategy=strategy)
+    evaluated_at = time.perf_counter()
+
+    points = np.column_stack([result[m] for m in OBJECTIVES])
+    front = pareto_front(points)
+    frame = pd.DataFrame({
+        "rec": rec[front], "mon": mon[front], "zld": zld[front],
+        "roi": result["roi"][front],
+        "gal_saved": result["gal_saved"][front],
+        "profit": result["profit"][front],
+        "revenue": result["revenue"][front],
+        "efficiency": result["efficiency"][front],
+    }).sort_values("roi", ascending=False, ignore_index=True)
+
+    stats = {
+        "evaluated": int(len(rec)),
+        "pareto": int(len(front)),
+        "eval_seconds": round(evaluated_at - started, 3),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+    return frame, stats
@@ -0,0 +1,226 @@
+# === v7_5_persistent_cache.py ===
+# Optional on-disk tier behind the in-process scenario cache, shared by every
+# Streamlit replica on a host and kept across restarts.
+#
+#   FAB_SCENARIO_DB=/var/cache/fab/scenarios.sqlite   enable (off by default)
+#   FAB_SCENARIO_DB_MB=512                             size budget; least recently used rows go first
+#
+#   python v7_5_persistent_cache.py stats|purge|clear [--db path]
+#
+# Rows are content-addressed by the SHA-256 of the cache key. Keys already
+# carry the SHA-256 of both model files, so a changed .pkl never reads an old
+# row; rows from other model versions are also deleted the first time a
+# process sees the new models. Values are the result arrays in .npz form
+# (no pickle). SQLite in WAL mode handles concurrent readers and writers
+# across processes; a busy or broken database only ever costs a recompute.
+
+import argparse
+import hashlib
+import io
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+DEFAULT_MAX_MB = float(os.environ.get("FAB_SCENARIO_DB_MB", "512"))
+BUSY_TIMEOUT_S = 5.0
+TOUCH_INTERVAL_S = 60.0  # a hit refreshes its LRU timestamp at most this often
+EVICT_TO = 0.9  # eviction trims the database to this share of the budget
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scenarios (
+    digest   TEXT PRIMARY KEY,
+    models   TEXT NOT NULL,
+    value    BLOB NOT NULL,
+    size     INTEGER NOT NULL,
+    created  REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scenarios_accessed ON scenarios (accessed);
+"""
+
+
+def current_model_version():
+    # "<water sha>:<revenue sha>", or None while a model file is still missing
+    from v7_5_model_bootstrap import model_path
+    from v7_5_scenario_cache import file_fingerprint
+
+    digests = [file_fingerprint(model_path(name)) for name in ("water", "revenue")]
+    return None if None in digests else ":".join(digests)
+
+def key_digest(key):
+    # Keys are tuples of str / int / float, whose repr is stable across processes
+    return hashlib.sha256(repr(key).encode()).hexdigest()
+
+def encode(value):
+    buf = io.BytesIO()
+    np.savez(buf, **{name: np.asarray(v) for name, v in value.items()})
+    return buf.getvalue()
+
+def decode(blob):
+    with np.load(io.BytesIO(blob), allow_pickle=False) as data:
+        return {name: data[name] for name in data.files}
+
+
+class PersistentScenarioCache:
+    def __init__(self, path, max_mb=DEFAULT_MAX_MB, model_version=current_model_version):
+        self.path = path
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.model_version = model_version
+        self._local = threading.local()  # sqlite3 connections are per thread
+        self._lock = threading.Lock()
+        self._purged_for = None
+        self.counters = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0, "purged": 0, "errors": 0}
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_S, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def _models(self):
+        # Current model version; the first time it is seen, drop rows of any other
+        models = self.model_version()
+        if models is not None and models != self._purged_for:
+            self._purged_for = models
+            cur = self._connect().execute("DELETE FROM scenarios WHERE models != ?", (models,))
+            self._count("purged", cur.rowcount)
+        return models
+
+    # --- cache interface ---
+    def get(self, key):
+        try:
+            models = self._models()
+            if models is None:
+                return None
+            conn = self._connect()
+            digest = key_digest(key)
+            row = conn.execute("SELECT value, accessed FROM scenarios WHERE digest = ? AND models = ?",
+                               (digest, models)).fetchone()
+            if row is None:
+                self._count("misses")
+                return None
+            now = time.time()
+            if now - row[1] > TOUCH_INTERVAL_S:
+                conn.execute("UPDATE scenarios SET accessed = ? WHERE digest = ?", (now, digest))
+            value = decode(row[0])
+        except (sqlite3.Error, OSError, ValueError) as e:
+            self._error(e)
+            return None
+        self._count("hits")
+        return value
+
+    def contains(self, key):
+        try:
+            models = self._models()
+            if models is None:
+                return False
+            row = self._connect().execute("SELECT 1 FROM scenarios WHERE digest = ? AND models = ?",
+                                          (key_digest(key), models)).fetchone()
+            return row is not None
+        except sqlite3.Error as e:
+            self._error(e)
+            return False
+
+    def put(self, key, value):
+        try:
+            models = self._models()
+            if models is None:
+                return
+            blob = encode(value)
+            now = time.time()
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("INSERT OR REPLACE INTO scenarios VALUES (?, ?, ?, ?, ?, ?)",
+                             (key_digest(key), models, blob, len(blob), now, now))
+                evicted = self._evict(conn)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        except (sqlite3.Error, OSError) as e:
+            self._error(e)
+            return
+        self._count("writes")
+        self._count("evictions", evicted)
+
+    def _evict(self, conn):
+        # Least recently used rows until the total is back under EVICT_TO of the budget
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM scenarios").fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+        excess, evicted = total - int(self.max_bytes * EVICT_TO), 0
+        for digest, size in conn.execute("SELECT digest, size FROM scenarios ORDER BY accessed").fetchall():
+            if excess <= 0:
+                break
+            conn.execute("DELETE FROM scenarios WHERE digest = ?", (digest,))
+            excess -= size
+            evicted += 1
+        return evicted
+
+    def _error(self, e):
+        self._count("errors")
+        if self.counters["errors"] == 1:
+            print(f"Persistent scenario cache {self.path} unavailable ({e}); continuing without it.")
+
+    # --- maintenance ---
+    def clear(self):
+        self._connect().execute("DELETE FROM scenarios")
+
+    def stats(self):
+        with self._lock:
+            c = dict(self.counters)
+        try:
+            rows, size = self._connect().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM scenarios").fetchone()
+        except sqlite3.Error:
+            rows, size = None, None
+        lookups = c["hits"] + c["misses"]
+        return {"path": self.path, "rows": rows, "mb": None if size is None else round(size / 1024 / 1024, 2),
+                "max_mb": round(self.max_bytes / 1024 / 1024, 2), **c,
+                "hit_rate": c["hits"] / lookups if lookups else 0.0}
+
+def open_persistent_cache(path=None, max_mb=DEFAULT_MAX_MB):
+    path = path or os.environ.get("FAB_SCENARIO_DB")
+    if not path:
+        return None
+    try:
+        return PersistentScenarioCache(path, max_mb)
+    except (sqlite3.Error, OSError) as e:
+        print(f"Persistent scenario cache {path} could not be opened ({e}); using the in-process cache only.")
+        return None
+
+# === CLI ===
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or reset the persistent scenario cache.")
+    parser.add_argument("command", choices=["stats", "purge", "clear"],
+                        help="purge drops rows from other model versions; clear drops every row")
+    parser.add_argument("--db", default=os.environ.get("FAB_SCENARIO_DB"),
+                        help="database file (default $FAB_SCENARIO_DB)")
+    args = parser.parse_args(argv)
+    if not args.db:
+        parser.error("no database: pass --db or set FAB_SCENARIO_DB")
+
+    cache = PersistentScenarioCache(args.db)
+    if args.command == "purge":
+        cache._models()
+    elif args.command == "clear":
+        cache.clear()
+    for name, value in cache.stats().items():
+        print(f"{name:10s} {value}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+# === v7_5_prefetch.py ===
+# Speculative prefetch of the slider positions next to the current one.
+#
+#   FAB_PREFETCH=1                 enable (off by default)
+#   FAB_PREFETCH_WORKERS=1         background threads shared by all sessions
+#   FAB_PREFETCH_CPU_BUDGET=0.5    max share of one core the workers may use
+#   FAB_PREFETCH_RADIUS=50         prefetch ±10 … ±RADIUS around the touched slider
+#
+# After each render the app reports its inputs. The slider that moved gets
+# its neighbours evaluated in small batches (simulate_scenarios) and put into
+# the scenario cache, nearest first. A newer render from the same session
+# cancels whatever is still queued for the old position. Moving the snapshot
+# year needs nothing: the cached horizon already covers every year.
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from v7_5_scenario_cache import SCENARIO_CACHE, SLIDER_STEP
+
+SLIDERS = ("rec", "mon", "zld")
+SLIDER_MAX = 500.0
+BATCH_SCENARIOS = 4  # scenarios per background task: one stacked predict each
+TRACKED_KEYS = 4096  # prefetched keys remembered for the hit rate
+
+
+class PrefetchSession:
+    # Per browser session: bumping the generation cancels its queued work
+    def __init__(self):
+        self.generation = 0
+        self.last_inputs = None
+        self.futures = []
+
+
+class Prefetcher:
+    def __init__(self, enabled=False, workers=1, cpu_budget=0.5, radius=50.0, years=None):
+        self.enabled = enabled
+        self.cpu_budget = min(max(cpu_budget, 0.05), 1.0)
+        self.radius = radius
+        self.years = np.arange(2025, 2076) if years is None else np.asarray(years)
+        self.workers = max(1, int(workers))
+        self._pool = None
+        self._lock = threading.Lock()
+        self._prefetched = OrderedDict()  # cache keys filled by the prefetcher and not yet rendered
+        self.counters = {"scheduled": 0, "computed": 0, "cancelled": 0, "already_cached": 0,
+                         "renders": 0, "hits": 0, "cpu_seconds": 0.0, "throttle_seconds": 0.0}
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="prefetch")
+            return self._pool
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    # --- scheduling ---
+    def candidates(self, inputs, touched):
+        # Neighbour positions of the touched sliders, nearest first, alternating sides
+        out = []
+        offsets = np.arange(SLIDER_STEP, self.radius + SLIDER_STEP / 2, SLIDER_STEP)
+        for offset in offsets:
+            for slider in touched:
+                for sign in (1, -1):
+                    value = inputs[slider] + sign * offset
+                    if 0.0 <= value <= SLIDER_MAX:
+                        candidate = {**inputs, slider: float(value)}
+                        if candidate not in out:
+                            out.append(candidate)
+        return out
+
+    def after_render(self, session, inputs):
+        # inputs: wafer_intention, wafer_size_mm, rec, mon, zld, strategy of the render that just finished
+        if not self.enabled:
+            return
+        from v7_5_sim_core import load_surface_store
+
+        previous, session.last_inputs = session.last_inputs, dict(inputs)
+        if previous == inputs:
+            return  # another widget (year, expanders) reran the script; keep prefetching
+        self._record_render(inputs)
+        if previous is None or any(previous.get(k) != inputs.get(k) for k in ("wafer_intention", "wafer_size_mm", "strategy")):
+            touched = SLIDERS
+        else:
+            touched = tuple(s for s in SLIDERS if previous[s] != inputs[s])
+
+        session.generation += 1
+        for future in session.futures:
+            if future.cancel():
+                self._count("cancelled", future.n_scenarios)
+        session.futures = []
+        if inputs.get("strategy", "Maintain") == "Maintain" and load_surface_store() is not None:
+            return  # every grid point is already precomputed
+
+        todo = []
+        for candidate in self.candidates(inputs, touched):
+            key = self._key(candidate)
+            if key is None or SCENARIO_CACHE.contains(key):
+                self._count("already_cached")
+            else:
+                todo.append(candidate)
+        pool = self._executor()
+        for i in range(0, len(todo), BATCH_SCENARIOS):
+            chunk = todo[i:i + BATCH_SCENARIOS]
+            future = pool.submit(self._run, session, session.generation, chunk)
+            future.n_scenarios = len(chunk)
+            session.futures.append(future)
+            self._count("scheduled", len(chunk))
+
+    def _key(self, sc):
+        from v7_5_sim_core import scenario_key
+        return scenario_key(sc["wafer_intention"], sc["wafer_size_mm"], sc["rec"], sc["mon"], sc["zld"],
+                            self.years, sc["wafer_size_mm"] / 300, sc.get("strategy", "Maintain"))
+
+    # --- background work ---
+    def _run(self, session, generation, chunk):
+        from v7_5_scenario_cache import freeze
+        from v7_5_sim_core import simulate_scenarios
+
+        if session.generation != generation:
+            self._count("cancelled", len(chunk))
+            return
+        chunk = [sc for sc in chunk if not SCENARIO_CACHE.contains(self._key(sc))]  # the user may have got there
+        if not chunk:
+            return
+        cpu0 = time.thread_time()
+        results = simulate_scenarios(chunk, self.years)
+        for sc, result in zip(chunk, results):
+            key = self._key(sc)
+            SCENARIO_CACHE.put(key, freeze(result))
+            with self._lock:
+                self._prefetched[key] = None
+                while len(self._prefetched) > TRACKED_KEYS:
+                    self._prefetched.popitem(last=False)
+        cpu = time.thread_time() - cpu0
+        self._count("computed", len(chunk))
+        self._count("cpu_seconds", cpu)
+        # CPU budget: idle long enough that this worker averages at most cpu_budget of a core
+        pause = cpu * (1 - self.cpu_budget) / self.cpu_budget
+        if pause > 0:
+            self._count("throttle_seconds", pause)
+            time.sleep(pause)
+
+    # --- hit rate ---
+    def _record_render(self, inputs):
+        key = self._key(inputs)
+        with self._lock:
+            self.counters["renders"] += 1
+            if self._prefetched.pop(key, False) is None:
+                self.counters["hits"] += 1
+
+    def stats(self):
+        with self._lock:
+            c = dict(self.counters)
+            c["pending_keys"] = len(self._prefetched)
+        c["hit_rate"] = c["hits"] / c["renders"] if c["renders"] else 0.0
+        c["cpu_seconds"] = round(c["cpu_seconds"], 3)
+        c["throttle_seconds"] = round(c["throttle_seconds"], 3)
+        return c
+
+
+PREFETCHER = Prefetcher(
+    enabled=os.environ.get("FAB_PREFETCH", "0").lower() in ("1", "true", "yes"),
+    workers=int(os.environ.get("FAB_PREFETCH_WORKERS", "1")),
+    cpu_budget=float(os.environ.get("FAB_PREFETCH_CPU_BUDGET", "0.5")),
+    radius=float(os.environ.get("FAB_PREFETCH_RADIUS", "50")),
+)
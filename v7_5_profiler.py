@@ -0,0 +1,152 @@
+# === v7_5_profiler.py ===
+# Lightweight timing spans for the dashboard's hot paths.
+#
+#   FAB_PROFILE=1                  record spans (off by default)
+#   FAB_PROFILE_JSONL=runs.jsonl   append one JSON line per rerun
+#   FAB_PROFILE_PROM=metrics.prom  rewrite a Prometheus text file after each rerun
+#   FAB_PROFILE_WINDOW=500         samples kept per span for the rolling p50/p95
+#
+# Usage:  with span("predict.water"): ...
+# When disabled, span() returns a shared no-op context manager, so an
+# instrumented call costs one attribute check.
+
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+
+def _env_flag(name):
+    return os.environ.get(name, "0").lower() in ("1", "true", "yes")
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("profiler", "name", "started")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class Profiler:
+    def __init__(self, enabled=False, window=500, jsonl_path=None, prom_path=None):
+        self.enabled = enabled
+        self.window = window
+        self.jsonl_path = jsonl_path
+        self.prom_path = prom_path
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._samples = {}  # span name -> deque of recent durations (all sessions)
+        self._totals = {}   # span name -> [count, sum] since start
+        self._local = threading.local()  # current rerun, per script thread
+
+    # --- recording ---
+    def span(self, name):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def record(self, name, seconds):
+        run = getattr(self._local, "run", None)
+        if run is not None:
+            entry = run["spans"].setdefault(name, [0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+        with self._lock:
+            if name not in self._samples:
+                self._samples[name] = deque(maxlen=self.window)
+                self._totals[name] = [0, 0.0]
+            self._samples[name].append(seconds)
+            self._totals[name][0] += 1
+            self._totals[name][1] += seconds
+
+    # --- reruns ---
+    def begin_run(self):
+        if not self.enabled:
+            return
+        self._local.run = {"started": time.time(), "t0": time.perf_counter(), "spans": {}}
+
+    def end_run(self):
+        run = getattr(self._local, "run", None)
+        if not self.enabled or run is None:
+            return None
+        self._local.run = None
+        seconds = time.perf_counter() - run["t0"]
+        self.record("rerun", seconds)
+        result = {
+            "timestamp": round(run["started"], 3),
+            "seconds": round(seconds, 6),
+            "spans": {name: {"count": c, "seconds": round(s, 6)} for name, (c, s) in run["spans"].items()},
+        }
+        with self._io_lock:
+            if self.jsonl_path:
+                with open(self.jsonl_path, "a") as f:
+                    f.write(json.dumps(result) + "\n")
+            if self.prom_path:
+                self.write_prometheus(self.prom_path)
+        return result
+
+    # --- aggregates and export ---
+    def summary(self):
+        with self._lock:
+            snapshot = {name: (np.fromiter(d, float), self._totals[name]) for name, d in self._samples.items()}
+        rows = {}
+        for name, (window, (count, total)) in sorted(snapshot.items()):
+            p50, p95 = np.percentile(window, [50, 95]) if len(window) else (0.0, 0.0)
+            rows[name] = {"count": count, "total_s": total, "p50_ms": p50 * 1e3, "p95_ms": p95 * 1e3}
+        return rows
+
+    def prometheus_text(self):
+        lines = [
+            "# HELP fab_span_seconds Duration of instrumented simulator stages.",
+            "# TYPE fab_span_seconds summary",
+        ]
+        for name, row in self.summary().items():
+            label = name.replace("\\", "\\\\").replace('"', '\\"')
+            lines.append(f'fab_span_seconds{{span="{label}",quantile="0.5"}} {row["p50_ms"] / 1e3:.9f}')
+            lines.append(f'fab_span_seconds{{span="{label}",quantile="0.95"}} {row["p95_ms"] / 1e3:.9f}')
+            lines.append(f'fab_span_seconds_sum{{span="{label}"}} {row["total_s"]:.9f}')
+            lines.append(f'fab_span_seconds_count{{span="{label}"}} {row["count"]}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        # Write-then-rename so a scraper never reads a half-written file
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp, path)
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._totals.clear()
+
+
+PROFILER = Profiler(
+    enabled=_env_flag("FAB_PROFILE"),
+    window=int(os.environ.get("FAB_PROFILE_WINDOW", "500")),
+    jsonl_path=os.environ.get("FAB_PROFILE_JSONL") or None,
+    prom_path=os.environ.get("FAB_PROFILE_PROM") or None,
+)
+span = PROFILER.span
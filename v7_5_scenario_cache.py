@@ -0,0 +1,137 @@
+# === v7_5_scenario_cache.py ===
+# Process-wide LRU cache for scenario results. Lives at module level so every
+# Streamlit session served by this process shares the same entries. With
+# FAB_SCENARIO_DB set, misses fall through to a SQLite file shared by every
+# process on the host (v7_5_persistent_cache).
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from v7_5_persistent_cache import open_persistent_cache
+
+DEFAULT_MAX_SIZE = int(os.environ.get("FAB_SCENARIO_CACHE_SIZE", "256"))
+SLIDER_STEP = 10.0
+
+# === MODEL FINGERPRINTS ===
+_fingerprints = {}
+_fingerprint_lock = threading.Lock()
+
+def file_fingerprint(path):
+    # Hash is recomputed only when the file's size or mtime changes
+    try:
+        info = os.stat(path)
+    except FileNotFoundError:
+        return None
+    stamp = (info.st_size, info.st_mtime_ns)
+    with _fingerprint_lock:
+        cached = _fingerprints.get(path)
+        if cached and cached[0] == stamp:
+            return cached[1]
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    digest = h.hexdigest()
+    with _fingerprint_lock:
+        _fingerprints[path] = (stamp, digest)
+    return digest
+
+# === QUANTIZATION ===
+def quantize(value, step=SLIDER_STEP):
+    # Snap to the slider grid; None when the value is not on the grid
+    q = round(float(value) / step) * step
+    if abs(q - float(value)) > 1e-9:
+        return None
+    return q
+
+# === LRU CACHE ===
+class ScenarioCache:
+    def __init__(self, max_size=DEFAULT_MAX_SIZE, persistent=None):
+        self.max_size = max(0, int(max_size))
+        self.persistent = persistent
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        if self.persistent is None:
+            return None
+        value = self.persistent.get(key)
+        if value is not None:
+            value = freeze(value)
+            self.put(key, value, persist=False)
+        return value
+
+    def contains(self, key):
+        # Membership test that leaves the hit/miss counters and LRU order alone
+        with self._lock:
+            if key in self._entries:
+                return True
+        return self.persistent is not None and self.persistent.contains(key)
+
+    def put(self, key, value, persist=True):
+        # persist=False keeps the entry in this process only (previews, rows read from disk)
+        if persist and self.persistent is not None:
+            self.persistent.put(key, value)
+        if self.max_size == 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute, persist=True):
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value, persist)
+        return value
+
+    def resize(self, max_size):
+        with self._lock:
+            self.max_size = max(0, int(max_size))
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+        if self.persistent is not None:
+            stats["persistent"] = self.persistent.stats()
+        return stats
+
+SCENARIO_CACHE = ScenarioCache(persistent=open_persistent_cache())
+
+def freeze(result):
+    # Cached arrays are shared between sessions, so make them read-only
+    for value in result.values():
+        if isinstance(value, np.ndarray):
+            value.flags.writeable = False
+    return result
@@ -0,0 +1,181 @@
+# === v7_5_sensitivity.py ===
+# Global sensitivity of ROI and the composite score to the scenario inputs
+# and to the economic constants behind calculate_roi_v4.
+#
+#   tornado_analysis: one-at-a-time low/high swings around a baseline scenario
+#   sobol_analysis:   variance-based first-order and total Sobol indices
+#                     (Saltelli sampling, Jansen total-effect estimator)
+#
+# Both build their full design matrix up front and evaluate it in one pass:
+# rows are grouped by (intention, size), each group is a single batched
+# simulate_horizon call, and the sampled economic constants are applied
+# row-wise with the Monte Carlo evaluator.
+
+import time
+
+import numpy as np
+
+from v7_5_monte_carlo import BASELINE_PARAMETERS, DEFAULT_DISTRIBUTIONS, evaluate_draws
+from v7_5_sim_core import ROI_WEIGHTS, WAFER_DATA, simulate_horizon
+
+METRICS = ["roi", "composite", "gal_saved", "profit"]
+INTENTIONS = list(ROI_WEIGHTS)
+SIZES = list(WAFER_DATA)
+
+def _bounds(spec):
+    # Range used for the sensitivity sweep: full support, or mean ± 2 sd for normals
+    kind, *params = spec
+    if kind == "normal":
+        return params[0] - 2 * params[1], params[0] + 2 * params[1]
+    if kind == "lognormal":
+        return float(np.exp(params[0] - 2 * params[1])), float(np.exp(params[0] + 2 * params[1]))
+    if kind == "triangular":
+        return params[0], params[2]
+    if kind == "fixed":
+        return params[0], params[0]
+    return params[0], params[1]
+
+# name -> ("continuous" | "integer", low, high) or ("categorical", levels)
+FACTORS = {
+    "rec": ("continuous", 0.0, 500.0),
+    "mon": ("continuous", 0.0, 500.0),
+    "zld": ("continuous", 0.0, 500.0),
+    "year": ("integer", 2025, 2075),
+    "wafer_size_mm": ("categorical", SIZES),
+    "wafer_intention": ("categorical", INTENTIONS),
+    **{name: ("continuous", *_bounds(spec)) for name, spec in DEFAULT_DISTRIBUTIONS.items()},
+}
+
+# === DESIGN EVALUATION ===
+def _from_unit(name, u):
+    # Map U[0, 1) samples onto a factor's range
+    kind, *params = FACTORS[name]
+    if kind == "categorical":
+        levels = np.asarray(params[0])
+        return levels[np.minimum((u * len(levels)).astype(int), len(levels) - 1)]
+    low, high = params
+    if kind == "integer":
+        return np.minimum(np.floor(low + u * (high - low + 1)), high).astype(int)
+    return low + u * (high - low)
+
+def evaluate_design(design, strategy="Maintain"):
+    # design: factor name -> array of per-row values (all factors, equal length)
+    n = len(design["rec"])
+    out = {m: np.empty(n) for m in METRICS}
+    economic = {name: np.asarray(design[name], dtype=float) for name in DEFAULT_DISTRIBUTIONS}
+    rec, mon, zld = (np.asarray(design[c], dtype=float) for c in ("rec", "mon", "zld"))
+    years = np.asarray(design["year"]).astype(int)
+    intentions = np.asarray(design["wafer_intention"]).astype(str)
+    sizes = np.asarray(design["wafer_size_mm"]).astype(int)
+
+    for intention in np.unique(intentions):
+        for size_mm in np.unique(sizes):
+            idx = np.flatnonzero((intentions == intention) & (sizes == size_mm))
+            if len(idx) == 0:
+                continue
+            horizon = simulate_horizon(str(intention), int(size_mm), rec[idx], mon[idx], zld[idx], years[idx],
+                                       strategy=strategy)
+            p = {name: values[idx] for name, values in economic.items()}
+            result = evaluate_draws(str(intention), int(size_mm), rec[idx], mon[idx], zld[idx], years[idx],
+                                    horizon["multiplier"], horizon["raw_efficiency"], p)
+            result["composite"] = (result["roi"] + result["efficiency"]) / 2
+            for m in METRICS:
+                out[m][idx] = result[m]
+    return out
+
+# === TORNADO (ONE-AT-A-TIME) ===
+def tornado_analysis(baseline, strategy="Maintain"):
+    # baseline: values for rec, mon, zld, year, wafer_size_mm and wafer_intention;
+    # economic constants default to their point estimates
+    import pandas as pd
+
+    started = time.perf_counter()
+    base = {**BASELINE_PARAMETERS, **baseline}
+    # Row 0 is the baseline; each factor adds one row per probed value
+    probes = [("baseline", None)]
+    for name, (kind, *params) in FACTORS.items():
+        values = params[0] if kind == "categorical" else params
+        probes.extend((name, v) for v in values)
+
+    design = {name: np.repeat(np.asarray([base[name]], dtype=object), len(probes)) for name in FACTORS}
+    for row, (name, value) in enumerate(probes[1:], start=1):
+        design[name][row] = value
+    out = evaluate_design(design, strategy)
+
+    rows = []
+    probe_names = np.asarray([name for name, _ in probes])
+    for name in FACTORS:
+        idx = np.flatnonzero(probe_names == name)
+        for m in METRICS:
+            vals = out[m][idx]
+            lo, hi = int(np.argmin(vals)), int(np.argmax(vals))
+            rows.append({
+                "factor": name, "metric": m, "baseline": out[m][0],
+                "low": vals[lo], "high": vals[hi],
+                "low_at": probes[idx[lo]][1], "high_at": probes[idx[hi]][1],
+                "swing": vals[hi] - vals[lo],
+            })
+    frame = pd.DataFrame(rows).sort_values(["metric", "swing"], ascending=[True, False], ignore_index=True)
+    return frame, {"rows": len(probes), "seconds": round(time.perf_counter() - started, 3)}
+
+# === SOBOL INDICES ===
+def saltelli_design(n_base, seed=0):
+    # A, B and the k "A with column i from B" matrices, stacked: n_base * (k + 2) rows
+    names = list(FACTORS)
+    rng = np.random.default_rng(seed)
+    A = rng.random((n_base, len(names)))
+    B = rng.random((n_base, len(names)))
+    blocks = [A, B]
+    for i in range(len(names)):
+        AB = A.copy()
+        AB[:, i] = B[:, i]
+        blocks.append(AB)
+    unit = np.vstack(blocks)
+    return names, {name: _from_unit(name, unit[:, j]) for j, name in enumerate(names)}
+
+def _sobol_indices(f_A, f_B, f_AB, var):
+    # First order (Saltelli 2010) and total effect (Jansen 1999), averaged over the last axis
+    first = np.mean(f_B * (f_AB - f_A), axis=-1) / var
+    total = 0.5 * np.mean((f_A - f_AB) ** 2, axis=-1) / var
+    return first, total
+
+def sobol_analysis(n_base=2048, seed=0, n_bootstrap=200, strategy="Maintain"):
+    import pandas as pd
+
+    started = time.perf_counter()
+    names, design = saltelli_design(n_base, seed)
+    out = evaluate_design(design, strategy)
+    evaluated_at = time.perf_counter()
+
+    k = len(names)
+    rng = np.random.default_rng([seed, 1])
+    boot = rng.integers(0, n_base, (n_bootstrap, n_base))
+    rows = []
+    for m in METRICS:
+        y = out[m].reshape(k + 2, n_base)
+        f_A, f_B, f_AB = y[0], y[1], y[2:]
+        var = np.var(np.concatenate([f_A, f_B]))
+        if var == 0:
+            first = total = np.zeros(k)
+            first_ci = total_ci = np.zeros(k)
+        else:
+            first, total = _sobol_indices(f_A, f_B, f_AB, var)
+            # Bootstrap over base rows; one vectorized pass per factor keeps memory at n_bootstrap × n_base
+            bA, bB = f_A[boot], f_B[boot]
+            bvar = np.var(np.concatenate([bA, bB], axis=1), axis=1)
+            bvar = np.where(bvar > 0, bvar, 1)
+            first_ci, total_ci = np.empty(k), np.empty(k)
+            for i in range(k):
+                bfirst, btotal = _sobol_indices(bA, bB, f_AB[i][boot], bvar)
+                first_ci[i], total_ci[i] = 1.96 * bfirst.std(), 1.96 * btotal.std()
+        for i, name in enumerate(names):
+            rows.append({"factor": name, "metric": m, "S1": first[i], "S1_conf": first_ci[i],
+                         "ST": total[i], "ST_conf": total_ci[i]})
+
+    frame = pd.DataFrame(rows).sort_values(["metric", "ST"], ascending=[True, False], ignore_index=True)
+    stats = {
+        "rows": int(n_base * (k + 2)),
+        "eval_seconds": round(evaluated_at - started, 3),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+    return frame, stats
@@ -0,0 +1,642 @@
+# === v7_5_sim_core.py ===
+# Streamlit-free simulator core: feature builders, market share, ROI math,
+# the batched horizon engine and its caches. The dashboard (v7_4/v7_1), the
+# batch runner and the offline build steps all import from here.
+
+import os
+from functools import lru_cache
+
+import numpy as np
+
+from v7_5_model_artifact import load_current_artifact
+from v7_5_model_bootstrap import load_model_file, model_path
+from v7_5_profiler import span
+from v7_5_scenario_cache import SCENARIO_CACHE, SLIDER_STEP, file_fingerprint, freeze, quantize
+from v7_5_surface_store import open_surface_store
+from v7_5_tree_compiler import compile_model
+
+# Model files are fetched/verified lazily on first load (v7_5_model_bootstrap).
+MODEL_LOCAL_PATH = model_path("water")
+REVENUE_MODEL_PATH = model_path("revenue")
+USE_COMPILED_MODELS = os.environ.get("FAB_COMPILED_MODELS", "1") != "0"
+# Offline batch jobs only: let memory-mapped artifact models unpickle the .pkl
+# for batches over LARGE_BATCH_ROWS. Off for the dashboard, where that would
+# give every replica its own private copy of the model.
+SKLEARN_LARGE_BATCHES = os.environ.get("FAB_SKLEARN_LARGE_BATCHES", "0").lower() in ("1", "true", "yes")
+# Set to unix:/path.sock or tcp://host:port to predict through the shared
+# inference service (v7_5_inference_server) instead of loading the models here.
+INFERENCE_URL = os.environ.get("FAB_INFERENCE_URL") or None
+# Live view renders with the distilled water surrogate while inputs move,
+# then refines with the full model (v7_5_surrogate). Needs a trained surrogate.
+USE_SURROGATE = os.environ.get("FAB_SURROGATE", "0").lower() in ("1", "true", "yes")
+
+# === LOAD MODELS ===
+# Fitted ensembles are compiled to flat NumPy node arrays (v7_5_tree_compiler)
+# after a parity check on a probe grid; if compilation or parity fails the
+# sklearn object is used as-is. An exported artifact of those arrays
+# (v7_5_model_artifact) is memory-mapped instead when it matches the .pkl.
+def _parity_probe():
+    rng = np.random.default_rng(0)
+    n = 256
+    return (
+        rng.choice(list(ROI_WEIGHTS), n), rng.integers(2025, 2076, n),
+        rng.integers(0, 51, n) * 10.0, rng.integers(0, 51, n) * 10.0, rng.integers(0, 51, n) * 10.0,
+        rng.choice(list(WAFER_DATA), n),
+    )
+
+def _compile_or_keep(model, probe):
+    try:
+        return compile_model(model, probe=probe)
+    except (NotImplementedError, ValueError) as e:
+        print(f"Model compilation skipped ({e}); using sklearn predict.")
+        return model
+
+def _remote_model(name, fallback):
+    from v7_5_inference_server import connect_model
+    try:
+        return connect_model(name, INFERENCE_URL, fallback)
+    except OSError as e:
+        print(f"Inference service at {INFERENCE_URL} unavailable ({e}); loading the {name} model locally.")
+        return None
+
+@lru_cache(maxsize=None)
+def load_water_model(compiled=USE_COMPILED_MODELS, remote=INFERENCE_URL is not None,
+                     with_source=SKLEARN_LARGE_BATCHES):
+    model = None
+    if remote:
+        model = _remote_model("water", lambda: load_water_model(compiled, remote=False, with_source=with_source))
+    if model is None and compiled:
+        model = load_current_artifact("water", with_source=with_source)
+    if model is not None:
+        return model
+    model = load_model_file("water")
+    if not compiled:
+        return model
+    return _compile_or_keep(model, build_features_for_water_model_batch(*_parity_probe()))
+
+@lru_cache(maxsize=None)
+def load_model(compiled=USE_COMPILED_MODELS, remote=INFERENCE_URL is not None,
+               with_source=SKLEARN_LARGE_BATCHES):
+    model = None
+    if remote:
+        model = _remote_model("revenue", lambda: load_model(compiled, remote=False, with_source=with_source))
+    if model is None and compiled:
+        model = load_current_artifact("revenue", with_source=with_source)
+    if model is not None:
+        return model
+    model = load_model_file("revenue")
+    if not compiled:
+        return model
+    *args, sizes = _parity_probe()
+    return _compile_or_keep(model, build_features_batch(*args, sizes / 300))
+
+@lru_cache(maxsize=None)
+def load_water_surrogate():
+    # None when no surrogate distilled from the current water .pkl exists
+    from v7_5_surrogate import load_surrogate
+    return load_surrogate()
+
+@lru_cache(maxsize=None)
+def load_surface_store():
+    return open_surface_store()
+
+# === FEATURE ENGINEERING ===
+def build_features(wafer_intention, year, rec, mon, zld, wafer_size=1.0):
+    percent_reclaimed = min(rec * 10, 100)
+    intensity_score = 0.75
+    impact_score = rec * 1.0 + mon * 0.7 + zld * 0.7
+    one_hot = [
+        1 if wafer_intention == "Consumer Electronics" else 0,
+        1 if wafer_intention == "High-Performance Logic" else 0,
+        1 if wafer_intention == "Industrial Controls" else 0,
+        1 if wafer_intention == "Medical Devices" else 0,
+    ]
+    return np.array([[wafer_size, year, percent_reclaimed, intensity_score, impact_score] + one_hot])
+
+def build_features_for_water_model(wafer_intention, year, rec, mon, zld, wafer_size_mm):
+    import pandas as pd
+    total_investment = rec + mon + zld
+    investment_efficiency = total_investment / (wafer_size_mm / 100) if wafer_size_mm else 0
+    impact_score = rec * 1.0 + mon * .7 + zld * 0.7
+    reclaimed_pct = min(impact_score * 2.5, 100)
+
+    data = {
+        "Year": [year],
+        "Year Squared": [year ** 2],
+        "Wafer Size": [wafer_size_mm],
+        "Wafer Intention": [wafer_intention],
+        "Reclamation Investment": [rec],
+        "Monitoring Investment": [mon],
+        "ZLD Investment": [zld],
+        "Total Investment": [total_investment],
+        "Investment Efficiency ($10k)": [investment_efficiency],
+        "Investment Impact Score": [impact_score],
+        "Percent Water Reclaimed": [reclaimed_pct],
+        "Water Intensity Score": [0.75],  # Placeholder if not dynamic
+        "Investment Strategy": ["Maintain"],  # Default for now; can vary if UI updated
+        "Wafer Step": ["Cleaning"]  # Default for now; could randomize if needed
+    }
+
+    return pd.DataFrame(data)
+
+# Batched variants: one row per element of the broadcast inputs, same column
+# layout as the single-row builders.
+INTENTION_ONE_HOT = ["Consumer Electronics", "High-Performance Logic", "Industrial Controls", "Medical Devices"]
+
+def build_features_batch(wafer_intention, years, rec, mon, zld, wafer_size=1.0):
+    years, rec, mon, zld, wafer_size = np.broadcast_arrays(
+        np.atleast_1d(years), rec, mon, zld, wafer_size)
+    intention = np.broadcast_to(np.asarray(wafer_intention, dtype=object), years.shape)
+    percent_reclaimed = np.minimum(rec * 10, 100)
+    impact_score = rec * 1.0 + mon * 0.7 + zld * 0.7
+    one_hot = [(intention == name).astype(float) for name in INTENTION_ONE_HOT]
+    return np.column_stack(
+        [wafer_size, years, percent_reclaimed, np.full(years.shape, 0.75), impact_score] + one_hot
+    ).astype(float)
+
+def build_water_model_columns(wafer_intention, years, rec, mon, zld, wafer_size_mm, strategy="Maintain",
+                              step="Cleaning"):
+    years, rec, mon, zld, wafer_size_mm = np.broadcast_arrays(
+        np.atleast_1d(years), rec, mon, zld, wafer_size_mm)
+    total_investment = rec + mon + zld
+    with np.errstate(divide="ignore", invalid="ignore"):
+        investment_efficiency = np.where(wafer_size_mm != 0, total_investment / (wafer_size_mm / 100), 0)
+    impact_score = rec * 1.0 + mon * .7 + zld * 0.7
+    reclaimed_pct = np.minimum(impact_score * 2.5, 100)
+
+    data = {
+        "Year": years,
+        "Year Squared": years ** 2,
+        "Wafer Size": wafer_size_mm,
+        "Wafer Intention": np.broadcast_to(np.asarray(wafer_intention, dtype=object), years.shape),
+        "Reclamation Investment": rec,
+        "Monitoring Investment": mon,
+        "ZLD Investment": zld,
+        "Total Investment": total_investment,
+        "Investment Efficiency ($10k)": investment_efficiency,
+        "Investment Impact Score": impact_score,
+        "Percent Water Reclaimed": reclaimed_pct,
+        "Water Intensity Score": np.full(years.shape, 0.75),
+        "Investment Strategy": np.broadcast_to(np.asarray(strategy, dtype=object), years.shape),
+        "Wafer Step": np.broadcast_to(np.asarray(step, dtype=object), years.shape)
+    }
+
+    return data
+
+def build_features_for_water_model_batch(wafer_intention, years, rec, mon, zld, wafer_size_mm, strategy="Maintain",
+                                         step="Cleaning"):
+    import pandas as pd
+    return pd.DataFrame(build_water_model_columns(wafer_intention, years, rec, mon, zld, wafer_size_mm, strategy, step))
+
+
+# === MARKET SHARE UTILITY ===
+def get_market_share_split(year):
+    share_200 = max(0.0, 1 - ((year - 2025) / 20)) if year <= 2045 else 0.0
+    share_450 = min(1.0, max(0.0, (year - 2035) / 20)) if year >= 2035 else 0.0
+    share_300 = 1.0 - share_200 - share_450
+    return share_200, share_300, share_450
+
+def get_market_share(wafer_size_mm, year):
+    s200, s300, s450 = get_market_share_split(year)
+    return {200: s200, 300: s300, 450: s450}.get(wafer_size_mm, 1.0)
+
+def get_market_share_split_batch(years):
+    years = np.asarray(years, dtype=float)
+    share_200 = np.where(years <= 2045, np.maximum(0.0, 1 - ((years - 2025) / 20)), 0.0)
+    share_450 = np.where(years >= 2035, np.minimum(1.0, np.maximum(0.0, (years - 2035) / 20)), 0.0)
+    share_300 = 1.0 - share_200 - share_450
+    return share_200, share_300, share_450
+
+def get_market_share_batch(wafer_size_mm, years):
+    s200, s300, s450 = get_market_share_split_batch(years)
+    return {200: s200, 300: s300, 450: s450}.get(wafer_size_mm, np.ones_like(s200))
+
+# === ECONOMIC CONSTANTS ===
+WAFER_DATA = {
+    200: {"price": 1500, "volume": 100_000},
+    300: {"price": 18000, "volume": 200_000},
+    450: {"price": 72000, "volume": 500_000}
+}
+ROI_WEIGHTS = {
+    "High-Performance Logic": 2.2,
+    "Consumer Electronics": 1.6,
+    "Automotive": 1.4,
+    "Medical Devices": 1.3,
+    "Industrial Controls": 1.2
+}
+WATER_PER_WAFER_BY_SIZE = {200: 1200, 300: 3600, 450: 7200}
+WAFER_OUTPUT_BY_SIZE = {200: 100_000, 300: 200_000, 450: 500_000}
+WATER_PRICE_PER_GAL = 0.004
+
+# === ROI CALCULATION ===
+def calculate_roi_v4(wafer_intention, wafer_size_mm, year, rec, mon, zld, multiplier):
+    base = WAFER_DATA[wafer_size_mm]
+    volume = base["volume"]
+    price = base["price"]
+    roi_weight = ROI_WEIGHTS.get(wafer_intention, 1.0)
+    market_share = get_market_share(wafer_size_mm, year)
+
+    base_revenue = volume * price * roi_weight * market_share
+    if multiplier:
+        base_revenue *= multiplier
+
+    total_investment = rec + mon + zld
+    profit = base_revenue - (total_investment * 10000)
+
+    # Load water model and predict
+    water_model = load_water_model()
+    predicted_eff = water_model.predict(
+    build_features_for_water_model(wafer_intention, year, rec, mon, zld, wafer_size_mm)
+    )[0]
+ 
+    # Define baseline and apply logic
+    baseline = WATER_PER_WAFER_BY_SIZE.get(wafer_size_mm, 3600)
+
+    actual_year = year
+    year_penalty = 1 + 0.001 * (actual_year - 2025)
+    predicted_eff *= year_penalty
+
+
+    # Apply safe clipping logic
+    predicted_eff = max(min(predicted_eff, baseline), baseline * 0.1)
+
+    
+    # Define wafer output volume
+    annual_wafers = WAFER_OUTPUT_BY_SIZE.get(wafer_size_mm, 200_000)
+
+    # Calculate impact
+    gal_saved_y = (baseline - predicted_eff) * annual_wafers * market_share
+    dollar_saved_y = gal_saved_y * WATER_PRICE_PER_GAL
+    roi = (dollar_saved_y / (total_investment * 10000)) * 100 if total_investment else 0
+
+    return base_revenue, profit, roi, predicted_eff, gal_saved_y, dollar_saved_y
+
+
+# === VECTORIZED ROI CALCULATION ===
+# Same formulas as calculate_roi_v4, applied element-wise to arrays of years
+# with the model predictions passed in instead of computed one row at a time.
+def calculate_roi_batch(wafer_intention, wafer_size_mm, years, rec, mon, zld, multiplier, predicted_eff):
+    years = np.asarray(years)
+    base = WAFER_DATA[wafer_size_mm]
+    roi_weight = ROI_WEIGHTS.get(wafer_intention, 1.0)
+    market_share = get_market_share_batch(wafer_size_mm, years)
+
+    base_revenue = base["volume"] * base["price"] * roi_weight * market_share
+    if multiplier is not None:
+        multiplier = np.asarray(multiplier, dtype=float)
+        base_revenue = np.where(multiplier != 0, base_revenue * multiplier, base_revenue)
+
+    total_investment = np.asarray(rec + mon + zld, dtype=float)
+    profit = base_revenue - (total_investment * 10000)
+
+    baseline = WATER_PER_WAFER_BY_SIZE.get(wafer_size_mm, 3600)
+    year_penalty = 1 + 0.001 * (years - 2025)
+    predicted_eff = np.asarray(predicted_eff, dtype=float) * year_penalty
+    predicted_eff = np.maximum(np.minimum(predicted_eff, baseline), baseline * 0.1)
+
+    annual_wafers = WAFER_OUTPUT_BY_SIZE.get(wafer_size_mm, 200_000)
+    gal_saved_y = (baseline - predicted_eff) * annual_wafers * market_share
+    dollar_saved_y = gal_saved_y * WATER_PRICE_PER_GAL
+    cost = total_investment * 10000
+    dollar_saved_y, cost = np.broadcast_arrays(dollar_saved_y, cost)
+    roi = np.divide(dollar_saved_y, cost, out=np.zeros(cost.shape), where=cost != 0) * 100
+
+    return base_revenue, profit, roi, predicted_eff, gal_saved_y, dollar_saved_y
+
+
+# === BATCHED PREDICTION ===
+# Large grids repeat many feature rows (the multiplier model only sees
+# min(rec*10, 100) and the impact score), so big batches predict each
+# distinct row once and scatter the results back.
+DEDUPE_MIN_ROWS = 512
+
+def predict_unique_rows(model, X):
+    if len(X) < DEDUPE_MIN_ROWS:
+        return model.predict(X)
+    unique, inverse = np.unique(X, axis=0, return_inverse=True)
+    if len(unique) > 0.5 * len(X):
+        return model.predict(X)
+    return model.predict(unique)[inverse.ravel()]
+
+
+# === HORIZON ENGINE ===
+# One feature matrix per model and one predict call each for the whole horizon.
+# years, rec, mon and zld broadcast together, so a grid of investments can be
+# evaluated in the same two predict calls. fidelity="surrogate" swaps in the
+# distilled water model when one is available.
+def simulate_horizon(wafer_intention, wafer_size_mm, rec, mon, zld, years, wafer_size=None, fidelity="full",
+                     strategy="Maintain"):
+    years, rec, mon, zld = np.broadcast_arrays(np.atleast_1d(years), rec, mon, zld)
+    if wafer_size is None:
+        wafer_size = wafer_size_mm / 300
+
+    multiplier, raw_eff = predict_models(wafer_intention, wafer_size_mm, years, rec, mon, zld, wafer_size, fidelity,
+                                         strategy)
+
+    with span("roi.batch"):
+        revenue, profit, roi, eff, gal_saved, dollar_saved = calculate_roi_batch(
+            wafer_intention, wafer_size_mm, years, rec, mon, zld, multiplier, raw_eff)
+
+    return {
+        "years": years,
+        "multiplier": multiplier,
+        "raw_efficiency": raw_eff,
+        "revenue": revenue,
+        "profit": profit,
+        "roi": roi,
+        "efficiency": eff,
+        "gal_saved": gal_saved,
+        "dollar_saved": dollar_saved,
+    }
+
+def predict_models(wafer_intention, wafer_size_mm, years, rec, mon, zld, wafer_size, fidelity="full",
+                   strategy="Maintain"):
+    # Revenue multiplier and raw water efficiency for broadcast input rows
+    revenue_model = load_model()
+    with span("features.revenue"):
+        revenue_X = build_features_batch(wafer_intention, years, rec, mon, zld, wafer_size)
+    with span("predict.revenue"):
+        multiplier = predict_unique_rows(revenue_model, revenue_X)
+    water_model = load_water_surrogate() if fidelity == "surrogate" else None
+    if water_model is None:
+        water_model = load_water_model()
+    # Compiled models take the raw column dict directly, skipping the DataFrame
+    build_water = build_water_model_columns if getattr(water_model, "accepts_columns", False) \
+        else build_features_for_water_model_batch
+    with span("features.water"):
+        water_X = build_water(wafer_intention, years, rec, mon, zld, wafer_size_mm, strategy)
+    with span("predict.water"):
+        raw_eff = water_model.predict(water_X)
+    return multiplier, raw_eff
+
+
+# === SUB-ANNUAL TIMELINE ===
+# Horizon at annual, quarterly or monthly steps with installation ramp-up and
+# depreciation per technology. Each step feeds the models the effective
+# (ramped, degraded) investment snapped to the slider grid, and the model year
+# is the calendar year, so steps within a year mostly share a feature row:
+# the models see each distinct row once however fine the resolution.
+TIME_RESOLUTIONS = {"annual": 1, "quarterly": 4, "monthly": 12}
+
+# ramp_months: linear ramp from installation to full effect
+# decay_per_year: compounding loss of effect after installation
+# life_years / salvage: straight-line book depreciation down to salvage share
+TECH_CURVES = {
+    "rec": {"ramp_months": 12, "decay_per_year": 0.01, "life_years": 15, "salvage": 0.2},
+    "mon": {"ramp_months": 3, "decay_per_year": 0.0, "life_years": 5, "salvage": 0.0},
+    "zld": {"ramp_months": 24, "decay_per_year": 0.005, "life_years": 20, "salvage": 0.3},
+}
+INSTANT_CURVES = {tech: {"ramp_months": 0, "decay_per_year": 0.0, "life_years": 1, "salvage": 1.0}
+                  for tech in TECH_CURVES}
+
+def timeline_steps(resolution="monthly", start=2025, end=2075):
+    # Step start times as fractional years, start … end inclusive of end's last step
+    per_year = TIME_RESOLUTIONS[resolution]
+    return start + np.arange((end - start + 1) * per_year) / per_year
+
+def tech_effect(curve, age_years):
+    # Share of an investment in effect, share installed so far (the ramp,
+    # without decay) and share of its book value at each age
+    age = np.asarray(age_years, dtype=float)
+    installed = age >= 0
+    age = np.maximum(age, 0.0)
+    ramp = np.minimum(age * 12 / curve["ramp_months"], 1.0) if curve["ramp_months"] else np.ones_like(age)
+    effect = np.where(installed, ramp * (1 - curve["decay_per_year"]) ** age, 0.0)
+    book = 1 - (1 - curve["salvage"]) * np.minimum(age / curve["life_years"], 1.0)
+    return effect, np.where(installed, ramp, 0.0), np.where(installed, book, 0.0)
+
+def simulate_timeline(wafer_intention, wafer_size_mm, rec, mon, zld, resolution="monthly", start=2025, end=2075,
+                      install_year=None, curves=None, wafer_size=None, strategy="Maintain"):
+    # Rates (revenue, capital, profit, gal_saved, dollar_saved, roi) stay
+    # annualized and use the calendar year for market share and the year
+    # penalty, so INSTANT_CURVES reproduce simulate_horizon at any resolution;
+    # *_step arrays are the amounts falling in each step. The investment
+    # charge covers only the capital installed so far (nothing before
+    # installation, the ramped share during it), and book depreciation is
+    # taken off profit and off the savings ROI is computed from.
+    curves = TECH_CURVES if curves is None else curves
+    install_year = start if install_year is None else install_year
+    if wafer_size is None:
+        wafer_size = wafer_size_mm / 300
+    t = timeline_steps(resolution, start, end)
+    per_year = TIME_RESOLUTIONS[resolution]
+    year = np.floor(t + 1e-9).astype(int)
+    nominal = {"rec": float(rec), "mon": float(mon), "zld": float(zld)}
+
+    effective, capital, book_value, depreciation = {}, 0.0, 0.0, 0.0
+    for tech, amount in nominal.items():
+        effect, installed, book = tech_effect(curves[tech], t - install_year)
+        effective[tech] = np.round(amount * effect / SLIDER_STEP) * SLIDER_STEP
+        capital = capital + amount * 10000 * installed
+        book_value = book_value + amount * 10000 * book
+        _, _, book_next = tech_effect(curves[tech], t + 1 / per_year - install_year)
+        depreciation = depreciation + amount * 10000 * np.where(book > 0, book - book_next, 0.0)
+    capital, book_value, depreciation = (np.broadcast_to(a, t.shape).astype(float)
+                                         for a in (capital, book_value, depreciation))
+
+    # Distinct (year, effective rec / mon / zld) rows only
+    rows = np.column_stack([year, effective["rec"], effective["mon"], effective["zld"]])
+    unique, inverse = np.unique(rows, axis=0, return_inverse=True)
+    inverse = inverse.ravel()
+    multiplier, raw_eff = predict_models(wafer_intention, wafer_size_mm, unique[:, 0], unique[:, 1], unique[:, 2],
+                                         unique[:, 3], wafer_size, strategy=strategy)
+    multiplier, raw_eff = np.asarray(multiplier)[inverse], np.asarray(raw_eff)[inverse]
+
+    with span("roi.batch"):
+        revenue, _, _, eff, gal_saved, dollar_saved = calculate_roi_batch(
+            wafer_intention, wafer_size_mm, year, rec, mon, zld, multiplier, raw_eff)
+        depreciation_rate = depreciation * per_year
+        profit = revenue - capital - depreciation_rate
+        roi = np.divide(dollar_saved - depreciation_rate, capital, out=np.zeros(t.shape), where=capital != 0) * 100
+    return {
+        "time": t,
+        "years": year,
+        "effective_rec": effective["rec"],
+        "effective_mon": effective["mon"],
+        "effective_zld": effective["zld"],
+        "multiplier": multiplier,
+        "raw_efficiency": raw_eff,
+        "revenue": revenue,
+        "capital": capital,
+        "profit": profit,
+        "roi": roi,
+        "efficiency": eff,
+        "gal_saved": gal_saved,
+        "dollar_saved": dollar_saved,
+        "gal_saved_step": gal_saved / per_year,
+        "dollar_saved_step": dollar_saved / per_year,
+        "profit_step": profit / per_year,
+        "book_value": book_value,
+        "depreciation_step": depreciation,
+        "model_rows": np.array(len(unique)),
+    }
+
+
+# === PROCESS-STEP BREAKDOWN ===
+# The water model also takes the investment strategy and the process step.
+# Every strategy × step × year row goes through one predict call; the
+# dashboard splits its gallons saved by each step's predicted saving.
+STRATEGIES = ["Maintain", "Increase", "Decrease"]
+WAFER_STEPS = ["Cleaning", "Etching", "Diffusion", "Lithography", "Metrology"]
+
+def simulate_step_breakdown(wafer_intention, wafer_size_mm, rec, mon, zld, years, fidelity="full"):
+    # Arrays shaped (strategies, steps, years)
+    years = np.atleast_1d(np.asarray(years))
+    strategy, step, year = np.meshgrid(np.array(STRATEGIES, dtype=object), np.array(WAFER_STEPS, dtype=object),
+                                       years, indexing="ij")
+    water_model = load_water_surrogate() if fidelity == "surrogate" else None
+    if water_model is None:
+        water_model = load_water_model()
+    build_water = build_water_model_columns if getattr(water_model, "accepts_columns", False) \
+        else build_features_for_water_model_batch
+    with span("features.water_steps"):
+        water_X = build_water(wafer_intention, year.ravel(), rec, mon, zld, wafer_size_mm, strategy.ravel(),
+                              step.ravel())
+    with span("predict.water_steps"):
+        raw_eff = np.asarray(water_model.predict(water_X), dtype=float).reshape(year.shape)
+    _, _, _, eff, gal_saved, _ = calculate_roi_batch(wafer_intention, wafer_size_mm, years, rec, mon, zld, None,
+                                                     raw_eff)
+    return {"years": years, "raw_efficiency": raw_eff, "efficiency": eff, "gal_saved": gal_saved}
+
+def step_shares(breakdown, strategy, year_index):
+    # Share of the saving attributed to each step; even split when nothing is saved
+    saved = np.maximum(breakdown["gal_saved"][STRATEGIES.index(strategy), :, year_index], 0.0)
+    total = saved.sum()
+    return saved / total if total > 0 else np.full(len(WAFER_STEPS), 1 / len(WAFER_STEPS))
+
+
+# === SCENARIO BATCH ===
+# Several whole scenarios (intention, size, investment mix, strategy) stacked
+# into one feature matrix per model: one predict call each, however many
+# scenarios are compared.
+SCENARIO_FIELDS = ("wafer_intention", "wafer_size_mm", "rec", "mon", "zld", "strategy")
+
+def simulate_scenarios(scenarios, years):
+    years = np.asarray(years)
+    if not scenarios:
+        return []
+    n_years = len(years)
+    col = lambda field, default=None: np.repeat([sc.get(field, default) for sc in scenarios], n_years)
+    intention = col("wafer_intention").astype(object)
+    size_mm, rec, mon, zld = col("wafer_size_mm"), col("rec"), col("mon"), col("zld")
+    strategy = col("strategy", "Maintain").astype(object)
+    all_years = np.tile(years, len(scenarios))
+
+    with span("features.revenue"):
+        revenue_X = build_features_batch(intention, all_years, rec, mon, zld, size_mm / 300)
+    with span("predict.revenue"):
+        multiplier = predict_unique_rows(load_model(), revenue_X).reshape(len(scenarios), n_years)
+    water_model = load_water_model()
+    build_water = build_water_model_columns if getattr(water_model, "accepts_columns", False) \
+        else build_features_for_water_model_batch
+    with span("features.water"):
+        water_X = build_water(intention, all_years, rec, mon, zld, size_mm, strategy)
+    with span("predict.water"):
+        raw_eff = np.asarray(water_model.predict(water_X)).reshape(len(scenarios), n_years)
+
+    results = []
+    with span("roi.batch"):
+        for i, sc in enumerate(scenarios):
+            revenue, profit, roi, eff, gal_saved, dollar_saved = calculate_roi_batch(
+                sc["wafer_intention"], sc["wafer_size_mm"], years, sc["rec"], sc["mon"], sc["zld"],
+                multiplier[i], raw_eff[i])
+            results.append({"years": years, "multiplier": multiplier[i], "raw_efficiency": raw_eff[i],
+                            "revenue": revenue, "profit": profit, "roi": roi, "efficiency": eff,
+                            "gal_saved": gal_saved, "dollar_saved": dollar_saved})
+    return results
+
+# === CACHED HORIZON ===
+# Lookup order: precomputed surface store, then the in-process LRU, then the
+# models. Off-grid investments bypass both caches rather than being snapped.
+def scenario_key(wafer_intention, wafer_size_mm, rec, mon, zld, years, wafer_size, strategy="Maintain"):
+    q = (quantize(rec), quantize(mon), quantize(zld))
+    if None in q:
+        return None
+    return (wafer_intention, int(wafer_size_mm), *q, round(float(wafer_size), 9),
+            tuple(int(y) for y in years),
+            file_fingerprint(MODEL_LOCAL_PATH), file_fingerprint(REVENUE_MODEL_PATH)) \
+        + ((strategy,) if strategy != "Maintain" else ())
+
+def cached_horizon(wafer_intention, wafer_size_mm, rec, mon, zld, years, wafer_size=None, fidelity="full",
+                   strategy="Maintain"):
+    years = np.asarray(years)
+    if wafer_size is None:
+        wafer_size = wafer_size_mm / 300
+    store = load_surface_store() if strategy == "Maintain" else None  # the store is built for Maintain only
+    if store is not None:
+        stored = store.lookup(wafer_intention, wafer_size_mm, rec, mon, zld, years, wafer_size)
+        if stored is not None:
+            return stored
+    compute = lambda: freeze(simulate_horizon(wafer_intention, wafer_size_mm, rec, mon, zld, years, wafer_size,
+                                              fidelity, strategy))
+    key = scenario_key(wafer_intention, wafer_size_mm, rec, mon, zld, years, wafer_size, strategy)
+    if key is None:
+        return compute()
+    if fidelity != "full":
+        full = SCENARIO_CACHE.get(key) if SCENARIO_CACHE.contains(key) else None
+        if full is not None:
+            return full  # an exact result already at hand beats a preview
+        key += (fidelity,)
+    # Previews stay in this process; only full-model results go to the shared on-disk tier
+    return SCENARIO_CACHE.get_or_compute(key, compute, persist=fidelity == "full")
+
+def has_full_horizon(wafer_intention, wafer_size_mm, rec, mon, zld, years, wafer_size=None, strategy="Maintain"):
+    # True when cached_horizon(..., fidelity="full") would not touch the models
+    if wafer_size is None:
+        wafer_size = wafer_size_mm / 300
+    store = load_surface_store() if strategy == "Maintain" else None
+    if store is not None and store.lookup(wafer_intention, wafer_size_mm, rec, mon, zld, years, wafer_size) is not None:
+        return True
+    key = scenario_key(wafer_intention, wafer_size_mm, rec, mon, zld, years, wafer_size, strategy)
+    return key is not None and SCENARIO_CACHE.contains(key)
+
+def cached_step_breakdown(wafer_intention, wafer_size_mm, rec, mon, zld, years, fidelity="full"):
+    years = np.asarray(years)
+    compute = lambda: freeze(simulate_step_breakdown(wafer_intention, wafer_size_mm, rec, mon, zld, years, fidelity))
+    key = scenario_key(wafer_intention, wafer_size_mm, rec, mon, zld, years, wafer_size_mm / 300)
+    if key is None:
+        return compute()
+    return SCENARIO_CACHE.get_or_compute(key + ("steps", fidelity), compute, persist=fidelity == "full")
+
+def investment_grid(wafer_intention, wafer_size_mm, mon, year, levels, strategy="Maintain"):
+    # Every (rec, zld) pair on the slider grid at a fixed monitoring level and
+    # year: rows are reclaim levels, columns ZLD levels. One batched evaluation
+    # (rec × zld rows), or a slice of the surface store when it covers the grid.
+    levels = np.asarray(levels, dtype=float)
+    store = load_surface_store() if strategy == "Maintain" else None  # the store is built for Maintain only
+    if store is not None:
+        stored = store.lookup_grid(wafer_intention, wafer_size_mm, levels, mon, levels, year)
+        if stored is not None:
+            return stored
+    rec_g, zld_g = np.meshgrid(levels, levels, indexing="ij")
+    horizon = simulate_horizon(wafer_intention, wafer_size_mm, rec_g.ravel(), mon, zld_g.ravel(), year,
+                               strategy=strategy)
+    return {k: np.asarray(v).reshape(rec_g.shape) for k, v in horizon.items() if k != "years"}
+
+def cached_scenarios(scenarios, years):
+    # Per-scenario cache lookups; every miss is evaluated in one simulate_scenarios batch
+    years = np.asarray(years)
+    store = load_surface_store()
+    results, keys, missing = [None] * len(scenarios), [None] * len(scenarios), []
+    for i, sc in enumerate(scenarios):
+        strategy = sc.get("strategy", "Maintain")
+        if store is not None and strategy == "Maintain":
+            results[i] = store.lookup(sc["wafer_intention"], sc["wafer_size_mm"], sc["rec"], sc["mon"], sc["zld"], years)
+            if results[i] is not None:
+                continue
+        keys[i] = scenario_key(sc["wafer_intention"], sc["wafer_size_mm"], sc["rec"], sc["mon"], sc["zld"], years,
+                               sc["wafer_size_mm"] / 300, strategy)
+        results[i] = SCENARIO_CACHE.get(keys[i]) if keys[i] is not None else None
+        if results[i] is None:
+            missing.append(i)
+    for i, result in zip(missing, simulate_scenarios([scenarios[i] for i in missing], years)):
+        results[i] = freeze(result)
+        if keys[i] is not None:
+            SCENARIO_CACHE.put(keys[i], results[i])
+    return results
+
+def horizon_snapshot(horizon, year):
+    idx = int(np.searchsorted(horizon["years"], year))
+    if idx < len(horizon["years"]) and horizon["years"][idx] == year:
+        return {k: v[idx] for k, v in horizon.items()}
+    return None
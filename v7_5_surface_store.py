@@ -0,0 +1,199 @@
+# === v7_5_surface_store.py ===
+# Offline-precomputed response surface over the discrete investment grid.
+#
+# Build:   python v7_5_surface_store.py --out surface_store --step 10
+# Runtime: SurfaceStore.lookup(...) returns float32 memmap views sliced along the
+#          year axis, or None when the point is off-grid / the store is stale.
+#
+# Layout: one .npy per metric with shape
+#   (intentions, sizes, rec, mon, zld, years)
+# so every (intention, size, rec, mon, zld) horizon is a contiguous row.
+
+import argparse
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+
+STORE_VERSION = 1
+SURFACE_STORE_DIR = os.environ.get("FAB_SURFACE_STORE",
+                                   os.path.join(os.path.dirname(os.path.abspath(__file__)), "surface_store"))
+MANIFEST_NAME = "manifest.json"
+
+METRICS = ["multiplier", "raw_efficiency", "revenue", "profit", "roi", "efficiency", "gal_saved", "dollar_saved"]
+INTENTIONS = ["Automotive", "Consumer Electronics", "High-Performance Logic", "Medical Devices", "Industrial Controls"]
+SIZES = [200, 300, 450]
+YEARS = list(range(2025, 2076))
+
+# === BUILD STEP ===
+def build_surface_store(out_dir=SURFACE_STORE_DIR, intentions=INTENTIONS, sizes=SIZES,
+                        step=10.0, max_investment=500.0, years=YEARS, chunk_rows=1_000_000):
+    from v7_5_sim_core import MODEL_LOCAL_PATH, REVENUE_MODEL_PATH, simulate_horizon
+    from v7_5_scenario_cache import file_fingerprint
+
+    levels = np.round(np.arange(0.0, max_investment + step / 2, step), 9)
+    years = np.asarray(years)
+    shape = (len(intentions), len(sizes), len(levels), len(levels), len(levels), len(years))
+
+    # Write into a temp directory and swap it in at the end so readers never see a partial store
+    tmp_dir = out_dir.rstrip("/\\") + ".building"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    arrays = {
+        m: np.lib.format.open_memmap(os.path.join(tmp_dir, f"{m}.npy"), mode="w+", dtype=np.float32, shape=shape)
+        for m in METRICS
+    }
+
+    # Each batch covers a block of rec levels × every mon, zld and year
+    rows_per_rec = len(levels) ** 2 * len(years)
+    rec_block = max(1, chunk_rows // rows_per_rec)
+    mon_g, zld_g, year_g = np.meshgrid(levels, levels, years, indexing="ij")
+
+    started = time.perf_counter()
+    for i, intention in enumerate(intentions):
+        for s, size_mm in enumerate(sizes):
+            for r0 in range(0, len(levels), rec_block):
+                recs = levels[r0:r0 + rec_block]
+                rec_g = np.broadcast_to(recs[:, None, None, None], (len(recs),) + mon_g.shape)
+                block_shape = rec_g.shape
+                result = simulate_horizon(
+                    intention, size_mm,
+                    rec_g.ravel(),
+                    np.broadcast_to(mon_g, block_shape).ravel(),
+                    np.broadcast_to(zld_g, block_shape).ravel(),
+                    np.broadcast_to(year_g, block_shape).ravel(),
+                )
+                for m in METRICS:
+                    arrays[m][i, s, r0:r0 + len(recs)] = result[m].reshape(block_shape)
+            print(f"  {intention} / {size_mm}mm done ({time.perf_counter() - started:.1f}s)")
+
+    for arr in arrays.values():
+        arr.flush()
+    del arrays
+
+    manifest = {
+        "version": STORE_VERSION,
+        "dtype": "float32",
+        "metrics": METRICS,
+        "axes": {
+            "intentions": list(intentions),
+            "sizes": [int(x) for x in sizes],
+            "levels": levels.tolist(),
+            "years": years.tolist(),
+        },
+        "wafer_size_rule": "wafer_size_mm / 300",
+        "models": {
+            "water": file_fingerprint(MODEL_LOCAL_PATH),
+            "revenue": file_fingerprint(REVENUE_MODEL_PATH),
+        },
+        "build_seconds": round(time.perf_counter() - started, 2),
+    }
+    with open(os.path.join(tmp_dir, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(tmp_dir, out_dir)
+    return manifest
+
+# === RUNTIME STORE ===
+class SurfaceStore:
+    def __init__(self, path, manifest):
+        self.path = path
+        self.manifest = manifest
+        axes = manifest["axes"]
+        self.intentions = {name: i for i, name in enumerate(axes["intentions"])}
+        self.sizes = {size: i for i, size in enumerate(axes["sizes"])}
+        self.levels = np.asarray(axes["levels"])
+        self.years = np.asarray(axes["years"])
+        # mmap_mode="r" keeps the data in the page cache, shared by every process on the host
+        self.arrays = {m: np.load(os.path.join(path, f"{m}.npy"), mmap_mode="r") for m in manifest["metrics"]}
+
+    def _level_index(self, value):
+        idx = int(np.searchsorted(self.levels, value))
+        if idx < len(self.levels) and abs(self.levels[idx] - value) < 1e-9:
+            return idx
+        return None
+
+    def _year_slice(self, years):
+        years = np.asarray(years)
+        if years.ndim != 1 or len(years) == 0 or np.any(np.diff(years) != 1):
+            return None
+        start = int(np.searchsorted(self.years, years[0]))
+        stop = start + len(years)
+        if stop > len(self.years) or self.years[start] != years[0]:
+            return None
+        return slice(start, stop)
+
+    def lookup(self, wafer_intention, wafer_size_mm, rec, mon, zld, years, wafer_size=None):
+        if wafer_size is not None and abs(wafer_size - wafer_size_mm / 300) > 1e-9:
+            return None
+        i = self.intentions.get(wafer_intention)
+        s = self.sizes.get(wafer_size_mm)
+        r, m, z = (self._level_index(v) for v in (rec, mon, zld))
+        ys = self._year_slice(years)
+        if None in (i, s, r, m, z, ys):
+            return None
+        # Basic indexing on a memmap returns views: no copy, no model call
+        result = {metric: arr[i, s, r, m, z, ys] for metric, arr in self.arrays.items()}
+        result["years"] = self.years[ys]
+        return result
+
+    def lookup_grid(self, wafer_intention, wafer_size_mm, rec_levels, mon, zld_levels, year):
+        # Every (rec, zld) pair at one monitoring level and year: metric arrays
+        # shaped (rec_levels, zld_levels), or None when any point is off the store
+        i = self.intentions.get(wafer_intention)
+        s = self.sizes.get(wafer_size_mm)
+        m = self._level_index(mon)
+        ys = self._year_slice([year])
+        r = [self._level_index(v) for v in rec_levels]
+        z = [self._level_index(v) for v in zld_levels]
+        if None in (i, s, m, ys) or None in r or None in z:
+            return None
+        return {metric: np.asarray(arr[i, s, r, m][:, z, ys.start]) for metric, arr in self.arrays.items()}
+
+def open_surface_store(path=SURFACE_STORE_DIR):
+    from v7_5_sim_core import MODEL_LOCAL_PATH, REVENUE_MODEL_PATH
+    from v7_5_scenario_cache import file_fingerprint
+
+    manifest_path = os.path.join(path, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    if manifest.get("version") != STORE_VERSION:
+        return None
+    # A store built against different model files is stale; fall back to live inference
+    current = {"water": file_fingerprint(MODEL_LOCAL_PATH), "revenue": file_fingerprint(REVENUE_MODEL_PATH)}
+    if manifest.get("models") != current:
+        print(f"Surface store at {path} was built for different model files; ignoring it.")
+        return None
+    return SurfaceStore(path, manifest)
+
+# === CLI ===
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute the ROI response surface over the investment grid.")
+    parser.add_argument("--out", default=SURFACE_STORE_DIR)
+    parser.add_argument("--intentions", nargs="+", default=INTENTIONS)
+    parser.add_argument("--sizes", nargs="+", type=int, default=SIZES)
+    parser.add_argument("--step", type=float, default=10.0)
+    parser.add_argument("--max-investment", type=float, default=500.0)
+    parser.add_argument("--year-start", type=int, default=YEARS[0])
+    parser.add_argument("--year-end", type=int, default=YEARS[-1])
+    parser.add_argument("--chunk-rows", type=int, default=1_000_000)
+    args = parser.parse_args(argv)
+
+    manifest = build_surface_store(
+        out_dir=args.out,
+        intentions=args.intentions,
+        sizes=args.sizes,
+        step=args.step,
+        max_investment=args.max_investment,
+        years=range(args.year_start, args.year_end + 1),
+        chunk_rows=args.chunk_rows,
+    )
+    print(f"Surface store written to {args.out} in {manifest['build_seconds']}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+# === v7_5_surrogate.py ===
+# Distilled water model for the interactive view.
+#
+# Train:   python v7_5_surrogate.py train      (labels dense samples with the full model)
+# Report:  python v7_5_surrogate.py report     (stored error bounds + latency)
+#
+# A small histogram-boosted ensemble is fitted to the full water model's own
+# predictions over the feature space the app sends it (every intention, size,
+# strategy and process step, years 2025-2075, investments on the slider
+# grid), compiled like the live models and saved as a memory-mappable
+# artifact (v7_5_model_artifact) next to the water .pkl:
+#   <water model stem>_surrogate.fabm/
+# The header records the .pkl it was distilled from, so a new water model
+# makes the surrogate stale and the app goes back to full fidelity, and the
+# max / mean absolute error per wafer size and intention measured on a
+# held-out sample.
+#
+# With FAB_SURROGATE=1 the dashboard renders the surrogate's horizon while
+# the inputs are moving and reruns once with the full model afterwards.
+# Analysis panels, the batch runner and fleet runs always use the full model.
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from v7_5_model_artifact import ARTIFACT_SUFFIX, load_current_artifact, read_header, write_artifact
+
+SIZES = [200, 300, 450]
+YEARS = np.arange(2025, 2076)
+SLIDER_LEVELS = np.arange(0.0, 500.0 + 5.0, 10.0)
+CATEGORICAL = ["Wafer Intention", "Investment Strategy", "Wafer Step"]
+
+
+def surrogate_path():
+    from v7_5_model_bootstrap import model_path
+    return os.path.splitext(model_path("water"))[0] + "_surrogate" + ARTIFACT_SUFFIX
+
+# === SAMPLING ===
+def sample_inputs(samples_per_cell, seed):
+    # samples_per_cell random rows for every (size, intention); investments
+    # stay on the slider grid, the only values the app can send
+    from v7_5_sim_core import ROI_WEIGHTS, STRATEGIES, WAFER_STEPS, build_water_model_columns
+
+    rng = np.random.default_rng(seed)
+    cells = [(size, intention) for size in SIZES for intention in ROI_WEIGHTS]
+    n = samples_per_cell * len(cells)
+    size = np.repeat([c[0] for c in cells], samples_per_cell)
+    intention = np.repeat(np.array([c[1] for c in cells], dtype=object), samples_per_cell)
+    return build_water_model_columns(
+        intention, rng.choice(YEARS, n), rng.choice(SLIDER_LEVELS, n), rng.choice(SLIDER_LEVELS, n),
+        rng.choice(SLIDER_LEVELS, n), size, rng.choice(np.array(STRATEGIES, dtype=object), n),
+        rng.choice(np.array(WAFER_STEPS, dtype=object), n))
+
+def _frame(columns):
+    import pandas as pd
+    return pd.DataFrame(columns)
+
+# === TRAINING ===
+def fit_surrogate(X, y, max_iter=80, max_depth=6, seed=0):
+    from sklearn.compose import ColumnTransformer
+    from sklearn.ensemble import HistGradientBoostingRegressor
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import OneHotEncoder
+
+    model = Pipeline([
+        ("prep", ColumnTransformer([("cat", OneHotEncoder(handle_unknown="ignore"), CATEGORICAL)],
+                                   remainder="passthrough")),
+        ("model", HistGradientBoostingRegressor(max_iter=max_iter, max_depth=max_depth, learning_rate=0.2,
+                                                early_stopping=False, random_state=seed)),
+    ])
+    return model.fit(X, y)
+
+def error_table(columns, full_pred, surrogate_pred):
+    # Max / mean absolute error of the water prediction (gal/wafer) and of the
+    # ROI it implies (percentage points), per wafer size and intention
+    from v7_5_sim_core import calculate_roi_batch
+
+    rows = []
+    for size in SIZES:
+        for intention in dict.fromkeys(columns["Wafer Intention"]):
+            m = (columns["Wafer Size"] == size) & (columns["Wafer Intention"] == intention)
+            if not m.any():
+                continue
+            rec, mon, zld, years = (columns[c][m] for c in ("Reclamation Investment", "Monitoring Investment",
+                                                            "ZLD Investment", "Year"))
+            roi = [calculate_roi_batch(intention, size, years, rec, mon, zld, None, pred[m])[2]
+                   for pred in (full_pred, surrogate_pred)]
+            err, roi_err = np.abs(surrogate_pred[m] - full_pred[m]), np.abs(roi[1] - roi[0])
+            rows.append({"wafer_size_mm": int(size), "wafer_intention": str(intention), "rows": int(m.sum()),
+                         "max_abs": float(err.max()), "mean_abs": float(err.mean()),
+                         "roi_max_abs_pp": float(roi_err.max()), "roi_mean_abs_pp": float(roi_err.mean())})
+    return rows
+
+def _horizon_ms(model, repeat=20):
+    # One live-view horizon: 51 years of a single scenario
+    from v7_5_sim_core import build_features_for_water_model_batch, build_water_model_columns
+
+    build = build_water_model_columns if getattr(model, "accepts_columns", False) \
+        else build_features_for_water_model_batch
+    args = ("Automotive", YEARS, 100.0, 50.0, 100.0, 300)
+    model.predict(build(*args))
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        model.predict(build(*args))
+    return (time.perf_counter() - t0) / repeat * 1e3
+
+def train_surrogate(samples_per_cell=4000, holdout_per_cell=1000, max_iter=80, max_depth=6, seed=0, out_dir=None):
+    from v7_5_model_bootstrap import model_path
+    from v7_5_scenario_cache import file_fingerprint
+    from v7_5_sim_core import load_water_model
+    from v7_5_tree_compiler import compile_model
+
+    full = load_water_model(remote=False)
+    build = (lambda c: c) if getattr(full, "accepts_columns", False) else _frame
+    train, holdout = sample_inputs(samples_per_cell, seed), sample_inputs(holdout_per_cell, seed + 1)
+    t0 = time.perf_counter()
+    y_train = np.asarray(full.predict(build(train)), dtype=float)
+    y_holdout = np.asarray(full.predict(build(holdout)), dtype=float)
+    label_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    model = fit_surrogate(_frame(train), y_train, max_iter=max_iter, max_depth=max_depth, seed=seed)
+    fit_s = time.perf_counter() - t0
+    compiled = compile_model(model, probe=_frame(holdout))
+    predicted = np.asarray(compiled.predict(holdout), dtype=float)
+
+    info = {
+        "model": "water_surrogate",
+        "source_file": os.path.basename(model_path("water")),
+        "source_sha256": file_fingerprint(model_path("water")),
+        "source_type": type(model).__name__,
+        "surrogate": {
+            "estimator": f"HistGradientBoostingRegressor(max_iter={max_iter}, max_depth={max_depth})",
+            "train_rows": len(y_train), "holdout_rows": len(y_holdout), "seed": seed,
+            "label_seconds": round(label_s, 2), "fit_seconds": round(fit_s, 2),
+            "full_horizon_ms": round(_horizon_ms(full), 3), "surrogate_horizon_ms": round(_horizon_ms(compiled), 3),
+            "errors": error_table(holdout, y_holdout, predicted),
+        },
+    }
+    return write_artifact(compiled, out_dir or surrogate_path(), info)
+
+# === RUNTIME ===
+def load_surrogate(path=None):
+    # Compiled surrogate distilled from the current water .pkl, else None
+    path = path or surrogate_path()
+    if read_header(path) is None:
+        return None
+    return load_current_artifact("water", path=path, with_source=False)
+
+def error_bounds(path=None):
+    # (wafer_size_mm, wafer_intention) -> error row of the stored holdout report
+    header = read_header(path or surrogate_path())
+    if header is None:
+        return {}
+    return {(r["wafer_size_mm"], r["wafer_intention"]): r for r in header["surrogate"]["errors"]}
+
+# === CLI ===
+def print_report(header):
+    s = header["surrogate"]
+    print(f"{s['estimator']}, {header['ensemble']['trees']} trees / {header['ensemble']['nodes']:,} nodes, "
+          f"distilled from {header['source_file']} on {s['train_rows']:,} rows")
+    print(f"51-year horizon predict: full {s['full_horizon_ms']:.2f} ms, surrogate {s['surrogate_horizon_ms']:.2f} ms")
+    print(f"Held-out error ({s['holdout_rows']:,} rows):")
+    print(f"{'size':>5s} {'intention':24s} {'max gal/wafer':>14s} {'mean gal/wafer':>15s} "
+          f"{'max ROI pp':>11s} {'mean ROI pp':>12s}")
+    for r in s["errors"]:
+        print(f"{r['wafer_size_mm']:5d} {r['wafer_intention']:24s} {r['max_abs']:14.2f} {r['mean_abs']:15.2f} "
+              f"{r['roi_max_abs_pp']:11.3f} {r['roi_mean_abs_pp']:12.3f}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Distil the water model into a cheap surrogate for the live view.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_train = sub.add_parser("train", help=f"write <water stem>_surrogate{ARTIFACT_SUFFIX}/ next to the .pkl")
+    p_train.add_argument("--samples-per-cell", type=int, default=4000, help="training rows per (size, intention)")
+    p_train.add_argument("--holdout-per-cell", type=int, default=1000)
+    p_train.add_argument("--max-iter", type=int, default=80)
+    p_train.add_argument("--max-depth", type=int, default=6)
+    p_train.add_argument("--seed", type=int, default=0)
+    sub.add_parser("report", help="print the stored error bounds")
+    args = parser.parse_args(argv)
+
+    if args.command == "train":
+        header = train_surrogate(args.samples_per_cell, args.holdout_per_cell, args.max_iter, args.max_depth, args.seed)
+        print(f"Wrote {surrogate_path()}")
+    else:
+        header = read_header(surrogate_path())
+        if header is None:
+            parser.exit(1, f"No surrogate at {surrogate_path()}; run `python v7_5_surrogate.py train`.\n")
+    print_report(header)
+
+if __name__ == "__main__":
+    main()
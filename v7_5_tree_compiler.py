@@ -0,0 +1,425 @@
+# === v7_5_tree_compiler.py ===
+# Compiles fitted sklearn tree ensembles (and the preprocessing in front of
+# them) into flat NumPy arrays so prediction skips sklearn's per-call input
+# validation, pandas column handling and categorical encoding.
+#
+# Supported: Pipeline, ColumnTransformer, OneHotEncoder, OrdinalEncoder,
+# StandardScaler, identity FunctionTransformer / passthrough, DecisionTree,
+# RandomForest, ExtraTrees, GradientBoosting and HistGradientBoosting
+# regressors. Anything else raises NotImplementedError and callers keep the
+# sklearn object.
+#
+#   python v7_5_tree_compiler.py    -> parity check + latency comparison
+
+import time
+
+import numpy as np
+
+ROW_CHUNK_ELEMENTS = 1 << 20  # rows × trees traversed at once; bounds peak memory
+SHALLOW_DEPTH = 8  # at or below this depth, descend every level instead of tracking leaves
+# Above this many rows sklearn's Cython traversal beats NumPy gathers, so the
+# pre-encoded matrix is handed to the source estimator when one is available.
+LARGE_BATCH_ROWS = 512
+
+# === FLAT TREE ENSEMBLE ===
+class FlatEnsemble:
+    # All trees are concatenated into one set of node arrays, renumbered so a
+    # node's children are adjacent (right == left + 1): the next node is
+    # left[node] + (x > threshold), one gather and an add per level. Leaves
+    # point back to themselves, so shallow ensembles descend a fixed number
+    # of levels with no leaf bookkeeping.
+    def __init__(self, feature, threshold, left, value, roots, depth, scale, bias, compare_dtype, is_leaf=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.value = value
+        self.roots = roots
+        self.depth = depth
+        self.scale = scale
+        self.bias = bias
+        self.compare_dtype = compare_dtype
+        self.is_leaf = left == np.arange(len(left)) if is_leaf is None else is_leaf
+
+    @classmethod
+    def from_node_lists(cls, trees, scale, bias, compare_dtype):
+        # trees: iterable of (feature, threshold, left, right, value, is_leaf) in any node order
+        feature, threshold, left, value, roots = [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for f, t, l, r, v, leaf in trees:
+            # Breadth-first renumbering with sibling pairs kept together
+            order, depth_of = [0], {0: 0}
+            new_left = {}
+            i = 0
+            while i < len(order):
+                node = order[i]
+                if not leaf[node]:
+                    new_left[node] = len(order)
+                    order.extend((int(l[node]), int(r[node])))
+                    depth_of[int(l[node])] = depth_of[int(r[node])] = depth_of[node] + 1
+                i += 1
+            order = np.asarray(order)
+            new_id = np.empty(len(f), dtype=np.int64)
+            new_id[order] = np.arange(len(order))
+            tree_leaf = np.asarray(leaf)[order]
+            feature.append(np.where(tree_leaf, 0, np.asarray(f)[order]))
+            threshold.append(np.where(tree_leaf, np.inf, np.asarray(t, dtype=np.float64)[order]))
+            left.append(offset + np.array([new_left.get(int(o), new_id[o]) for o in order]))
+            value.append(np.asarray(v, dtype=np.float64)[order])
+            roots.append(offset)
+            max_depth = max(max_depth, max(depth_of.values()))
+            offset += len(order)
+
+        threshold = np.concatenate(threshold)
+        if compare_dtype == np.float32:
+            # sklearn promotes float32 inputs to compare against float64 thresholds;
+            # rounding each threshold down to float32 gives identical decisions
+            # while keeping the comparison in float32.
+            t32 = threshold.astype(np.float32)
+            too_high = t32.astype(np.float64) > threshold
+            t32[too_high] = np.nextafter(t32[too_high], np.float32(-np.inf))
+            threshold = t32
+        return cls(
+            np.concatenate(feature).astype(np.int32), threshold,
+            np.concatenate(left).astype(np.int32), np.concatenate(value),
+            np.asarray(roots, dtype=np.int32), max_depth, scale, bias, compare_dtype,
+        )
+
+    def predict(self, X):
+        X = np.ascontiguousarray(X, dtype=self.compare_dtype)
+        n, n_features = X.shape
+        n_trees = len(self.roots)
+        out = np.empty(n)
+        chunk = max(1, ROW_CHUNK_ELEMENTS // n_trees)
+        for r0 in range(0, n, chunk):
+            Xc = X[r0:r0 + chunk]
+            m = len(Xc)
+            flat_x = Xc.ravel()
+            node = np.tile(self.roots, m)
+            row_base = np.repeat(np.arange(0, m * n_features, n_features, dtype=np.int32), n_trees)
+            if self.depth <= SHALLOW_DEPTH:
+                for _ in range(self.depth):
+                    node = self.left[node] + (flat_x[row_base + self.feature[node]] > self.threshold[node])
+            else:
+                # Deep trees: finished (leaf) entries drop out of the active set
+                active = np.arange(node.size)
+                while active.size:
+                    nd = node[active]
+                    nd = self.left[nd] + (flat_x[row_base[active] + self.feature[nd]] > self.threshold[nd])
+                    node[active] = nd
+                    active = active[~self.is_leaf[nd]]
+            out[r0:r0 + m] = self.value[node].reshape(m, n_trees).sum(axis=1)
+        return out * self.scale + self.bias
+
+def _sklearn_tree_nodes(tree):
+    t = tree.tree_
+    leaf = t.children_left == -1
+    return t.feature, t.threshold, t.children_left, t.children_right, t.value[:, 0, 0], leaf
+
+def compile_estimator(est):
+    from sklearn.ensemble import (
+        ExtraTreesRegressor, GradientBoostingRegressor,
+        HistGradientBoostingRegressor, RandomForestRegressor,
+    )
+    from sklearn.tree import DecisionTreeRegressor
+
+    if getattr(est, "n_outputs_", 1) != 1:
+        raise NotImplementedError("multi-output estimators are not supported")
+
+    # sklearn trees compare float32 inputs against float64 thresholds
+    if isinstance(est, DecisionTreeRegressor):
+        return FlatEnsemble.from_node_lists([_sklearn_tree_nodes(est)], 1.0, 0.0, np.float32)
+
+    if isinstance(est, (RandomForestRegressor, ExtraTreesRegressor)):
+        trees = [_sklearn_tree_nodes(t) for t in est.estimators_]
+        return FlatEnsemble.from_node_lists(trees, 1.0 / len(trees), 0.0, np.float32)
+
+    if isinstance(est, GradientBoostingRegressor):
+        from sklearn.dummy import DummyRegressor
+        if not (est.init_ == "zero" or isinstance(est.init_, DummyRegressor)):
+            raise NotImplementedError("only constant init estimators are supported")
+        bias = float(est._raw_predict_init(np.zeros((1, est.n_features_in_)))[0, 0])
+        trees = [_sklearn_tree_nodes(t) for t in est.estimators_[:, 0]]
+        return FlatEnsemble.from_node_lists(trees, est.learning_rate, bias, np.float32)
+
+    if isinstance(est, HistGradientBoostingRegressor):
+        if getattr(est, "_preprocessor", None) is not None:
+            raise NotImplementedError("native categorical preprocessing is not supported")
+        if est.loss not in ("squared_error", "absolute_error", "quantile"):
+            raise NotImplementedError(f"loss {est.loss!r} has a non-identity link")
+        trees = []
+        for (predictor,) in est._predictors:
+            nodes = predictor.nodes
+            if nodes["is_categorical"].any():
+                raise NotImplementedError("categorical splits are not supported")
+            trees.append((nodes["feature_idx"], nodes["num_threshold"], nodes["left"],
+                          nodes["right"], nodes["value"], nodes["is_leaf"].astype(bool)))
+        bias = float(np.ravel(est._baseline_prediction)[0])
+        return FlatEnsemble.from_node_lists(trees, 1.0, bias, np.float64)
+
+    raise NotImplementedError(f"{type(est).__name__} is not supported")
+
+# === PREPROCESSING ===
+# Each compiled transformer maps a dict of raw input columns to a list of
+# float output columns, in the same order sklearn would produce them.
+class CompiledOneHot:
+    def __init__(self, enc, columns):
+        if any(c is not None for c in (getattr(enc, "infrequent_categories_", None) or [])):
+            raise NotImplementedError("infrequent categories are not supported")
+        self.columns = columns
+        self.ignore_unknown = enc.handle_unknown != "error"
+        drop_idx = enc.drop_idx_ if enc.drop_idx_ is not None else [None] * len(columns)
+        # Precomputed encodings: category value -> output position within the column's block
+        self.encodings = []
+        for cats, drop in zip(enc.categories_, drop_idx):
+            kept = [c for i, c in enumerate(cats) if drop is None or i != drop]
+            codes = {c: i for i, c in enumerate(kept)}
+            if drop is not None:
+                codes[cats[drop]] = -1  # dropped category encodes as all zeros
+            self.encodings.append(codes)
+
+    def transform(self, data, n):
+        out = []
+        for col, codes in zip(self.columns, self.encodings):
+            block = np.zeros((n, _width(codes)))
+            values = _encode(data[col], codes, self.ignore_unknown, col)
+            known = values >= 0
+            block[np.flatnonzero(known), values[known]] = 1.0
+            out.extend(block.T)
+        return out
+
+    @property
+    def n_outputs(self):
+        return sum(_width(codes) for codes in self.encodings)
+
+def _width(codes):
+    return sum(1 for code in codes.values() if code >= 0)
+
+class CompiledOrdinal:
+    n_outputs = property(lambda self: len(self.columns))
+
+    def __init__(self, enc, columns):
+        self.columns = columns
+        self.unknown_value = enc.unknown_value if enc.handle_unknown == "use_encoded_value" else None
+        self.encodings = [{c: i for i, c in enumerate(cats)} for cats in enc.categories_]
+
+    def transform(self, data, n):
+        out = []
+        for col, codes in zip(self.columns, self.encodings):
+            values = _encode(data[col], codes, self.unknown_value is not None, col).astype(float)
+            if self.unknown_value is not None:
+                values[values < 0] = self.unknown_value
+            out.append(values)
+        return out
+
+class CompiledScaler:
+    n_outputs = property(lambda self: len(self.columns))
+
+    def __init__(self, scaler, columns):
+        self.columns = columns
+        self.mean = scaler.mean_ if scaler.with_mean else np.zeros(len(columns))
+        self.scale = scaler.scale_ if scaler.with_std else np.ones(len(columns))
+
+    def transform(self, data, n):
+        return [(np.asarray(data[c], dtype=float) - m) / s for c, m, s in zip(self.columns, self.mean, self.scale)]
+
+class CompiledPassthrough:
+    n_outputs = property(lambda self: len(self.columns))
+
+    def __init__(self, columns):
+        self.columns = columns
+
+    def transform(self, data, n):
+        return [np.asarray(data[c], dtype=float) for c in self.columns]
+
+def _encode(column, codes, ignore_unknown, name):
+    # Map categories to integer codes; unknowns become -2
+    column = np.asarray(column, dtype=object).ravel()
+    if column.size <= 1 or column.strides == (0,):
+        # Constant column (scalar broadcast by the feature builders): one lookup
+        uniques, inverse = column[:1], np.zeros(column.size, dtype=np.int64)
+    else:
+        import pandas as pd
+        inverse, uniques = pd.factorize(column)
+    lut = np.array([codes.get(u, -2) for u in uniques], dtype=np.int64)
+    if not ignore_unknown and (lut == -2).any():
+        raise ValueError(f"Found unknown categories {list(np.asarray(uniques)[lut == -2])} in column {name!r}")
+    return lut[inverse]
+
+def _compile_transformer(trans, columns):
+    from sklearn.preprocessing import FunctionTransformer, OneHotEncoder, OrdinalEncoder, StandardScaler
+
+    if isinstance(trans, str) and trans == "passthrough":
+        return CompiledPassthrough(columns)
+    if isinstance(trans, FunctionTransformer) and trans.func is None:
+        return CompiledPassthrough(columns)
+    if isinstance(trans, OneHotEncoder):
+        return CompiledOneHot(trans, columns)
+    if isinstance(trans, OrdinalEncoder):
+        return CompiledOrdinal(trans, columns)
+    if isinstance(trans, StandardScaler):
+        return CompiledScaler(trans, columns)
+    raise NotImplementedError(f"{type(trans).__name__} is not supported")
+
+def _resolve_columns(spec, names):
+    if isinstance(spec, slice):
+        return list(range(len(names)))[spec]
+    spec = list(np.atleast_1d(spec))
+    if spec and isinstance(spec[0], (bool, np.bool_)):
+        return list(np.flatnonzero(spec))
+    return [names.index(c) if isinstance(c, str) else int(c) for c in spec]
+
+# === COMPILED MODEL ===
+class CompiledModel:
+    # Drop-in replacement for model.predict. Accepts a DataFrame, a dict of
+    # column arrays (fastest: no pandas at all) or a 2-D array in input order.
+    accepts_columns = True
+
+    def __init__(self, input_names, stages, ensemble, source=None, source_estimator=None, load_source_estimator=None,
+                 load_source=None):
+        self.input_names = input_names
+        self.stages = stages
+        self.ensemble = ensemble
+        self.source = source
+        self.source_estimator = source_estimator
+        # Deferred sklearn objects (memory-mapped artifacts): the estimator is
+        # unpickled on the first large batch, the whole model on the first
+        # row with a missing value
+        self.load_source_estimator = load_source_estimator
+        self.load_source = load_source
+
+    @property
+    def encodings(self):
+        return {
+            col: codes
+            for stage in self.stages for step in stage
+            if hasattr(step, "encodings")
+            for col, codes in zip(step.columns, step.encodings)
+        }
+
+    def _as_columns(self, X):
+        if isinstance(X, dict):
+            return dict(X), len(next(iter(X.values())))
+        if hasattr(X, "columns"):
+            return {c: X[c].to_numpy() for c in X.columns}, len(X)
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        return dict(zip(range(X.shape[1]), X.T)), X.shape[0]
+
+    def transform(self, X):
+        data, n = self._as_columns(X)
+        # Positional and named access both resolve to the same input column
+        for i, name in enumerate(self.input_names):
+            if name in data and i not in data:
+                data[i] = data[name]
+        for stage in self.stages:
+            cols = []
+            for step in stage:
+                cols.extend(step.transform(data, n))
+            data = dict(enumerate(cols))
+        return np.column_stack([data[i] for i in range(len(data))]) if data else np.empty((n, 0))
+
+    def predict(self, X):
+        Xt = self.transform(X)
+        if np.isnan(Xt).any():
+            if self.source is None and self.load_source is not None:
+                self.source = self.load_source()
+                self.load_source = None
+            if self.source is None:
+                raise ValueError("Compiled models do not support missing values")
+            return self.source.predict(_as_frame(X) if isinstance(X, dict) else X)
+        if len(Xt) > LARGE_BATCH_ROWS:
+            if self.source_estimator is None and self.load_source_estimator is not None:
+                self.source_estimator = self.load_source_estimator()
+                self.load_source_estimator = None
+            if self.source_estimator is not None:
+                return self.source_estimator.predict(Xt)
+        return self.ensemble.predict(Xt)
+
+def _as_frame(columns):
+    # sklearn pipelines take a DataFrame, not the raw column dict
+    import pandas as pd
+    return pd.DataFrame(columns)
+
+def compile_model(model, probe=None, rtol=1e-9, atol=1e-9):
+    from sklearn.compose import ColumnTransformer
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    steps = [s for _, s in model.steps if s not in (None, "passthrough")] if isinstance(model, Pipeline) else [model]
+    *transforms, final = steps
+
+    input_names = list(getattr(steps[0], "feature_names_in_", range(getattr(steps[0], "n_features_in_", 0))))
+    names = input_names
+    current = list(range(len(names)))
+    stages = []
+    for trans in transforms:
+        if isinstance(trans, ColumnTransformer):
+            stage = []
+            for _, sub, spec in trans.transformers_:
+                cols = _resolve_columns(spec, names)
+                if (isinstance(sub, str) and sub == "drop") or not cols:
+                    continue
+                stage.append(_compile_transformer(sub, cols))
+        elif isinstance(trans, StandardScaler):
+            stage = [CompiledScaler(trans, current)]
+        else:
+            raise NotImplementedError(f"{type(trans).__name__} is not supported")
+        stages.append(stage)
+        # Later stages address the previous stage's output positionally
+        names = current = list(range(sum(step.n_outputs for step in stage)))
+
+    compiled = CompiledModel(input_names, stages, compile_estimator(final), source=model, source_estimator=final)
+
+    # Parity check against sklearn on caller-supplied rows
+    if probe is not None:
+        expected = model.predict(probe)
+        got = compiled.predict(probe)
+        if not np.allclose(got, expected, rtol=rtol, atol=atol):
+            worst = float(np.max(np.abs(got - expected)))
+            raise ValueError(f"Compiled model disagrees with sklearn (max abs diff {worst:.3g})")
+    return compiled
+
+# === PARITY + LATENCY REPORT ===
+def _time_call(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def main():
+    import warnings
+    warnings.filterwarnings("ignore")
+    import v7_5_sim_core as roi
+
+    water = roi.load_water_model(compiled=False)
+    revenue = roi.load_model(compiled=False)
+    for batch in (1, 51, 10_000, 100_000):
+        rng = np.random.default_rng(batch)
+        args = (
+            rng.choice(list(roi.ROI_WEIGHTS), batch), rng.integers(2025, 2076, batch),
+            rng.integers(0, 51, batch) * 10.0, rng.integers(0, 51, batch) * 10.0, rng.integers(0, 51, batch) * 10.0,
+        )
+        sizes = rng.choice([200, 300, 450], batch)
+        water_frame = roi.build_features_for_water_model_batch(*args, sizes)
+        water_cols = roi.build_water_model_columns(*args, sizes)
+        revenue_X = roi.build_features_batch(*args, sizes / 300)
+        for label, model, sk_input, fast_input in (
+            ("water", water, water_frame, water_cols),
+            ("revenue", revenue, revenue_X, revenue_X),
+        ):
+            fast = compile_model(model, probe=sk_input)
+            assert np.allclose(fast.predict(fast_input), model.predict(sk_input), rtol=1e-9, atol=1e-9)
+            repeat = 20 if batch < 10_000 else 3
+            numpy_only = lambda: fast.ensemble.predict(fast.transform(fast_input))
+            t_sk = _time_call(lambda: model.predict(sk_input), repeat)
+            t_fast = _time_call(lambda: fast.predict(fast_input), repeat)
+            t_numpy = _time_call(numpy_only, repeat)
+            print(f"{label:8s} batch={batch:6d}  sklearn {t_sk * 1e3:9.3f} ms  compiled {t_fast * 1e3:9.3f} ms  "
+                  f"(numpy traversal {t_numpy * 1e3:9.3f} ms)  speedup {t_sk / t_fast:6.1f}x  parity ok")
+
+if __name__ == "__main__":
+    main()